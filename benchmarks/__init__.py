@@ -0,0 +1 @@
+"""Benchmarks of the data loading and table functions and load tests of the callbacks."""
@@ -0,0 +1,500 @@
+"""
+Replays sessions of dash callback requests against the app and reports their
+latency and throughput.
+
+The app is created with main.create_app and served in process through the
+Flask test client, with the basic auth of the first valid login, so nothing
+is exposed on the network. A session is the list of callback requests a user
+sends while browsing the tabs: switching the utility, moving the year slider,
+picking peak dates and so on. It is either scripted, by following the
+responses of the app as the browser would, or read from a JSON file written
+with --record. Every worker thread replays the session with its own client,
+and the latency of each callback is reported as percentiles. Run it from the
+root of the repository:
+
+    python -m benchmarks.load_test --concurrency 4 --iterations 10
+"""
+import argparse
+import base64
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from flask.testing import FlaskClient
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from main import VALID_USERNAME_PASSWORD_PAIRS, create_app  # noqa: E402
+from src.data import catalogue, loader  # noqa: E402
+from src.tabs import cost_tab  # noqa: E402
+from src.utils import IDS, metrics, schema  # noqa: E402
+
+CALLBACK_PATH = '/' + metrics.CALLBACK_ROUTE
+PERCENTILES = (50, 95, 99)
+CONCURRENCY = 1
+ITERATIONS = 5
+POLL_INTERVAL = 0.05
+PEAK_DATES = 3
+
+POWER_PATH = '/power-demand-usage'
+ENERGY_PATH = '/out-of-hours-energy-consumption'
+COST_PATH = '/invoice-cost-analysis'
+OVERVIEW_PATH = '/energy-system-overview'
+
+
+def auth_headers() -> dict[str, str]:
+  """
+  Returns the basic auth header of the first valid login of the app.
+
+  Returns:
+      dict[str, str]: The request headers.
+  """
+  username, password = next(iter(VALID_USERNAME_PASSWORD_PAIRS.items()))
+  token = base64.b64encode(f'{username}:{password}'.encode('utf-8'))
+  return {'Authorization': f"Basic {token.decode('ascii')}"}
+
+
+def prop(component_id: str,
+         property: str,
+         value: Any = None) -> dict[str, Any]:
+  """
+  Returns a component property as the browser sends it.
+
+  Args:
+      component_id (str): The component ID.
+      property (str): The property.
+      value (Any, optional): The value of the property. Defaults to None.
+
+  Returns:
+      dict[str, Any]: The property.
+  """
+  return {'id': component_id, 'property': property, 'value': value}
+
+
+def callback_body(
+    outputs: list[tuple[str, str]],
+    inputs: list[dict[str, Any]],
+    state: Optional[list[dict[str, Any]]] = None,
+    changed: Optional[list[dict[str, Any]]] = None) -> dict[str, Any]:
+  """
+  Builds the body of a callback request.
+
+  Args:
+      outputs (list[tuple[str, str]]): The component IDs and properties of the outputs.
+      inputs (list[dict[str, Any]]): The inputs, built with prop.
+      state (Optional[list[dict[str, Any]]], optional): The states, built with prop. Defaults to no state.
+      changed (Optional[list[dict[str, Any]]], optional): The inputs that triggered the callback. Defaults to the first input.
+
+  Returns:
+      dict[str, Any]: The request body.
+  """
+  output_props = [{'id': id, 'property': property} for id, property in outputs]
+  if len(outputs) == 1:
+    output = f'{outputs[0][0]}.{outputs[0][1]}'
+  else:
+    output = '..' + '...'.join(f'{id}.{property}'
+                               for id, property in outputs) + '..'
+  changed = changed if changed is not None else inputs[:1]
+  return {
+      'output': output,
+      'outputs': output_props[0] if len(outputs) == 1 else output_props,
+      'inputs': inputs,
+      'state': state or [],
+      'changedPropIds':
+      [f"{item['id']}.{item['property']}" for item in changed],
+  }
+
+
+def post_callback(client: FlaskClient, body: dict[str, Any],
+                  headers: dict[str, str]) -> tuple[int, dict[str, Any]]:
+  """
+  Posts a callback request. The result of a background callback is polled
+  for, as the browser does, until the job has finished.
+
+  Args:
+      client (FlaskClient): The test client.
+      body (dict[str, Any]): The request body.
+      headers (dict[str, str]): The request headers.
+
+  Returns:
+      tuple[int, dict[str, Any]]: The status code and the JSON response, empty when there is none.
+  """
+  response = client.post(CALLBACK_PATH, json=body, headers=headers)
+  data = response.get_json(silent=True) or {}
+  if response.status_code != 200 or 'job' not in data:
+    return response.status_code, data
+  job = {'cacheKey': data['cacheKey'], 'job': data['job']}
+  while True:
+    time.sleep(POLL_INTERVAL)
+    response = client.post(CALLBACK_PATH,
+                           json=body,
+                           headers=headers,
+                           query_string=job)
+    data = response.get_json(silent=True) or {}
+    if response.status_code != 200 or 'response' in data:
+      return response.status_code, data
+
+
+def output_value(data: dict[str, Any], component_id: str,
+                 property: str) -> Any:
+  """
+  Returns the value of an output from a callback response.
+
+  Args:
+      data (dict[str, Any]): The JSON response.
+      component_id (str): The component ID of the output.
+      property (str): The property of the output.
+
+  Returns:
+      Any: The value, or None if the response does not update the output.
+  """
+  return data.get('response', {}).get(component_id, {}).get(property)
+
+
+class SessionRecorder():
+  """
+  Sends callback requests through a client and keeps their bodies as a
+  session to replay.
+
+  Methods:
+      send: Sends a callback request and records it.
+  """
+
+  def __init__(self, client: FlaskClient, headers: dict[str, str]) -> None:
+    self.client = client
+    self.headers = headers
+    self.bodies: list[dict[str, Any]] = []
+
+  def send(self,
+           outputs: list[tuple[str, str]],
+           inputs: list[dict[str, Any]],
+           state: Optional[list[dict[str, Any]]] = None) -> dict[str, Any]:
+    """
+    Sends a callback request and records it.
+
+    Args:
+        outputs (list[tuple[str, str]]): The component IDs and properties of the outputs.
+        inputs (list[dict[str, Any]]): The inputs, built with prop.
+        state (Optional[list[dict[str, Any]]], optional): The states, built with prop. Defaults to no state.
+
+    Returns:
+        dict[str, Any]: The JSON response, empty when the callback failed.
+    """
+    body = callback_body(outputs, inputs, state)
+    self.bodies.append(body)
+    status, data = post_callback(self.client, body, self.headers)
+    return data if status == 200 else {}
+
+
+def display_tab(recorder: SessionRecorder, pathname: str) -> None:
+  """
+  Opens a tab from the sidebar.
+
+  Args:
+      recorder (SessionRecorder): The session recorder.
+      pathname (str): The path of the tab.
+  """
+  recorder.send([(IDS.PAGE_CONTENT, 'children')],
+                [prop(IDS.URL, 'pathname', pathname)])
+
+
+def power_selection(recorder: SessionRecorder, meter_id: str,
+                    years: Optional[list[int]]) -> list[str]:
+  """
+  Selects years on the power tab, as moving the year slider does.
+
+  Args:
+      recorder (SessionRecorder): The session recorder.
+      meter_id (str): The selected meter ID.
+      years (Optional[list[int]]): The selected years, or None for every year.
+
+  Returns:
+      list[str]: The peak dates offered for the selection.
+  """
+  tab = IDS.POWER
+  data = recorder.send([(tab + IDS.DATASET, 'data')],
+                       [prop(tab + IDS.RANGESLIDER, 'value', years)])
+  dataset = output_value(data, tab + IDS.DATASET, 'data')
+  data = recorder.send([(tab + IDS.TABLE + '1', 'rowData'),
+                        (tab + IDS.FIGURE + '0', 'figure')], [
+                            prop(tab + IDS.DROPDOWN + '1', 'value', meter_id),
+                            prop(tab + IDS.DATASET, 'data', dataset)
+                        ])
+  table_data = output_value(data, tab + IDS.TABLE + '1', 'rowData')
+  data = recorder.send([(tab + IDS.DROPDOWN + '2', 'options'),
+                        (tab + IDS.DROPDOWN + '2', 'value')],
+                       [prop(tab + IDS.TABLE + '1', 'rowData', table_data)])
+  options = output_value(data, tab + IDS.DROPDOWN + '2', 'options') or []
+  return [option['value'] for option in options]
+
+
+def power_session(recorder: SessionRecorder) -> None:
+  """Opens the power tab, moves the year slider and picks peak dates."""
+  tab = IDS.POWER
+  display_tab(recorder, POWER_PATH)
+  meter_id = catalogue.hh_meters(schema.PageSchema.ELEC)[-1]
+  years = sorted(
+      loader.load_hh_data(resample=None,
+                          utility=schema.PageSchema.ELEC).index.year.unique())
+  selections = [None, [int(years[-1])], [int(year) for year in years[-2:]]]
+  for selected_years in selections:
+    peak_dates = power_selection(recorder, meter_id, selected_years)
+    for peak_date in peak_dates[:PEAK_DATES]:
+      recorder.send([(tab + IDS.FIGURE + '1', 'figure')], [
+          prop(tab + IDS.DROPDOWN + '2', 'value', peak_date),
+          prop(tab + IDS.DROPDOWN + '1', 'value', meter_id)
+      ])
+
+
+def consumption_session(recorder: SessionRecorder) -> None:
+  """Opens the consumption tab, switches the utility and picks peak dates."""
+  tab = IDS.ENERGY
+  display_tab(recorder, ENERGY_PATH)
+  baseline = schema.BASELINES[-1]
+  for utility in (schema.PageSchema.ELEC, schema.PageSchema.GAS):
+    data = recorder.send([(tab + IDS.DROPDOWN + '1', 'options'),
+                          (tab + IDS.DROPDOWN + '1', 'value')],
+                         [prop(tab + IDS.RADIOITEM, 'value', utility)])
+    meter_id = output_value(data, tab + IDS.DROPDOWN + '1', 'value')
+    data = recorder.send([(tab + IDS.DATASET, 'data')], [
+        prop(tab + IDS.RANGESLIDER, 'value'),
+        prop(tab + IDS.RADIOITEM, 'value', utility)
+    ])
+    dataset = output_value(data, tab + IDS.DATASET, 'data')
+    data = recorder.send([(tab + IDS.TABLE + '0', 'rowData'),
+                          (tab + IDS.FIGURE + '0', 'figure')],
+                         [
+                             prop(tab + IDS.DATASET, 'data', dataset),
+                             prop(tab + IDS.DROPDOWN + '1', 'value', meter_id),
+                             prop(tab + IDS.DROPDOWN + '0', 'value', baseline)
+                         ])
+    table_data = output_value(data, tab + IDS.TABLE + '0', 'rowData')
+    data = recorder.send([(tab + IDS.DROPDOWN + '2', 'options')],
+                         [prop(tab + IDS.TABLE + '0', 'rowData', table_data)])
+    options = output_value(data, tab + IDS.DROPDOWN + '2', 'options') or []
+    recorder.send([(tab + IDS.DROPDOWN + '2', 'value')],
+                  [prop(tab + IDS.DROPDOWN + '2', 'options', options)])
+    for option in options[-PEAK_DATES:]:
+      recorder.send([(tab + IDS.FIGURE + '1', 'figure')], [
+          prop(tab + IDS.DROPDOWN + '2', 'value', option['value']),
+          prop(tab + IDS.DROPDOWN + '0', 'value', baseline),
+          prop(tab + IDS.DROPDOWN + '1', 'value', meter_id)
+      ], [prop(tab + IDS.DATASET, 'data', dataset)])
+
+
+def overview_session(recorder: SessionRecorder) -> None:
+  """Opens the overview tab and switches the utility."""
+  tab = IDS.OVERVIEW
+  display_tab(recorder, OVERVIEW_PATH)
+  for utility in (schema.PageSchema.ELEC, schema.PageSchema.GAS):
+    data = recorder.send([(tab + IDS.DROPDOWN + '2', 'options'),
+                          (tab + IDS.DROPDOWN + '2', 'value')],
+                         [prop(tab + IDS.RADIOITEM, 'value', utility)])
+    meter_id = output_value(data, tab + IDS.DROPDOWN + '2', 'value')
+    recorder.send([(tab + IDS.FIGURE + '0', 'figure'),
+                   (tab + IDS.TABLE + '0', 'rowData'),
+                   (tab + IDS.TABLE + '0', 'columnDefs')], [
+                       prop(tab + IDS.RADIOITEM, 'value', utility),
+                       prop(tab + IDS.DROPDOWN + '2', 'value', meter_id)
+                   ])
+
+
+def cost_session(recorder: SessionRecorder) -> None:
+  """Opens the cost tab, switches the utility and the plot value type."""
+  tab = IDS.COST
+  display_tab(recorder, COST_PATH)
+  for utility in (schema.PageSchema.ELEC, schema.PageSchema.GAS):
+    data = recorder.send([(tab + IDS.DROPDOWN + '0', 'options'),
+                          (tab + IDS.DROPDOWN + '0', 'value')],
+                         [prop(tab + IDS.RADIOITEM, 'value', utility)])
+    meter_id = output_value(data, tab + IDS.DROPDOWN + '0', 'value')
+    for plot_type in cost_tab.PLOT_TYPES:
+      recorder.send([(tab + IDS.FIGURE + '0', 'figure')], [
+          prop(tab + IDS.RADIOITEM, 'value', utility),
+          prop(tab + IDS.DROPDOWN + '0', 'value', meter_id),
+          prop(tab + IDS.RADIOITEM + '1', 'value', plot_type),
+          prop(tab + IDS.RANGESLIDER, 'value')
+      ])
+
+
+def scripted_session(client: FlaskClient,
+                     headers: dict[str, str]) -> list[dict[str, Any]]:
+  """
+  Browses every tab through a client and records the callback requests.
+
+  Args:
+      client (FlaskClient): The test client.
+      headers (dict[str, str]): The request headers.
+
+  Returns:
+      list[dict[str, Any]]: The bodies of the callback requests.
+  """
+  recorder = SessionRecorder(client, headers)
+  for tab_session in (overview_session, power_session, consumption_session,
+                      cost_session):
+    tab_session(recorder)
+  return recorder.bodies
+
+
+def replay(client: FlaskClient, headers: dict[str, str],
+           bodies: list[dict[str, Any]],
+           iterations: int) -> list[tuple[str, float, int]]:
+  """
+  Replays a session.
+
+  Args:
+      client (FlaskClient): The test client.
+      headers (dict[str, str]): The request headers.
+      bodies (list[dict[str, Any]]): The bodies of the callback requests.
+      iterations (int): The number of times the session is replayed.
+
+  Returns:
+      list[tuple[str, float, int]]: The output, latency in seconds and status code of every request.
+  """
+  samples = []
+  for _ in range(iterations):
+    for body in bodies:
+      start = time.perf_counter()
+      status, _ = post_callback(client, body, headers)
+      samples.append((body['output'], time.perf_counter() - start, status))
+  return samples
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+  """
+  Summarizes latencies.
+
+  Args:
+      latencies (list[float]): The latencies in seconds.
+
+  Returns:
+      dict[str, float]: The mean and percentiles in milliseconds.
+  """
+  values = np.percentile(np.array(latencies) * 1000, PERCENTILES)
+  summary = {
+      f'p{percentile}_ms': round(float(value), 2)
+      for percentile, value in zip(PERCENTILES, values)
+  }
+  summary['mean_ms'] = round(statistics.mean(latencies) * 1000, 2)
+  return summary
+
+
+def run_load_test(app: Any, bodies: list[dict[str, Any]], concurrency: int,
+                  iterations: int) -> dict[str, Any]:
+  """
+  Replays a session from concurrent workers and summarizes the latencies.
+
+  Args:
+      app (Any): The dash app.
+      bodies (list[dict[str, Any]]): The bodies of the callback requests.
+      concurrency (int): The number of workers replaying the session at the same time.
+      iterations (int): The number of times each worker replays the session.
+
+  Returns:
+      dict[str, Any]: The overall and per callback latencies and the throughput.
+  """
+  headers = auth_headers()
+  barrier = threading.Barrier(concurrency)
+
+  def worker() -> list[tuple[str, float, int]]:
+    client = app.server.test_client()
+    barrier.wait()
+    return replay(client, headers, bodies, iterations)
+
+  start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=concurrency) as executor:
+    futures = [executor.submit(worker) for _ in range(concurrency)]
+    samples = [sample for future in futures for sample in future.result()]
+  elapsed = time.perf_counter() - start
+
+  by_callback: dict[str, list[tuple[float, int]]] = {}
+  for output, latency, status in samples:
+    name = metrics.callback_name(app, {'output': output})
+    by_callback.setdefault(name, []).append((latency, status))
+  return {
+      'concurrency': concurrency,
+      'iterations': iterations,
+      'requests': len(samples),
+      'errors': sum(status != 200 for _, _, status in samples),
+      'seconds': round(elapsed, 3),
+      'requests_per_second': round(len(samples) / elapsed, 2),
+      'latency': latency_summary([latency for _, latency, _ in samples]),
+      'callbacks': {
+          name: {
+              'requests': len(items),
+              'errors': sum(status != 200 for _, status in items),
+              **latency_summary([latency for latency, _ in items]),
+          }
+          for name, items in sorted(by_callback.items())
+      },
+  }
+
+
+def print_report(report: dict[str, Any]) -> None:
+  """Prints the latencies of a load test as a table."""
+  header = ''.join(f'{f"p{percentile}":>10}' for percentile in PERCENTILES)
+  print(f"{'callback':<48}{'requests':>9}{'errors':>8}{header}")
+  rows = [
+      *report['callbacks'].items(),
+      ('all', {
+          'requests': report['requests'],
+          'errors': report['errors'],
+          **report['latency']
+      })
+  ]
+  for name, item in rows:
+    values = ''.join(f"{item[f'p{percentile}_ms']:>8.1f}ms"
+                     for percentile in PERCENTILES)
+    print(f"{name:<48}{item['requests']:>9}{item['errors']:>8}{values}")
+  print(f"{report['requests']} requests in {report['seconds']} s with "
+        f"{report['concurrency']} workers: "
+        f"{report['requests_per_second']} requests/s")
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+  parser.add_argument('--iterations', type=int, default=ITERATIONS)
+  parser.add_argument('--session',
+                      type=Path,
+                      help='Replay the callback requests of a JSON file.')
+  parser.add_argument('--record',
+                      type=Path,
+                      help='Write the scripted session to a JSON file.')
+  parser.add_argument('--output',
+                      type=Path,
+                      help='Write the report to a JSON file.')
+  parser.add_argument('--cold',
+                      action='store_true',
+                      help='Skip the warmup of the caches.')
+  args = parser.parse_args()
+
+  app = create_app(warm=not args.cold, warm_in_background=False)
+  client = app.server.test_client()
+  headers = auth_headers()
+  # The first request sets up the callback map of the app.
+  client.get('/', headers=headers)
+  if args.session:
+    bodies = json.loads(args.session.read_text(encoding='utf-8'))
+  else:
+    bodies = scripted_session(client, headers)
+  if args.record:
+    args.record.write_text(json.dumps(bodies, indent=2), encoding='utf-8')
+    print(f'Wrote {len(bodies)} callback requests to {args.record}')
+
+  report = run_load_test(app, bodies, args.concurrency, args.iterations)
+  print_report(report)
+  if args.output:
+    args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,236 @@
+"""
+Times the data loading and table functions on synthetic data sources.
+
+For every combination of the numbers of meters and years, a full set of data
+sources is generated with benchmarks.synthetic, the loader is pointed at it
+and each function is timed. The results are written as JSON. Run it from the
+root of the repository:
+
+    python -m benchmarks.run --meters 1 10 100 500 --years 1 5 10
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks import synthetic  # noqa: E402
+from src.components import consumption_plots, power_plots, summary_plot  # noqa: E402
+from src.data import catalogue, columnar, loader, session, shared  # noqa: E402
+from src.utils import schema  # noqa: E402
+
+METERS = [1, 10, 100, 500]
+YEARS = [1, 2, 5, 10]
+REPEAT = 3
+OUTPUT = Path('benchmark_results.json')
+
+
+@contextlib.contextmanager
+def use_sources(sources: synthetic.SyntheticSources) -> Iterator[None]:
+  """
+  Points the loader at a set of data sources, with empty caches, and restores
+  the shipped sources afterwards.
+
+  Args:
+      sources (synthetic.SyntheticSources): The data sources to load.
+  """
+  paths = (loader.ELEC_HH_PATH, loader.GAS_HH_PATH, loader.ELEC_INVOICE_PATH,
+           loader.GAS_INVOICE_PATH)
+  (loader.ELEC_HH_PATH, loader.GAS_HH_PATH, loader.ELEC_INVOICE_PATH,
+   loader.GAS_INVOICE_PATH) = (sources.elec_hh, sources.gas_hh,
+                               sources.elec_invoice, sources.gas_invoice)
+  loader.HH_STORE.clear()
+  catalogue.clear()
+  session.SESSION_DATASETS.clear()
+  try:
+    yield
+  finally:
+    (loader.ELEC_HH_PATH, loader.GAS_HH_PATH, loader.ELEC_INVOICE_PATH,
+     loader.GAS_INVOICE_PATH) = paths
+    loader.HH_STORE.clear()
+    catalogue.clear()
+    session.SESSION_DATASETS.clear()
+
+
+@contextlib.contextmanager
+def power_limits(meter_ids: list[str]) -> Iterator[None]:
+  """
+  Registers the power limit of synthetic meters for the power tables.
+
+  Args:
+      meter_ids (list[str]): The synthetic electricity meter IDs.
+  """
+  previous = dict(power_plots.POWER_LIMS)
+  power_plots.POWER_LIMS.update(
+      {meter_id: synthetic.POWER_LIMIT
+       for meter_id in meter_ids})
+  try:
+    yield
+  finally:
+    power_plots.POWER_LIMS.clear()
+    power_plots.POWER_LIMS.update(previous)
+
+
+def time_call(func: Callable[[], Any],
+              repeat: int,
+              setup: Callable[[], None] = lambda: None) -> list[float]:
+  """
+  Times a function.
+
+  Args:
+      func (Callable[[], Any]): The function to time.
+      repeat (int): The number of timed calls.
+      setup (Callable[[], None], optional): Runs untimed before each call. Defaults to no setup.
+
+  Returns:
+      list[float]: The duration of each call in seconds.
+  """
+  durations = []
+  for _ in range(repeat):
+    setup()
+    start = time.perf_counter()
+    func()
+    durations.append(time.perf_counter() - start)
+  return durations
+
+
+def cold_hh_load(utility: str, keep_columnar: bool) -> Callable[[], None]:
+  """
+  Returns a setup that empties the loader store and, unless keep_columnar is
+  set, removes the columnar cache file, so that the half hourly data is read
+  again from the csv file or the columnar file.
+
+  Args:
+      utility (str): The utility type.
+      keep_columnar (bool): Whether to keep the columnar cache file.
+
+  Returns:
+      Callable[[], None]: The setup.
+  """
+
+  def setup() -> None:
+    loader.HH_STORE.clear()
+    if not keep_columnar:
+      columnar.cache_path(loader.hh_data_path(utility)).unlink(missing_ok=True)
+
+  return setup
+
+
+def benchmark_scale(meters: int, years: int, repeat: int,
+                    directory: Path) -> list[dict[str, Any]]:
+  """
+  Generates the data sources of one scale and times every function on them.
+
+  Args:
+      meters (int): The number of meters of each utility.
+      years (int): The number of years of data.
+      repeat (int): The number of timed calls of each function.
+      directory (Path): The directory to generate the sources in.
+
+  Returns:
+      list[dict[str, Any]]: The timings of each function.
+  """
+  sources = synthetic.generate(directory, meters, years)
+  elec = schema.PageSchema.ELEC
+  timings: dict[str, list[float]] = {}
+  with use_sources(sources), power_limits(sources.elec_meters):
+    timings['load_hh_data'] = time_call(
+        lambda: loader.load_hh_data(resample=None, utility=elec), repeat,
+        cold_hh_load(elec, keep_columnar=False))
+    if columnar.available():
+      loader.build_columnar_cache()
+      timings['load_hh_data (columnar cache)'] = time_call(
+          lambda: loader.load_hh_data(resample=None, utility=elec), repeat,
+          cold_hh_load(elec, keep_columnar=True))
+    timings['prep_gas_data'] = time_call(loader.prep_gas_data, repeat)
+
+    dataf = loader.load_hh_data(resample=None, utility=elec)
+    monthly = loader.load_hh_data(resample='1MS', utility=elec)
+    meter_data = dataf.drop([schema.HHSchema.MONTH_OF_YEAR, 'All'], axis=1)
+    meter_id = meter_data.columns[0]
+    # The datasets the consumption and power tab callbacks build by default.
+    consump_data = session.resolve(session.create_handle(elec, drop=['All']))
+    power_data = session.resolve(session.create_handle(elec, year_range=False))
+    timings['create_baselines'] = time_call(
+        lambda: consumption_plots.create_baselines(consump_data, meter_id),
+        repeat)
+    timings['new_consump_periods'] = time_call(
+        lambda: consumption_plots.new_consump_periods(consump_data, meter_id),
+        repeat)
+    timings['create_high_demand_table'] = time_call(
+        lambda: power_plots.create_high_demand_table(power_data, meter_id),
+        repeat)
+    timings['power_demand_overview'] = time_call(
+        lambda: power_plots.power_demand_overview(meter_data), repeat)
+    timings['create_summary_table'] = time_call(
+        lambda: summary_plot.create_summary_table(monthly, schema.PlotSchema.
+                                                  E_MWH, 'All'), repeat)
+  return [{
+      'function': name,
+      'meters': meters,
+      'years': years,
+      'rows': len(dataf),
+      'seconds': durations,
+      'min': min(durations),
+      'median': statistics.median(durations),
+  } for name, durations in timings.items()]
+
+
+def environment() -> dict[str, str]:
+  """
+  Describes the environment the benchmark ran in.
+
+  Returns:
+      dict[str, str]: The Python, pandas and numpy versions and the platform.
+  """
+  return {
+      'python': platform.python_version(),
+      'pandas': pd.__version__,
+      'numpy': np.__version__,
+      'platform': platform.platform(),
+      'columnar_cache': str(columnar.available()),
+  }
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+  parser.add_argument('--meters', type=int, nargs='+', default=METERS)
+  parser.add_argument('--years', type=int, nargs='+', default=YEARS)
+  parser.add_argument('--repeat', type=int, default=REPEAT)
+  parser.add_argument('--output', type=Path, default=OUTPUT)
+  args = parser.parse_args()
+  os.environ.pop(shared.SHARED_DATA_DIR_ENV, None)
+
+  results = []
+  for meters in args.meters:
+    for years in args.years:
+      with tempfile.TemporaryDirectory() as directory:
+        scale = benchmark_scale(meters, years, args.repeat, Path(directory))
+      for result in scale:
+        print(f"{result['function']:<32} meters={meters:<4} years={years:<3} "
+              f"median={result['median']:.4f}s")
+      results.extend(scale)
+
+  args.output.write_text(json.dumps(
+      {
+          'environment': environment(),
+          'results': results
+      }, indent=2),
+                         encoding='utf-8')
+  print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+  main()
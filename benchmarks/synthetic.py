@@ -0,0 +1,197 @@
+"""
+Synthetic data sources in the formats of the files in src/data.
+
+The generated half hourly files follow the layout of elec_hh_data.csv (one
+column per meter) and gas_hh_data.csv (one row per meter and day), with a
+working hours profile, a seasonal swing and noise on every meter. The invoice
+files repeat the rows of the shipped invoice files for every meter and month.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import loader
+from src.utils import schema
+
+START = pd.Timestamp('2021-01-01')
+SEED = 0
+ELEC_METER_OFFSET = 100000
+GAS_METER_OFFSET = 10000000
+# Power limit in kW of the synthetic electricity meters.
+POWER_LIMIT = 1000
+
+
+@dataclass
+class SyntheticSources:
+  """The paths and meter IDs of a generated set of data sources."""
+  elec_hh: Path
+  gas_hh: Path
+  elec_invoice: Path
+  gas_invoice: Path
+  elec_meters: list[str] = field(default_factory=list)
+  gas_meters: list[int] = field(default_factory=list)
+
+
+def half_hourly_index(years: int) -> pd.DatetimeIndex:
+  """
+  Returns the half hourly timestamps of the given number of years from START.
+
+  Args:
+      years (int): The number of years.
+
+  Returns:
+      pd.DatetimeIndex: The half hourly timestamps.
+  """
+  return pd.date_range(START,
+                       START + pd.DateOffset(years=years),
+                       freq='30min',
+                       inclusive='left')
+
+
+def consumption_profile(index: pd.DatetimeIndex, meters: int,
+                        rng: np.random.Generator) -> np.ndarray:
+  """
+  Generates half hourly consumption with a base load, a working hours load
+  and a seasonal swing scaled per meter, plus noise.
+
+  Args:
+      index (pd.DatetimeIndex): The half hourly timestamps.
+      meters (int): The number of meters.
+      rng (np.random.Generator): The random generator.
+
+  Returns:
+      np.ndarray: The consumption, one row per timestamp and one column per meter.
+  """
+  hours = index.hour.to_numpy() + index.minute.to_numpy() / 60
+  working = ((hours >= 8) & (hours < 18) & (index.dayofweek.to_numpy() < 5))
+  season = 1 + 0.3 * np.cos(2 * np.pi * index.dayofyear.to_numpy() / 365.25)
+  base = rng.uniform(5, 50, meters)
+  peak = rng.uniform(10, 200, meters)
+  profile = (base[np.newaxis, :] + working[:, np.newaxis] *
+             peak[np.newaxis, :]) * season[:, np.newaxis]
+  noise = rng.normal(1, 0.1, (len(index), meters))
+  return np.round(np.clip(profile * noise, 0, None), 1)
+
+
+def write_elec_hh(path: Path, meters: int, years: int,
+                  rng: np.random.Generator) -> list[str]:
+  """
+  Writes half hourly electricity data in the layout of elec_hh_data.csv.
+
+  Args:
+      path (Path): The csv file to write.
+      meters (int): The number of meters.
+      years (int): The number of years.
+      rng (np.random.Generator): The random generator.
+
+  Returns:
+      list[str]: The meter IDs.
+  """
+  index = half_hourly_index(years)
+  meter_ids = [str(ELEC_METER_OFFSET + meter) for meter in range(meters)]
+  dataf = pd.DataFrame(consumption_profile(index, meters, rng),
+                       index=pd.Index(index, name='Date (UTC)'),
+                       columns=meter_ids)
+  dataf.to_csv(path, float_format='%.1f')
+  return meter_ids
+
+
+def write_gas_hh(path: Path, meters: int, years: int,
+                 rng: np.random.Generator) -> list[int]:
+  """
+  Writes half hourly gas data in the layout of gas_hh_data.csv: one row per
+  meter and day with a column per half hour, labelled by the end of the period.
+
+  Args:
+      path (Path): The csv file to write.
+      meters (int): The number of meters.
+      years (int): The number of years.
+      rng (np.random.Generator): The random generator.
+
+  Returns:
+      list[int]: The meter IDs.
+  """
+  period_cols = [
+      col for col in pd.read_csv(loader.GAS_HH_PATH, nrows=0).columns
+      if col not in (schema.InvoiceSchema.MPR_2, schema.InvoiceSchema.READDATE)
+  ]
+  index = half_hourly_index(years)
+  days = index[::len(period_cols)]
+  values = consumption_profile(index, meters, rng)
+  # One row per (meter, day) with the periods of that day as columns.
+  values = values.reshape(len(days), len(period_cols),
+                          meters).transpose(2, 0,
+                                            1).reshape(-1, len(period_cols))
+  meter_ids = [GAS_METER_OFFSET + meter for meter in range(meters)]
+  dataf = pd.DataFrame(values, columns=period_cols)
+  dataf.insert(0, schema.InvoiceSchema.READDATE,
+               np.tile(days.strftime('%d/%m/%Y'), meters))
+  dataf.insert(0, schema.InvoiceSchema.MPR_2, np.repeat(meter_ids, len(days)))
+  dataf.to_csv(path, index=False, float_format='%.4f')
+  return meter_ids
+
+
+def write_invoices(template: Path, path: Path, meter_ids: list, meter_col: str,
+                   date_col: int, years: int) -> None:
+  """
+  Writes monthly invoices for every meter by repeating the rows of a shipped
+  invoice file with their dates and meters replaced.
+
+  Args:
+      template (Path): The shipped invoice csv file.
+      path (Path): The csv file to write.
+      meter_ids (list): The meter IDs.
+      meter_col (str): The meter column.
+      date_col (int): The position of the date column.
+      years (int): The number of years.
+  """
+  rows = pd.read_csv(template)
+  months = pd.date_range(START, periods=12 * years, freq='MS')
+  invoices = rows.iloc[np.arange(len(months) * len(meter_ids)) % len(rows)]
+  invoices = invoices.reset_index(drop=True)
+  invoices.iloc[:, date_col] = np.tile(months.strftime('%Y-%m-%d'),
+                                       len(meter_ids))
+  invoices[meter_col] = np.repeat(meter_ids, len(months))
+  if date_col != 0:
+    invoices.iloc[:, 0] = np.arange(len(invoices))
+  # Keep the blank header of the unnamed index column.
+  invoices.columns = [
+      '' if str(col).startswith('Unnamed:') else col
+      for col in invoices.columns
+  ]
+  invoices.to_csv(path, index=False)
+
+
+def generate(directory: Path,
+             meters: int,
+             years: int,
+             seed: int = SEED) -> SyntheticSources:
+  """
+  Generates a full set of data sources.
+
+  Args:
+      directory (Path): The directory to write the files to.
+      meters (int): The number of meters of each utility.
+      years (int): The number of years of data.
+      seed (int, optional): The seed of the random generator. Defaults to SEED.
+
+  Returns:
+      SyntheticSources: The paths of the generated files.
+  """
+  directory.mkdir(parents=True, exist_ok=True)
+  rng = np.random.default_rng(seed)
+  sources = SyntheticSources(
+      elec_hh=directory / loader.ELEC_HH_PATH.name,
+      gas_hh=directory / loader.GAS_HH_PATH.name,
+      elec_invoice=directory / loader.ELEC_INVOICE_PATH.name,
+      gas_invoice=directory / loader.GAS_INVOICE_PATH.name)
+  sources.elec_meters = write_elec_hh(sources.elec_hh, meters, years, rng)
+  sources.gas_meters = write_gas_hh(sources.gas_hh, meters, years, rng)
+  write_invoices(loader.ELEC_INVOICE_PATH, sources.elec_invoice,
+                 [int(meter) for meter in sources.elec_meters],
+                 schema.InvoiceSchema.MPAN_MPR, 0, years)
+  write_invoices(loader.GAS_INVOICE_PATH, sources.gas_invoice,
+                 sources.gas_meters, schema.InvoiceSchema.MPR, 1, years)
+  return sources
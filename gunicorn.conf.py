@@ -0,0 +1,18 @@
+"""
+Gunicorn settings of the production entrypoint in wsgi.py.
+
+The number of workers and threads can be set with the WEB_CONCURRENCY and
+WEB_THREADS environment variables and the port with PORT.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8070')}"
+workers = int(
+    os.environ.get('WEB_CONCURRENCY',
+                   multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 2))
+# Load the app in the master so the workers share its warmed memory.
+preload_app = True
+timeout = 120
+accesslog = '-'
@@ -5,7 +5,7 @@ from flask import Flask
 
 from src.components.sidebar import get_sidebar
 from src.tabs import consumption_tab, cost_tab, overview_tab, power_tab
-from src.utils import IDS, page_text
+from src.utils import IDS, metrics, page_text, warmup
 
 CONTENT_STYLE = {
     "margin-left": "18rem",
@@ -36,7 +36,11 @@ def create_layout(app: Dash) -> html.Div:
   ])
 
 
-def create_app():
+def create_app(warm: bool = True, warm_in_background: bool = True):
+  """Creates the app and, unless warm is False, starts warming its caches. \
+  The unauthenticated /ready route answers 200 once the warmup has finished \
+  and 503 before. The callbacks are measured and their metrics are served \
+  locally on /metrics."""
   server = Flask(__name__)
   app = Dash(external_stylesheets=[LUX],
              suppress_callback_exceptions=True,
@@ -44,6 +48,16 @@ def create_app():
   dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
   app.title = page_text.TabSchema.TITLE
   app.layout = create_layout(app)
+  metrics.instrument(app)
+
+  @server.route('/ready')
+  def ready():
+    if warmup.is_ready():
+      return 'ready', 200
+    return 'warming up', 503
+
+  if warm:
+    warmup.start(in_background=warm_in_background)
   return app
 
 
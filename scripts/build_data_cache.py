@@ -0,0 +1,19 @@
+"""Build the columnar cache files for the csv data sources.
+
+The data paths are resolved from the loader module, so the script can be run
+from any directory.
+"""
+
+import sys
+from pathlib import Path
+
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root))
+
+from src.data import columnar, loader  # noqa: E402
+
+if not columnar.available():
+  sys.exit("pyarrow is not installed, the columnar cache is disabled.")
+
+for path in loader.build_columnar_cache():
+  print(f"Wrote {path}")
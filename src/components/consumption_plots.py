@@ -1,5 +1,8 @@
-from datetime import datetime, time, timedelta
-from typing import Any
+import os
+import tempfile
+from datetime import datetime, time
+from pathlib import Path
+from typing import Any, Optional
 
 import numpy as np
 import pandas as pd
@@ -7,7 +10,30 @@ import plotly.express as px  # type: ignore
 import plotly.graph_objects as go  # type: ignore
 
 from src.components import gen_content_obj, line_fig
-from src.utils import IDS, schema
+from src.data import loader, session
+from src.utils import IDS, cache, schema, time_index
+
+BASELINE_QUANTILE = 0.10
+BASELINE_CACHE_BYTES = 64 * 1024 * 1024
+BASELINE_CACHE_DIR_ENV = 'BASELINE_CACHE_DIR'
+BASELINE_CACHE_DIR = os.path.join(tempfile.gettempdir(),
+                                  'dashboard-plotter-baselines')
+
+# Baselines keyed by (dataset handle, meter, quantile, data version). They are
+# kept in the directory named by BASELINE_CACHE_DIR, so the background jobs,
+# the server workers and the warmup all share them.
+BASELINE_CACHE = cache.create_shared_cache(
+    Path(os.environ.get(BASELINE_CACHE_DIR_ENV, BASELINE_CACHE_DIR)),
+    BASELINE_CACHE_BYTES)
+
+# Season number (1 winter to 4 autumn) of each month number.
+SEASON_OF_MONTH = np.array([0, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 1])
+# Columns of the out of hours periods table made by new_consump_periods.
+PERIOD_COLUMNS = [
+    schema.PageSchema.START_DATE, schema.PageSchema.END_DATE,
+    schema.PageSchema.PERIOD_CONSUMP, schema.PageSchema.EXP_CONSUMP,
+    schema.PageSchema.PERC_BASELINE
+]
 
 WORK_HOURS = {
     f'{IDS.ELEC_MPR_1}': {
@@ -25,9 +51,94 @@ WORK_HOURS = {
 }
 
 
-def create_consumption_lineplot(data: pd.DataFrame, selected_meter_id: Any,
-                                selected_baseline: str,
-                                selected_date: datetime) -> go.Figure:
+def consumption_peak_time(selected_meter_id: Any,
+                          selected_date: datetime) -> pd.Timestamp:
+  """
+  Returns the end of the working hours of a meter on the selected date.
+
+  Args:
+      selected_meter_id (Any): The meter mpr.
+      selected_date (datetime): The selected date.
+
+  Returns:
+      pd.Timestamp: The end of the working hours on the selected date.
+  """
+  added_time = WORK_HOURS[selected_meter_id]['end']
+  time_dur = pd.Timedelta(hours=added_time.hour,
+                          minutes=added_time.minute,
+                          seconds=added_time.second)
+  return pd.to_datetime(selected_date) + time_dur
+
+
+def consumption_window(data: pd.DataFrame, selected_meter_id: Any,
+                       selected_date: datetime) -> pd.DataFrame:
+  """
+  Selects the data plotted around the selected peak consumption period, from \
+  3 days before the selected date to 3.5 days after the end of its working hours.
+
+  Args:
+      data (pd.DataFrame): The half-hourly data.
+      selected_meter_id (Any): The meter mpr.
+      selected_date (datetime): The selected date.
+
+  Returns:
+      pd.DataFrame: The data within the window.
+  """
+  start_date, end_date = consumption_window_bounds(selected_meter_id,
+                                                   selected_date)
+  return time_index.between(data, start_date, end_date)
+
+
+def consumption_window_bounds(
+    selected_meter_id: Any,
+    selected_date: datetime) -> tuple[pd.Timestamp, pd.Timestamp]:
+  """
+  Returns the first and last timestamps of the window plotted around the \
+  selected peak consumption period.
+
+  Args:
+      selected_meter_id (Any): The meter mpr.
+      selected_date (datetime): The selected date.
+
+  Returns:
+      tuple[pd.Timestamp, pd.Timestamp]: The start and end of the window, both included.
+  """
+  chosen_date = consumption_peak_time(selected_meter_id, selected_date)
+  start_date = pd.to_datetime(selected_date) - pd.DateOffset(days=3)
+  end_date = chosen_date + pd.DateOffset(days=3, hours=12)
+  return start_date, end_date
+
+
+def consumption_series(selected_meter_id: Any, selected_date: datetime,
+                       utility: str) -> pd.Series:
+  """
+  Selects the consumption of a meter within the window plotted around the \
+  selected peak consumption period, reading only that window of the meter \
+  from the per meter arrays.
+
+  Args:
+      selected_meter_id (Any): The meter mpr.
+      selected_date (datetime): The selected date.
+      utility (str): The utility of the meter.
+
+  Returns:
+      pd.Series: The half-hourly consumption of the meter within the window.
+  """
+  start_date, end_date = consumption_window_bounds(selected_meter_id,
+                                                   selected_date)
+  hh_arrays = loader.load_hh_arrays(utility)
+  if hh_arrays is not None and selected_meter_id in hh_arrays.meters:
+    return hh_arrays.series(selected_meter_id, start_date, end_date)
+  data = loader.load_hh_data(resample=None, utility=utility)
+  return time_index.between(data[selected_meter_id], start_date, end_date)
+
+
+def create_consumption_lineplot(
+    data: pd.DataFrame,
+    selected_meter_id: Any,
+    selected_baseline: str,
+    selected_date: datetime,
+    dataset: Optional[dict[str, Any]] = None) -> go.Figure:
   """ 
   This uses the create_lower_lineplot function to create the high consumption \
   lineplot and adds a horizontal line to the plot at the selected baseline value.
@@ -37,19 +148,14 @@ def create_consumption_lineplot(data: pd.DataFrame, selected_meter_id: Any,
       selected_meter_id (Any): The meter mpr to be plotted.
       selected_baseline (str): The baseload to be plotted [monthly, seasonal, annually].
       selected_date (datetime): The date to be plotted (the peak consumption period +- 3 days).
+      dataset (Optional[dict[str, Any]], optional): The dataset handle the data was resolved from, used to cache the baselines. Defaults to None.
 
   Returns:
       go.Figure: The lineplot with the horizontal line at the selected baseline value.
   """
-  added_time = WORK_HOURS[selected_meter_id]['end']
-  time_dur = pd.Timedelta(hours=added_time.hour,
-                          minutes=added_time.minute,
-                          seconds=added_time.second)
-  chosen_date = pd.to_datetime(selected_date) + time_dur
-  start_date = pd.to_datetime(selected_date) - pd.DateOffset(days=3)
-  end_date = chosen_date + pd.DateOffset(days=3, hours=12)
-  filtered_data = data[(data.index >= start_date) & (data.index <= end_date)]
-  baseline_dataf = create_baselines(data, selected_meter_id)
+  chosen_date = consumption_peak_time(selected_meter_id, selected_date)
+  filtered_data = consumption_window(data, selected_meter_id, selected_date)
+  baseline_dataf = create_baselines(data, selected_meter_id, dataset=dataset)
   hline_val: float = baseline_dataf.loc[chosen_date][selected_baseline]
   fig = gen_content_obj.add_hline(line_fig.create_lower_lineplot(
       filtered_data,
@@ -86,14 +192,65 @@ def create_high_demand_table(df: pd.DataFrame,
       })
 
 
+def compute_baselines(dataf: pd.DataFrame, target_col: str,
+                      quantile: float) -> pd.DataFrame:
+  """ 
+  Computes the annual, seasonal and monthly baselines of the target column.
+
+  The three baselines are the quantile of the target column per year, per
+  season of each year and per month of each year. The rows are stacked once
+  per grouping so a single native groupby quantile computes all three, and the
+  results are broadcast back to the rows by group code.
+
+  Args:
+      dataf (pd.DataFrame): The data to be used for the baselines.
+      target_col (str): The column to be used for the baselines.
+      quantile (float): The quantile used as the baseline.
+
+  Returns:
+      pd.DataFrame: The annual, seasonal and monthly baselines of each row.
+  """
+  years = dataf.index.year.to_numpy()
+  months = dataf.index.month.to_numpy()
+  year_codes = pd.factorize(years)[0]
+  group_codes = [
+      year_codes,
+      pd.factorize(year_codes * len(schema.SEASONS) +
+                   SEASON_OF_MONTH[months])[0],
+      pd.factorize(year_codes * len(schema.MONTHS) + months)[0],
+  ]
+  offsets = np.cumsum(
+      [0] + [codes.max(initial=-1) + 1 for codes in group_codes[:-1]])
+  values = dataf[target_col].to_numpy(dtype=float)
+  quantiles = pd.Series(np.tile(values, len(group_codes))).groupby(
+      np.concatenate([
+          codes + offset for codes, offset in zip(group_codes, offsets)
+      ])).quantile(quantile).to_numpy()
+  return pd.DataFrame(
+      {
+          baseline: quantiles[codes + offset]
+          for baseline, codes, offset in zip(schema.BASELINES, group_codes,
+                                             offsets)
+      },
+      index=dataf.index)
+
+
 def create_baselines(dataf: pd.DataFrame,
-                     target_col: str = 'All') -> pd.DataFrame:
+                     target_col: str = 'All',
+                     quantile: float = BASELINE_QUANTILE,
+                     dataset: Optional[dict[str, Any]] = None) -> pd.DataFrame:
   """ 
   This function creates the annual, seasonal and monthly baselines from the data.
 
+  When the dataset handle of the data is given the baselines are read from, or
+  stored in, BASELINE_CACHE so consumers working on the same dataset and meter
+  share one computation. The input frame is not modified.
+
   Args:
       dataf (pd.DataFrame): The data to be used for the baselines.
       target_col (str, optional): The column to be used for the baselines. Defaults to 'All'.
+      quantile (float, optional): The quantile used as the baseline. Defaults to BASELINE_QUANTILE.
+      dataset (Optional[dict[str, Any]], optional): The dataset handle the data was resolved from, used to cache the baselines. Defaults to None (not cached).
 
   Returns:
       pd.DataFrame: The data with the annual, seasonal and monthly baselines.
@@ -103,30 +260,35 @@ def create_baselines(dataf: pd.DataFrame,
     raise ValueError(
         "The index should be a DatetimeIndex for year-based calculations.")
 
-  dataf[schema.HHSchema.YEAR] = dataf.index.year
-  dataf[schema.HHSchema.SEASON_OF_YEAR] = np.select([
-      dataf[schema.HHSchema.MONTH_OF_YEAR].isin([12, 1, 2]),
-      dataf[schema.HHSchema.MONTH_OF_YEAR].isin([3, 4, 5]),
-      dataf[schema.HHSchema.MONTH_OF_YEAR].isin([6, 7, 8]),
-      dataf[schema.HHSchema.MONTH_OF_YEAR].isin([9, 10, 11]),
-  ], [1, 2, 3, 4], None)
-
-  dataf[schema.HHSchema.WORK_HOURS] = np.where(
-      (dataf.index.hour >= 8) & (dataf.index.hour <= 18), 1, 0)
-  dataf['Annual'] = dataf.groupby(
-      schema.HHSchema.YEAR)[target_col].transform(lambda x: x.quantile(0.10))
-  dataf['Seasonal'] = dataf.groupby([
-      schema.HHSchema.YEAR, schema.HHSchema.SEASON_OF_YEAR
-  ])[target_col].transform(lambda x: x.quantile(0.10))
-  dataf['Monthly'] = dataf.groupby([
-      schema.HHSchema.YEAR, schema.HHSchema.MONTH_OF_YEAR
-  ])[target_col].transform(lambda x: x.quantile(0.10))
-  return dataf
-
-
-def new_baseline_barplot(dataf: pd.DataFrame,
-                         target_col: str,
-                         baseline: str = 'Monthly') -> go.Figure:
+  if dataset is None:
+    baselines = compute_baselines(dataf, target_col, quantile)
+  else:
+    key = (session.handle_key(dataset), target_col, quantile,
+           loader.hh_data_version(dataset['utility']))
+    baselines = BASELINE_CACHE.get(key)
+    if baselines is None:
+      baselines = compute_baselines(dataf, target_col, quantile)
+      BASELINE_CACHE.put(key, baselines)
+
+  return dataf.assign(
+      **{
+          schema.HHSchema.YEAR:
+          dataf.index.year,
+          schema.HHSchema.SEASON_OF_YEAR:
+          SEASON_OF_MONTH[dataf.index.month],
+          schema.HHSchema.WORK_HOURS:
+          np.where((dataf.index.hour >= 8) & (dataf.index.hour <= 18), 1, 0),
+      }, **{
+          baseline: baselines[baseline].to_numpy()
+          for baseline in schema.BASELINES
+      })
+
+
+def new_baseline_barplot(
+    dataf: pd.DataFrame,
+    target_col: str,
+    baseline: str = 'Monthly',
+    dataset: Optional[dict[str, Any]] = None) -> go.Figure:
   """ 
   This function creates a barplot of the annual, seasonal or monthly baselines.
 
@@ -134,11 +296,12 @@ def new_baseline_barplot(dataf: pd.DataFrame,
       dataf (pd.DataFrame): The data to be used for the barplot.
       target_col (str): The column to be used for the baselines.
       baseload (str, optional): The baseline to be plotted [monthly, seasonal, annually]. Defaults to 'Monthly'.
+      dataset (Optional[dict[str, Any]], optional): The dataset handle the data was resolved from, used to cache the baselines. Defaults to None.
 
   Returns:
       go.Figure: The barplot of the annual, seasonal or monthly baselines.
   """
-  data = create_baselines(dataf, target_col=target_col)
+  data = create_baselines(dataf, target_col=target_col, dataset=dataset)
 
   baseline_dict_two = {
       'Annual': schema.SummarySchema.ALL,
@@ -202,9 +365,11 @@ def new_baseline_barplot(dataf: pd.DataFrame,
   return fig
 
 
-def new_consump_periods(data: pd.DataFrame,
-                        target_col: str,
-                        baseline_type: str = 'Monthly') -> pd.DataFrame:
+def new_consump_periods(
+    data: pd.DataFrame,
+    target_col: str,
+    baseline_type: str = 'Monthly',
+    dataset: Optional[dict[str, Any]] = None) -> pd.DataFrame:
   """ 
   This function generates the top 10 peak consumption period dataframe.
 
@@ -212,49 +377,54 @@ def new_consump_periods(data: pd.DataFrame,
       data (pd.DataFrame): The data to be used for the table.
       target_col (str): The column to be used for the peak consumption.
       baseline_type (str, optional): The baseline to be used for the percentage above baseline. Defaults to 'Monthly'.
+      dataset (Optional[dict[str, Any]], optional): The dataset handle the data was resolved from, used to cache the baselines. Defaults to None.
       
   Returns:
       pd.DataFrame: The top 10 peak consumption periods.
   """
-  dataf = create_baselines(data, target_col=target_col)
-  periods = []
-  current_period = []
+  dataf = create_baselines(data, target_col=target_col, dataset=dataset)
   dataf = dataf[dataf[schema.HHSchema.WORK_HOURS] == 0]
-  prev_date = None
-  for index, row in dataf.iterrows():
-    current_date: datetime = index
-    if prev_date is not None:
-      delta_time: float = (current_date - prev_date).total_seconds() / 3600
-      if delta_time == 0.5:
-        current_period.append(row)
-      else:
-        consump: float = sum(row[target_col] for row in current_period)
-        if consump == 0:
-          consump = 1
-        if row[baseline_type] == 0:
-          perc_above_baseline = 0
-        else:
-          val: float = row[baseline_type]
-          perc_above_baseline: float = round(
-              (consump / (val * delta_time) * 100), 0)
-        periods.append({
-            schema.HHSchema.START_DATE:
-            current_period[0].name,
-            schema.HHSchema.END_DATE:
-            current_period[0].name + timedelta(hours=delta_time),
-            'total_consumption':
-            consump,
-            'period_est_consumption':
-            round(row[baseline_type] * delta_time, 0),
-            'perc_above_baseline':
-            perc_above_baseline
-        })
-        current_period = []
-        current_period.append(row)
-
-    prev_date = current_date
-
-  data = pd.DataFrame(periods)
+
+  # Out of hours readings form a period until the next gap that isn't half an
+  # hour. The reading after the gap closes the period: its baseline and the
+  # gap length give the expected consumption. Periods start from the second
+  # reading and the last, still open, period is not reported.
+  gaps = np.diff(dataf.index.to_numpy()) / np.timedelta64(1, 'h')
+  closing_rows = np.flatnonzero(gaps != 0.5) + 1
+  start_rows = np.concatenate(([1], closing_rows[:-1]))
+  non_empty = closing_rows > start_rows
+  closing_rows, start_rows = closing_rows[non_empty], start_rows[non_empty]
+
+  last_row = closing_rows[-1] if len(closing_rows) else 1
+  period_ids = np.searchsorted(closing_rows,
+                               np.arange(1, last_row),
+                               side='right')
+  consump = np.bincount(
+      period_ids,
+      weights=dataf[target_col].to_numpy(dtype=float)[1:last_row],
+      minlength=len(closing_rows))
+  consump[consump == 0] = 1
+
+  delta_time = gaps[closing_rows - 1]
+  baseline = dataf[baseline_type].to_numpy(dtype=float)[closing_rows]
+  expected = baseline * delta_time
+  with np.errstate(divide='ignore', invalid='ignore'):
+    perc_above_baseline = np.where(baseline == 0, 0,
+                                   np.round(consump / expected * 100, 0))
+  start_dates = dataf.index[start_rows]
+
+  data = pd.DataFrame({
+      schema.HHSchema.START_DATE:
+      start_dates,
+      schema.HHSchema.END_DATE:
+      start_dates + pd.to_timedelta(delta_time, unit='h'),
+      'total_consumption':
+      consump,
+      'period_est_consumption':
+      np.round(expected, 0),
+      'perc_above_baseline':
+      perc_above_baseline
+  })
   data.index = pd.DatetimeIndex(data[schema.HHSchema.START_DATE])
   data.rename(columns={
       schema.HHSchema.START_DATE: schema.PageSchema.START_DATE,
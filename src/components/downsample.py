@@ -0,0 +1,94 @@
+"""
+Largest-Triangle-Three-Buckets downsampling of the half-hourly line plots.
+
+The points sent to the browser are capped per trace. The first and last
+points are always kept and each bucket in between keeps the point forming
+the largest triangle with the previously kept point and the mean of the next
+bucket, which preserves the peaks and troughs of the line.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 2000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+  """
+  Selects the points to keep with the Largest-Triangle-Three-Buckets algorithm.
+  Missing y values are never selected from a bucket holding a valid value.
+
+  Args:
+      x (np.ndarray): The increasing x values.
+      y (np.ndarray): The y values.
+      max_points (int): The maximum number of points to keep.
+
+  Returns:
+      np.ndarray: The sorted positions of the kept points.
+  """
+  n_points = len(x)
+  if max_points >= n_points or max_points < 3:
+    return np.arange(n_points)
+  x = np.asarray(x, dtype=float)
+  x = x - x[0]
+  y = np.asarray(y, dtype=float)
+
+  # Bucket i spans edges[i]:edges[i + 1]; the last bucket is the final point.
+  edges = np.append(
+      np.linspace(1, n_points - 1, max_points - 1).astype(int), n_points)
+  valid = ~np.isnan(y)
+  counts = np.add.reduceat(valid, edges[:-1])
+  mean_x = np.add.reduceat(x, edges[:-1]) / np.diff(edges)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    mean_y = np.add.reduceat(np.where(valid, y, 0), edges[:-1]) / counts
+
+  kept = np.empty(max_points, dtype=int)
+  kept[0] = 0
+  kept[-1] = n_points - 1
+  previous = 0
+  for bucket in range(max_points - 2):
+    start, end = edges[bucket], edges[bucket + 1]
+    area = np.abs((x[previous] - mean_x[bucket + 1]) *
+                  (y[start:end] - y[previous]) - (x[previous] - x[start:end]) *
+                  (mean_y[bucket + 1] - y[previous]))
+    if np.isnan(area).all():
+      area = np.where(valid[start:end], np.abs(y[start:end]), -1)
+    previous = start + int(np.nanargmax(area))
+    kept[bucket + 1] = previous
+  return kept
+
+
+def downsample_series(series: pd.Series,
+                      max_points: int = MAX_POINTS) -> pd.Series:
+  """
+  Downsamples a series with a DatetimeIndex to at most max_points points.
+
+  Args:
+      series (pd.Series): The half-hourly data.
+      max_points (int, optional): The maximum number of points. Defaults to MAX_POINTS.
+
+  Returns:
+      pd.Series: The kept points of the series.
+  """
+  positions = lttb_indices(series.index.asi8, series.to_numpy(dtype=float),
+                           max_points)
+  return series.iloc[positions]
+
+
+def downsample_frame(dataf: pd.DataFrame,
+                     target_col: str,
+                     max_points: int = MAX_POINTS) -> pd.DataFrame:
+  """
+  Downsamples the rows of a frame with a DatetimeIndex to at most max_points,
+  choosing the rows on the values of the target column.
+
+  Args:
+      dataf (pd.DataFrame): The half-hourly data.
+      target_col (str): The column the rows are chosen on.
+      max_points (int, optional): The maximum number of points. Defaults to MAX_POINTS.
+
+  Returns:
+      pd.DataFrame: The kept rows of the frame.
+  """
+  positions = lttb_indices(dataf.index.asi8,
+                           dataf[target_col].to_numpy(dtype=float), max_points)
+  return dataf.iloc[positions]
@@ -27,7 +27,7 @@ def create_dropdown(tab_title: str, text: str, dropdown_options: list[Any],
                   "label": option,
                   "value": option
               } for option in dropdown_options],
-              value=dropdown_options[-1])
+              value=dropdown_options[-1] if dropdown_options else None)
       ],
       style={'text-align': schema.StructureSchema.TEXT_ALIGN})
 
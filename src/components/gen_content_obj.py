@@ -2,9 +2,10 @@ from typing import Any, Optional
 
 import dash_ag_grid as dag  # type: ignore
 import pandas as pd
-from dash import dcc, html  # type: ignore
+from dash import Patch, dcc, html, no_update  # type: ignore
 from plotly import graph_objects as go  # type: ignore
 
+from src.components import downsample
 # from src.components.filter_objects import box_options
 from src.utils import IDS
 
@@ -26,7 +27,43 @@ def graph_obj(tab_title: str, figure: go.Figure, id: int = 0) -> html.Div:
                   style={'text-align': 'center'})
 
 
-def add_hline(fig: go.Figure, y_val: int, name: str) -> go.Figure:
+def progress_obj(tab_title: str, id: int = 0) -> html.Div:
+  """
+  Creates a progress bar and status text for a background callback. The \
+  container is hidden until the callback runs.
+
+  Args:
+      tab_title (str): The title of the tab used in the id generation.
+      id (int, optional): The id of the progress bar. Defaults to 0.
+
+  Returns:
+      html.Div: The hidden progress bar and status text."""
+  return html.Div([
+      html.Progress(id=tab_title + IDS.PROGRESS_BAR + str(id)),
+      html.Span(id=tab_title + IDS.PROGRESS_TEXT + str(id),
+                style={'margin-left': '10px'})
+  ],
+                  id=tab_title + IDS.PROGRESS + str(id),
+                  style={
+                      'display': 'none',
+                      'text-align': 'center'
+                  })
+
+
+def placeholder_figure() -> go.Figure:
+  """
+  Creates an empty figure shown until a callback fills in the real figure.
+
+  Returns:
+      go.Figure: The empty plotly figure."""
+  return go.Figure(
+      layout=dict(xaxis=dict(visible=False), yaxis=dict(visible=False)))
+
+
+def add_hline(fig: go.Figure,
+              y_val: int,
+              name: str,
+              keep_zero: bool = False) -> go.Figure:
   """
   Adds a horizontal line to a plotly figure.
 
@@ -34,21 +71,85 @@ def add_hline(fig: go.Figure, y_val: int, name: str) -> go.Figure:
       fig (go.Figure): The plotly figure to add the line to.
       y_val (int): The y value of the line.
       name (str): The name of the line.
+      keep_zero (bool, optional): Whether to add a hidden line when y_val is 0, \
+      so that the line can be patched in later. Defaults to False.
 
   Returns:
       go.Figure: The plotly figure with the line added."""
-  if y_val == 0:
+  if y_val == 0 and not keep_zero:
     return fig
   else:
-    line = go.Scatter(x=[fig.data[0].x[0], fig.data[0].x[-1]],
+    x_data = fig.data[0].x
+    line = go.Scatter(x=[x_data[0], x_data[-1]] if len(x_data) else [],
                       y=[y_val, y_val],
                       mode='lines',
                       line=dict(dash="dash", color="red"),
-                      name=name)
+                      name=name,
+                      visible=y_val != 0)
     fig.add_trace(line)
     return fig
 
 
+def relayout_x_range(
+    relayout_data: Optional[dict[str, Any]]
+) -> Optional[tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]]:
+  """
+  Reads the x axis range from the relayoutData of a dcc.Graph.
+
+  Args:
+      relayout_data (Optional[dict[str, Any]]): The relayoutData of the graph.
+
+  Returns:
+      Optional[tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]]: The \
+      zoomed range, (None, None) when the x axis is reset to its full range and \
+      None when the x axis did not change.
+  """
+  if not relayout_data:
+    return None
+  if relayout_data.get('xaxis.autorange'):
+    return None, None
+  if 'xaxis.range[0]' in relayout_data:
+    x_range = (relayout_data['xaxis.range[0]'],
+               relayout_data['xaxis.range[1]'])
+  elif 'xaxis.range' in relayout_data:
+    x_range = tuple(relayout_data['xaxis.range'])
+  else:
+    return None
+  return pd.Timestamp(x_range[0]), pd.Timestamp(x_range[1])
+
+
+def refine_line_trace(series: pd.Series,
+                      relayout_data: Optional[dict[str, Any]],
+                      max_points: int = downsample.MAX_POINTS) -> Any:
+  """
+  Replaces the first trace of a downsampled line plot with the full \
+  resolution data of the zoomed range, downsampled again only if it still \
+  holds more than max_points points.
+
+  Args:
+      series (pd.Series): The full resolution data of the plot.
+      relayout_data (Optional[dict[str, Any]]): The relayoutData of the graph.
+      max_points (int, optional): The maximum number of points. Defaults to downsample.MAX_POINTS.
+
+  Returns:
+      Any: A Patch of the figure, or no_update if the x axis did not change.
+  """
+  x_range = relayout_x_range(relayout_data)
+  if x_range is None:
+    return no_update
+  start, end = x_range
+  if start is not None:
+    # Keep the neighbouring points so the line reaches the plot edges.
+    first = max(series.index.searchsorted(start, side='right') - 1, 0)
+    last = series.index.searchsorted(end, side='left') + 1
+    series = series.iloc[first:last]
+  series = downsample.downsample_series(series, max_points)
+  patched_fig = Patch()
+  patched_fig['data'][0]['x'] = series.index
+  patched_fig['data'][0]['y'] = series.to_numpy()
+  return patched_fig
+
+
 def add_x_range_box_to_legend(fig: go.Figure, x_start: int, x_end: int,
                               name: str) -> go.Figure:
   """
@@ -10,8 +10,15 @@ from e2sviz.structure import enums as viz_enums  # type: ignore
 from e2sviz.structure import viz_schema  # type: ignore
 from e2sviz.visualization import plot_styles, visualize  # type: ignore
 
+from src.components import downsample
 from src.utils import schema
 
+# Rendering modes of the line plots.
+AUTO = 'auto'
+SVG = 'svg'
+WEBGL = 'webgl'
+WEBGL_THRESHOLD = 20000
+
 
 def numeric_to_month_name(month_number: int) -> str:
   """
@@ -26,9 +33,111 @@ def numeric_to_month_name(month_number: int) -> str:
   return calendar.month_name[month_number]
 
 
-def add_time_to_date(data: pd.DataFrame, time: time, day: int) -> pd.DataFrame:
-  return data[(data.index.day == day)].index.min().replace(hour=time.hour,
-                                                           minute=time.minute)
+def time_offset(time_of_day: time) -> pd.Timedelta:
+  """
+  Converts a time of day to the offset from midnight.
+
+  Args:
+      time_of_day (time): The time of day.
+
+  Returns:
+      pd.Timedelta: The offset from midnight.
+  """
+  return pd.Timedelta(hours=time_of_day.hour,
+                      minutes=time_of_day.minute,
+                      seconds=time_of_day.second)
+
+
+def working_hours_calendar(
+    index: pd.DatetimeIndex, start_time: time,
+    end_time: time) -> tuple[pd.DatetimeIndex, pd.DatetimeIndex]:
+  """
+  Builds the start and end datetimes of the working hours of every date in \
+  the index. Working hours ending at or before their start run overnight.
+
+  Args:
+      index (pd.DatetimeIndex): The sorted index of the plotted data.
+      start_time (time): The start of the working hours.
+      end_time (time): The end of the working hours.
+
+  Returns:
+      tuple[pd.DatetimeIndex, pd.DatetimeIndex]: The starts and ends of the working hours.
+  """
+  dates = index.normalize().unique()
+  start = time_offset(start_time)
+  end = time_offset(end_time)
+  if end <= start:
+    end += pd.Timedelta(days=1)
+  return dates + start, dates + end
+
+
+def working_hours_trace(starts: pd.DatetimeIndex,
+                        ends: pd.DatetimeIndex) -> go.Scatter:
+  """
+  Creates a single filled trace shading every working hours period across \
+  the full height of the plot. The trace is drawn on the hidden yaxis2, which \
+  has to span [0, 1] and overlay the y axis of the plot.
+
+  Args:
+      starts (pd.DatetimeIndex): The starts of the working hours.
+      ends (pd.DatetimeIndex): The ends of the working hours.
+
+  Returns:
+      go.Scatter: The shaded working hours trace.
+  """
+  # One rectangle per period, separated by None to break the fill.
+  x = np.full((len(starts), 5), None, dtype=object)
+  x[:, 0:2] = starts.to_numpy(dtype=object)[:, np.newaxis]
+  x[:, 2:4] = ends.to_numpy(dtype=object)[:, np.newaxis]
+  y = np.tile(np.array([0, 1, 1, 0, None], dtype=object), len(starts))
+  return go.Scatter(x=x.ravel(),
+                    y=y,
+                    yaxis='y2',
+                    fill='toself',
+                    fillcolor=schema.ColourSchema.GREY,
+                    mode='none',
+                    hoverinfo='skip',
+                    legendgroup='Working Hours',
+                    showlegend=True,
+                    name='Work Hours')
+
+
+def set_render_mode(fig: go.Figure,
+                    render_mode: str = AUTO,
+                    threshold: int = WEBGL_THRESHOLD) -> go.Figure:
+  """
+  Sets how the line traces of a figure are drawn. In webgl mode the unfilled \
+  scatter traces are converted to Scattergl traces, which the browser draws \
+  on the GPU. Filled traces, such as the working hours shading, and layout \
+  shapes are kept as SVG. In auto mode the figure switches to webgl once the \
+  scatter traces hold more than threshold points in total.
+
+  Args:
+      fig (go.Figure): The plotly figure.
+      render_mode (str, optional): One of AUTO, SVG or WEBGL. Defaults to AUTO.
+      threshold (int, optional): The number of points above which auto mode uses webgl. Defaults to WEBGL_THRESHOLD.
+
+  Returns:
+      go.Figure: The figure, with Scattergl line traces in webgl mode.
+  """
+  if render_mode not in (AUTO, SVG, WEBGL):
+    raise ValueError(f'Unknown render mode: {render_mode}')
+  lines = [
+      trace.type == 'scatter' and trace.fill in (None, 'none')
+      for trace in fig.data
+  ]
+  if render_mode == AUTO:
+    n_points = sum(
+        len(trace.x) for trace, line in zip(fig.data, lines)
+        if line and trace.x is not None)
+    render_mode = WEBGL if n_points > threshold else SVG
+  if render_mode == SVG or not any(lines):
+    return fig
+  traces = [
+      go.Scattergl(trace.to_plotly_json(), skip_invalid=True)
+      if line else trace for trace, line in zip(fig.data, lines)
+  ]
+  return go.Figure(data=traces, layout=fig.layout)
 
 
 class MetaData(Protocol):
@@ -65,14 +174,21 @@ class MetaData(Protocol):
     ...
 
 
-def create_lower_lineplot(
-    data: pd.DataFrame,
-    target_col: str,
-    page: str,
-    metadata: Optional[MetaData] = None,
-    working_hours: Optional[dict[str, dict[str, time]]] = None) -> go.Figure:
+def create_lower_lineplot(data: pd.DataFrame,
+                          target_col: str,
+                          page: str,
+                          metadata: Optional[MetaData] = None,
+                          working_hours: Optional[dict[str,
+                                                       dict[str,
+                                                            time]]] = None,
+                          max_points: Optional[int] = downsample.MAX_POINTS,
+                          render_mode: str = AUTO) -> go.Figure:
   """ 
   Generates the lower lineplots on both the Power & Consumption tabs.
+  The plotted line is downsampled to at most max_points points, while the
+  working hours are shaded from the full data. In auto mode a line plotted at
+  full resolution is drawn with WebGL once it holds more points than a
+  downsampled line would.
 
   Args:
       data (pd.DataFrame): The data to be plotted.
@@ -80,16 +196,24 @@ def create_lower_lineplot(
       page (str): The page to be plotted.
       metadata (MetaData, optional): The metadata for the data. Defaults to None.
       working_hours (dict[str, dict[str, time]], optional): The working hours for the data. Defaults to None.
+      max_points (int, optional): The maximum number of plotted points, None plots every point. Defaults to downsample.MAX_POINTS.
+      render_mode (str, optional): The rendering mode of the line, see set_render_mode. Defaults to AUTO.
 
   Returns:
       go.Figure: The plotly figure.
   """
+  plot_data = data
+  if max_points is not None:
+    plot_data = downsample.downsample_frame(data, target_col, max_points)
+  # The stored data is read-only and e2sviz may write to the frames it is
+  # given, so it gets a copy of the plotted rows.
+  plot_data = plot_data.copy()
   if metadata is None:
-    data_object = sdp.DataManip(data)
+    data_object = sdp.DataManip(plot_data)
     metadata = data_object.metadata
   metadata.metadata[viz_schema.MetaDataSchema.FRAME][
       viz_schema.MetaDataSchema.INDEX_COLS] = [schema.HHSchema.DATETIME]
-  plotter = visualize.DataViz(data=data,
+  plotter = visualize.DataViz(data=plot_data,
                               metadata=metadata,
                               viz_selector=plot_styles.PlotlyPlot(),
                               plot_columns=[target_col])
@@ -114,57 +238,38 @@ def create_lower_lineplot(
 
   if working_hours is not None:
     # Add shaded regions for working hours.
-    start_time = working_hours[target_col]['start']
-    end_time = working_hours[target_col]['end']
-    shaded_regions: list[dict[str, Any]] = [{
-        'xref':
-        'x',
-        'yref':
-        'paper',
-        'x0':
-        add_time_to_date(data, start_time, day),
-        'x1':
-        add_time_to_date(data, end_time, day),
-        'y0':
-        0,
-        'y1':
-        1,
-        'fillcolor':
-        'rgba(0, 0, 0, 0.1)',
-        'line': {
-            'width': 0
-        },
-    } for day in data.index.day.unique()]
-
-    transparent_trace = go.Scatter(
-        x=[shaded_regions[-1]['x0'], shaded_regions[-1]['x1']],
-        y=[0, 1],
-        fill='toself',
-        fillcolor='rgba(0, 0, 0, 0.1)',
-        mode='none',
-        legendgroup='Working Hours',
-        showlegend=True,
-        name='Work Hours')
-    plotter.viz_selector.container.add_trace(transparent_trace)
-    plotter.viz_selector.container.update_layout(shapes=shaded_regions)
+    starts, ends = working_hours_calendar(data.index,
+                                          working_hours[target_col]['start'],
+                                          working_hours[target_col]['end'])
+    plotter.viz_selector.container.add_trace(working_hours_trace(starts, ends))
+    plotter.viz_selector.container.update_layout(yaxis2=dict(
+        overlaying='y', range=[0, 1], visible=False, fixedrange=True))
 
   plotter.viz_selector.container.update_layout(xaxis=dict(tickformat='%a'))
-  return plotter.viz_selector.container
+  threshold = WEBGL_THRESHOLD
+  if max_points is None:
+    threshold = downsample.MAX_POINTS
+  return set_render_mode(plotter.viz_selector.container, render_mode,
+                         threshold)
 
 
 def new_create_overview_lineplot(data: pd.DataFrame,
-                                 target_col: str = 'All') -> go.Figure:
+                                 target_col: str = 'All',
+                                 render_mode: str = AUTO) -> go.Figure:
   """ 
   Generates the monthly line plot for the overview tab split across years.
 
   Args:
       data (pd.DataFrame): The data to be plotted.
       target_col (str, optional): The column to be plotted. Defaults to 'All'.
+      render_mode (str, optional): The rendering mode of the lines, see set_render_mode. Defaults to AUTO.
       
   Returns:
       go.Figure: The plotly figure.
   """
-  overview_data = sdp.DataManip(data, rescale=False)
+  # The stored data is read-only and e2sviz may write to the frames it is
+  # given. It resamples every column anyway, so copying them costs as much.
+  overview_data = sdp.DataManip(data.copy(), rescale=False)
   overview_data.check_rescaling()
   overview_data.metadata.metadata[target_col][
       viz_schema.MetaDataSchema.UNITS] = viz_enums.UnitsSchema.WH
@@ -206,4 +311,4 @@ def new_create_overview_lineplot(data: pd.DataFrame,
       title='',
   )
 
-  return plotter.container
+  return set_render_mode(plotter.container, render_mode)
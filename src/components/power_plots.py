@@ -1,13 +1,28 @@
 from datetime import datetime
 from typing import Any
 
+import numpy as np
 import pandas as pd
 import plotly.express as px  # type: ignore
 import plotly.graph_objects as go  # type: ignore
 
+from dash import Patch  # type: ignore
+
 from src.components import gen_content_obj, line_fig
 from src.data import loader
-from src.utils import IDS, schema
+from src.utils import IDS, schema, time_index
+
+PEAK_COUNT = 10
+PEAK_SEPARATION_DAYS = 3
+LDC_POINTS = 500
+
+# Power table column of each percentile of the power demand.
+POWER_QUANTILES = {
+    schema.PowerTableSchema.MIN_POWER: 0.01,
+    schema.PowerTableSchema.QUART_POWER: 0.25,
+    schema.PowerTableSchema.MEDIAN_POWER: 0.5,
+    schema.PowerTableSchema.TOP_QUART_POWER: 0.75,
+}
 
 POWER_LIMS = {
     f'{IDS.ELEC_MPR_1}': 135,
@@ -16,6 +31,29 @@ POWER_LIMS = {
 }
 
 
+def power_window(peak_date: datetime, target_id: str) -> pd.Series:
+  """
+  Selects the power demand of a meter within 3 days either side of a peak.
+  Only the window of the selected meter is read from the per meter arrays.
+
+  Args:
+      peak_date (datetime): The date of the peak power demand.
+      target_id (str): The meter ID of the selected meter.
+
+  Returns:
+      pd.Series: The half-hourly power demand of the meter.
+  """
+  selected_date = pd.to_datetime(peak_date)
+  start_date = selected_date - pd.DateOffset(days=3)
+  end_date = selected_date + pd.DateOffset(days=3)
+  hh_arrays = loader.load_hh_arrays()
+  if hh_arrays is not None and target_id in hh_arrays.meters:
+    return hh_arrays.series(target_id, start_date, end_date) * 2
+  data = loader.load_hh_data(resample=None)
+  filtered_data = time_index.between(data[target_id], start_date, end_date)
+  return filtered_data * 2
+
+
 def create_power_lineplot(peak_date: datetime, target_id: str) -> go.Figure:
   """ 
   Uses the line_fig module to create a line plot of the power demand from the half-hourly data.
@@ -27,12 +65,7 @@ def create_power_lineplot(peak_date: datetime, target_id: str) -> go.Figure:
   Returns:
       go.Figure: Plotly figure object.
   """
-  data = loader.load_hh_data(resample=None)
-  selected_date = pd.to_datetime(peak_date)
-  start_date = selected_date - pd.DateOffset(days=3)
-  end_date = selected_date + pd.DateOffset(days=3)
-  filtered_data = data[(data.index >= start_date) & (data.index <= end_date)]
-  filtered_data.loc[:, target_id] = filtered_data[target_id] * 2
+  filtered_data = power_window(peak_date, target_id).to_frame()
   fig = gen_content_obj.add_hline(line_fig.create_lower_lineplot(
       filtered_data, target_id, page=schema.HHSchema.POWER_DEMAND),
                                   y_val=POWER_LIMS[target_id],
@@ -40,42 +73,78 @@ def create_power_lineplot(peak_date: datetime, target_id: str) -> go.Figure:
   return fig
 
 
-def create_high_demand_table(df: pd.DataFrame,
-                             target_col: str = '98765') -> pd.DataFrame:
+def select_separated_peaks(
+    power: pd.Series,
+    top_n: int = PEAK_COUNT,
+    separation_days: int = PEAK_SEPARATION_DAYS) -> np.ndarray:
+  """
+  Selects the highest peaks that are more than separation_days apart, by
+  non-maximum suppression over the daily maxima. Only the maximum of a day can
+  be kept, so the days are reduced to their maxima with one sort and the
+  candidates are then walked from highest to lowest, skipping days blocked by
+  an already selected peak.
+
+  Args:
+      power (pd.Series): The power demand with a DatetimeIndex.
+      top_n (int, optional): The number of peaks to select. Defaults to PEAK_COUNT.
+      separation_days (int, optional): The minimum number of days between peaks. Defaults to PEAK_SEPARATION_DAYS.
+
+  Returns:
+      np.ndarray: The positions of the selected peaks, from highest to lowest.
+  """
+  values = power.to_numpy(dtype=float)
+  if not len(values):
+    return np.array([], dtype=int)
+  days = power.index.to_numpy().astype('datetime64[D]').astype(np.int64)
+  days = days - days.min()
+
+  by_day = np.lexsort((-values, days))
+  daily_max = by_day[np.r_[True, np.diff(days[by_day]) != 0]]
+  daily_max = daily_max[~np.isnan(values[daily_max])]
+  candidates = daily_max[np.argsort(-values[daily_max], kind='stable')]
+
+  blocked = np.zeros(days.max() + 1, dtype=bool)
+  peaks: list[int] = []
+  for position in candidates:
+    day = days[position]
+    if blocked[day]:
+      continue
+    peaks.append(position)
+    if len(peaks) == top_n:
+      break
+    blocked[max(day - separation_days, 0):day + separation_days + 1] = True
+  return np.array(peaks, dtype=int)
+
+
+def create_high_demand_table(
+    df: pd.DataFrame,
+    target_col: str = '98765',
+    top_n: int = PEAK_COUNT,
+    separation_days: int = PEAK_SEPARATION_DAYS) -> pd.DataFrame:
   """
-  Creates a table of the top 10 peak power demand periods for the selected meter.
+  Creates a table of the top peak power demand periods for the selected meter,
+  keeping only peaks that are more than separation_days apart.
 
   Args:
       df (pd.DataFrame): The data to be used.
       target_col (str, optional): The column to be used. Defaults to '98765'.
+      top_n (int, optional): The number of peaks in the table. Defaults to PEAK_COUNT.
+      separation_days (int, optional): The minimum number of days between peaks. Defaults to PEAK_SEPARATION_DAYS.
 
   Returns:
-      pd.DataFrame: The table of the top 10 peak power demand periods.
+      pd.DataFrame: The table of the top peak power demand periods.
   """
   power_limit = POWER_LIMS[target_col]
-  dataf = df.copy()
-  dataf[target_col] = round(dataf[target_col] * 2, 1)
-  dataf[schema.PageSchema.PERC_LIM] = round(
-      (dataf[target_col] / power_limit * 100), 0)
-  dataf.sort_values(by=target_col, ascending=False, inplace=True)
-  dataf[schema.HHSchema.DATETIME] = dataf.index
-  df_breakdown = dataf[[
-      schema.HHSchema.DATETIME, target_col, schema.PageSchema.PERC_LIM
-  ]]
-  list_index = []
-  for index, row in df_breakdown.iterrows():
-    skip_row = False
-    if len(list_index):
-      for existing_index in list_index:
-        if abs((index - existing_index).days) <= 3:
-          skip_row = True
-          break
-    if skip_row is False:
-      list_index.append(index)
-    if len(list_index) == 10:
-      break
-
-  df_breakdown = df_breakdown[df_breakdown.index.isin(list_index) == True]
+  power = round(df[target_col] * 2, 1)
+  peaks = power.iloc[select_separated_peaks(power, top_n, separation_days)]
+  df_breakdown = pd.DataFrame({
+      schema.HHSchema.DATETIME:
+      peaks.index,
+      target_col:
+      peaks,
+      schema.PageSchema.PERC_LIM:
+      round((peaks / power_limit * 100), 0)
+  })
   return df_breakdown
 
 
@@ -91,56 +160,135 @@ def power_demand_overview(df: pd.DataFrame) -> pd.DataFrame:
       pd.DataFrame: The table of power demand statistics for each meter.
   """
   df = df * 2
-  result_df = pd.DataFrame(columns=[
-      schema.PowerTableSchema.COL, schema.PowerTableSchema.MIN_POWER, schema.
-      PowerTableSchema.QUART_POWER, schema.PowerTableSchema.MEDIAN_POWER,
-      schema.PowerTableSchema.TOP_QUART_POWER,
-      schema.PowerTableSchema.PEAK_POWER, schema.PowerTableSchema.PERC_OF_LIM
-  ])
-
-  for col in df.columns:
-    column_data: dict[str, Any] = {
-        schema.PowerTableSchema.COL: col,
-        schema.PowerTableSchema.MIN_POWER: round(df[col].quantile(0.01), 0),
-        schema.PowerTableSchema.QUART_POWER: round(df[col].quantile(0.25), 0),
-        schema.PowerTableSchema.MEDIAN_POWER: round(df[col].median(), 0),
-        schema.PowerTableSchema.TOP_QUART_POWER: round(df[col].quantile(0.75),
-                                                       0),
-        schema.PowerTableSchema.PEAK_POWER: round(df[col].max(), 0),
-        schema.PowerTableSchema.PERC_OF_LIM: POWER_LIMS.get(col, 0)
-    }
-
-    result_df = pd.concat([result_df, pd.DataFrame([column_data])],
-                          ignore_index=True)
-  return result_df
+  quantiles = df.quantile(list(POWER_QUANTILES.values())).round(0)
+  table: dict[str, Any] = {schema.PowerTableSchema.COL: df.columns}
+  for column, quantile in POWER_QUANTILES.items():
+    table[column] = quantiles.loc[quantile].to_numpy()
+  table[schema.PowerTableSchema.PEAK_POWER] = df.max().round(0).to_numpy()
+  table[schema.PowerTableSchema.PERC_OF_LIM] = [
+      POWER_LIMS.get(col, 0) for col in df.columns
+  ]
+  return pd.DataFrame(table)
+
+
+def load_duration_curve(
+    power: np.ndarray,
+    points: int = LDC_POINTS) -> tuple[np.ndarray, np.ndarray]:
+  """
+  Computes a load duration curve sampled down to a fixed number of points.
+
+  Half of the points are spread evenly along the duration axis and half evenly
+  along the power axis, so both the flat body and the steep peak of the curve
+  keep their shape. Every point lies on the exact sorted curve and the first
+  and last points are the peak and the tail. Missing readings are left out of
+  the curve but still count towards the total number of half-hours.
+
+  Args:
+      power (np.ndarray): The half-hourly power demand.
+      points (int, optional): The maximum number of points. Defaults to LDC_POINTS.
+
+  Returns:
+      tuple[np.ndarray, np.ndarray]: The percentage of half-hours and the power
+      demand of each point.
+  """
+  power = np.asarray(power, dtype=float)
+  curve = np.sort(power[~np.isnan(power)])[::-1]
+  if len(curve) == 0:
+    return np.empty(0), np.empty(0)
+  half = max(points // 2, 2)
+  by_duration = np.rint(np.linspace(0, len(curve) - 1, half)).astype(int)
+  levels = np.linspace(curve[0], curve[-1], half)
+  by_power = np.searchsorted(-curve, -levels, side='left')
+  ranks = np.union1d(by_duration, by_power)
+  return np.round((ranks + 1) / len(power) * 100, 2), curve[ranks]
+
+
+def load_duration_hovertemplate(target_col: str) -> str:
+  """
+  Returns the hover template of the load duration curve of a meter.
+
+  Args:
+      target_col (str): The meter ID.
+
+  Returns:
+      str: The hover template.
+  """
+  return (f'{schema.PowerTableSchema.PERC_HALF_HOUR}=%{{x}}<br>'
+          f'{target_col}=%{{y}}<extra></extra>')
 
 
 def power_load_duration_curve(dataf: pd.DataFrame,
-                              target_col: str = '98765') -> go.Figure:
+                              target_col: str = '98765',
+                              render_mode: str = line_fig.AUTO) -> go.Figure:
   """
   Creates a load duration curve for the selected meter.
 
   Args:
       dataf (pd.DataFrame): The data to be used.
       target_col (str, optional): The column to be used. Defaults to '98765'.
+      render_mode (str, optional): The rendering mode of the curve, see line_fig.set_render_mode. Defaults to line_fig.AUTO.
   
   Returns:
       go.Figure: Plotly figure object.
   """
-  df = dataf.copy()
-  df[target_col] = df[target_col] * 2
-  df[schema.HHSchema.DATETIME] = df.index
-  df.reset_index(inplace=True)
-  df = df.sort_values(by=[target_col], ascending=False)
-  df.reset_index(inplace=True)
-  df.drop(columns=['index'], inplace=True)
-  df.reset_index(inplace=True)
-  df[schema.PowerTableSchema.PERC_HALF_HOUR] = round(
-      (df['index'] + 1) / len(df) * 100, 2)
+  perc_half_hour, power = load_duration_curve(dataf[target_col].to_numpy() * 2)
+  df = pd.DataFrame({
+      schema.PowerTableSchema.PERC_HALF_HOUR: perc_half_hour,
+      target_col: power
+  })
   fig = px.line(df,
                 x=schema.PowerTableSchema.PERC_HALF_HOUR,
                 y=target_col,
                 title=schema.PowerTableSchema.LOAD_DUR)
+  fig.update_traces(hovertemplate=load_duration_hovertemplate(target_col))
   fig.update_xaxes(title_text=schema.PowerTableSchema.PERC_HALF_HOUR_TITLE)
   fig.update_yaxes(title_text=schema.PageSchema.POWER)
-  return fig
+  return line_fig.set_render_mode(fig, render_mode)
+
+
+def create_load_duration_figure(dataf: pd.DataFrame,
+                                target_col: str = '98765') -> go.Figure:
+  """
+  Creates the load duration curve of a meter with its power limit line. The \
+  limit line is always added, hidden for meters without a limit, so that the \
+  figure can be updated with patch_load_duration_figure.
+
+  Args:
+      dataf (pd.DataFrame): The data to be used.
+      target_col (str, optional): The column to be used. Defaults to '98765'.
+
+  Returns:
+      go.Figure: Plotly figure object.
+  """
+  return gen_content_obj.add_hline(power_load_duration_curve(
+      dataf, target_col=target_col),
+                                   y_val=POWER_LIMS.get(target_col, 0),
+                                   name=schema.PlotSchema.MAX_CAP,
+                                   keep_zero=True)
+
+
+def patch_load_duration_figure(dataf: pd.DataFrame,
+                               target_col: str = '98765') -> Patch:
+  """
+  Updates a figure made by create_load_duration_figure to another meter or \
+  selection of the data, replacing only the curve and the limit line values.
+
+  Args:
+      dataf (pd.DataFrame): The data to be used.
+      target_col (str, optional): The column to be used. Defaults to '98765'.
+
+  Returns:
+      Patch: The patch of the figure.
+  """
+  perc_half_hour, power = load_duration_curve(dataf[target_col].to_numpy() * 2)
+  limit = POWER_LIMS.get(target_col, 0)
+  patched_fig = Patch()
+  patched_fig['data'][0]['x'] = perc_half_hour
+  patched_fig['data'][0]['y'] = power
+  patched_fig['data'][0]['hovertemplate'] = load_duration_hovertemplate(
+      target_col)
+  patched_fig['data'][1]['x'] = ([perc_half_hour[0], perc_half_hour[-1]]
+                                 if len(perc_half_hour) else [])
+  patched_fig['data'][1]['y'] = [limit, limit]
+  patched_fig['data'][1]['visible'] = limit != 0
+  return patched_fig
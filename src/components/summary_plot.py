@@ -89,6 +89,10 @@ def calculate_statistics(month_data: pd.DataFrame, no_years: int,
     multiplier: float = 1
   if len(month_data) == 0:
     return SummarySchema.NO_DATA, SummarySchema.NO_DATA, SummarySchema.NO_DATA, SummarySchema.NO_DATA, SummarySchema.NO_DATA
+  elif len(month_data) == 1:
+    current_value = round(month_data.iloc[-1].astype(float).sum() * multiplier,
+                          2)
+    most_recent_value = SummarySchema.NO_DATA
   elif len(month_data) < no_years:
     current_value = SummarySchema.NO_DATA
     most_recent_value = round(
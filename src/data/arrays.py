@@ -0,0 +1,261 @@
+"""
+Per meter arrays of the half hourly data on a regular time axis.
+
+The parsed half hourly data holds one float column per meter. MeterArrays
+keeps the values as one column-major array, so that each meter's series is a
+contiguous array, and replaces the index with a TimeAxis: the first timestamp
+and the 30 minute step, plus the grid position of every row when the data has
+gaps. A meter or a date range is then selected by arithmetic on the axis and
+returned as a view of the values, so a callback that needs one meter over a
+few days only touches that slice. When the data is shared through
+SHARED_DATA_DIR, the values are the read-only memory-mapped file and the
+views read straight from the page cache.
+
+The arrays are read-only. Operations on the returned series and frames
+create new objects, which is what the callbacks do.
+"""
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils import time_index
+
+
+@dataclass(frozen=True)
+class TimeAxis:
+  """
+  Timestamps on a regular grid, from start in steps of step.
+
+  Attributes:
+      start (np.datetime64): The first timestamp.
+      step (np.timedelta64): The grid step.
+      length (int): The number of timestamps.
+      slots (Optional[np.ndarray]): The grid position of every timestamp when some grid positions are missing, None when every position is present.
+  """
+  start: np.datetime64
+  step: np.timedelta64
+  length: int
+  slots: Optional[np.ndarray] = None
+
+  @classmethod
+  def from_index(
+      cls,
+      index: pd.DatetimeIndex,
+      step: np.timedelta64 = time_index.HALF_HOUR) -> Optional['TimeAxis']:
+    """
+    Describes an index as a time axis.
+
+    Args:
+        index (pd.DatetimeIndex): The index.
+        step (np.timedelta64, optional): The grid step. Defaults to time_index.HALF_HOUR.
+
+    Returns:
+        Optional[TimeAxis]: The axis, or None if the index is not sorted on the grid.
+    """
+    if index.tz is not None:
+      return None
+    if len(index) == 0:
+      return cls(np.datetime64('NaT', 'ns'), step, 0)
+    stamps = index.to_numpy('datetime64[ns]')
+    start = stamps[0]
+    offsets = stamps - start
+    if (offsets % step != np.timedelta64(0)).any():
+      return None
+    slots = offsets // step
+    gaps = np.diff(slots)
+    if (gaps <= 0).any():
+      return None
+    if (gaps == 1).all():
+      return cls(start, step, len(stamps))
+    slots.flags.writeable = False
+    return cls(start, step, len(stamps), slots)
+
+  @property
+  def regular(self) -> bool:
+    """Whether every grid position from start is present."""
+    return self.slots is None
+
+  def to_index(self, name: Optional[str] = None) -> pd.DatetimeIndex:
+    """
+    Builds the timestamps of the axis.
+
+    Args:
+        name (Optional[str], optional): The name of the index. Defaults to None.
+
+    Returns:
+        pd.DatetimeIndex: The timestamps.
+    """
+    if self.regular:
+      positions = np.arange(self.length)
+    else:
+      positions = self.slots
+    return pd.DatetimeIndex(self.start + positions * self.step, name=name)
+
+  def bounds(self, start: Any = None, end: Any = None) -> slice:
+    """
+    Returns the rows from start to end, both included.
+
+    Args:
+        start (Any, optional): The first timestamp to keep, from the first row when None. Defaults to None.
+        end (Any, optional): The last timestamp to keep, up to the last row when None. Defaults to None.
+
+    Returns:
+        slice: The positional slice of the rows.
+    """
+    if self.length == 0:
+      return slice(0, 0)
+    first = 0
+    last = self.length
+    if start is not None:
+      offset = pd.Timestamp(start).to_datetime64() - self.start
+      first = self._row(time_index.grid_position(offset, self.step, 'left'))
+    if end is not None:
+      offset = pd.Timestamp(end).to_datetime64() - self.start
+      last = self._row(time_index.grid_position(offset, self.step, 'right'))
+    return slice(first, max(first, last))
+
+  def _row(self, slot: int) -> int:
+    if self.regular:
+      return int(min(max(slot, 0), self.length))
+    return int(np.searchsorted(self.slots, slot, side='left'))
+
+
+class MeterArrays():
+  """
+  Read-only per meter views of half hourly data.
+
+  Attributes:
+      values (np.ndarray): The column-major values, one column per meter.
+      axis (TimeAxis): The time axis of the rows.
+      meters (list[Any]): The meter IDs, in column order.
+      index_name (Optional[str]): The name of the index of the source frame.
+      columns_name (Optional[str]): The name of the columns of the source frame.
+
+  Methods:
+      from_frame: Wraps the values of a float frame.
+      index: Returns the timestamps of the rows.
+      column: Returns the contiguous array of a meter.
+      series: Returns a view of a meter within a date range.
+      frame: Returns a view of meters within a date range.
+  """
+
+  def __init__(self,
+               values: np.ndarray,
+               axis: TimeAxis,
+               meters: Sequence[Any],
+               index_name: Optional[str] = None,
+               columns_name: Optional[str] = None,
+               index: Optional[pd.DatetimeIndex] = None) -> None:
+    values = np.asfortranarray(values).view()
+    values.flags.writeable = False
+    self.values = values
+    self.axis = axis
+    self.meters = list(meters)
+    self.index_name = index_name
+    self.columns_name = columns_name
+    self._positions = {
+        meter: position
+        for position, meter in enumerate(meters)
+    }
+    self._index = index
+
+  @classmethod
+  def from_frame(cls, dataf: pd.DataFrame) -> Optional['MeterArrays']:
+    """
+    Wraps the values of a float frame, sharing them when they are already
+    column-major, as they are for frames read from the shared files.
+
+    Args:
+        dataf (pd.DataFrame): The half hourly data, one column per meter.
+
+    Returns:
+        Optional[MeterArrays]: The arrays, or None if the frame is not a float frame on the half hourly grid.
+    """
+    if not all(dtype == np.float64 for dtype in dataf.dtypes):
+      return None
+    axis = TimeAxis.from_index(dataf.index)
+    if axis is None:
+      return None
+    return cls(dataf.to_numpy(),
+               axis,
+               dataf.columns,
+               index_name=dataf.index.name,
+               columns_name=dataf.columns.name,
+               index=dataf.index)
+
+  def index(self) -> pd.DatetimeIndex:
+    """
+    Returns the timestamps of the rows, built from the axis once unless the
+    index of the source frame was given.
+
+    Returns:
+        pd.DatetimeIndex: The timestamps.
+    """
+    if self._index is None:
+      self._index = self.axis.to_index(self.index_name)
+    return self._index
+
+  def column(self, meter: Any) -> np.ndarray:
+    """
+    Returns the contiguous array of a meter.
+
+    Args:
+        meter (Any): The meter ID.
+
+    Returns:
+        np.ndarray: The read-only values of the meter.
+    """
+    return self.values[:, self._positions[meter]]
+
+  def series(self,
+             meter: Any,
+             start: Any = None,
+             end: Any = None) -> pd.Series:
+    """
+    Returns a view of a meter from start to end, both included.
+
+    Args:
+        meter (Any): The meter ID.
+        start (Any, optional): The first timestamp to keep. Defaults to the first row.
+        end (Any, optional): The last timestamp to keep. Defaults to the last row.
+
+    Returns:
+        pd.Series: The half hourly values of the meter, sharing memory with the arrays.
+    """
+    rows = self.axis.bounds(start, end)
+    return pd.Series(self.column(meter)[rows],
+                     index=self.index()[rows],
+                     name=meter,
+                     copy=False)
+
+  def frame(self,
+            meters: Optional[Sequence[Any]] = None,
+            start: Any = None,
+            end: Any = None) -> pd.DataFrame:
+    """
+    Returns the meters from start to end, both included. The frame is a view
+    when the meters are adjacent columns, every meter by default, and a copy
+    of the selected slice otherwise.
+
+    Args:
+        meters (Optional[Sequence[Any]], optional): The meter IDs. Defaults to every meter.
+        start (Any, optional): The first timestamp to keep. Defaults to the first row.
+        end (Any, optional): The last timestamp to keep. Defaults to the last row.
+
+    Returns:
+        pd.DataFrame: The half hourly values of the meters.
+    """
+    rows = self.axis.bounds(start, end)
+    meters = self.meters if meters is None else list(meters)
+    positions = [self._positions[meter] for meter in meters]
+    if positions and positions == list(
+        range(positions[0], positions[0] + len(positions))):
+      columns: Any = slice(positions[0], positions[0] + len(positions))
+    else:
+      columns = positions
+    return pd.DataFrame(self.values[rows, columns],
+                        index=self.index()[rows],
+                        columns=pd.Index(meters, name=self.columns_name),
+                        copy=False)
@@ -0,0 +1,137 @@
+"""
+Catalogue of the meter IDs held by each data source.
+
+The dropdowns listing the meters only need the meter IDs, so the catalogue
+reads the csv headers, or only the meter column where the meters are stored
+as rows, rather than loading and preparing the full data. The meters are
+cached per utility and re-read only when the source file changes.
+"""
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from src.data import loader
+from src.utils import schema
+
+ALL_METERS = 'All'
+
+_lock = threading.Lock()
+_catalogue: dict[tuple[str, str], tuple[str, list[Any]]] = {}
+
+
+def read_elec_hh_meters() -> list[Any]:
+  """
+  Reads the electricity meter IDs from the header of the half hourly csv file.
+
+  Returns:
+      list[Any]: The meter IDs.
+  """
+  header = pd.read_csv(loader.ELEC_HH_PATH, index_col=0, nrows=0)
+  return header.columns.tolist()
+
+
+def read_gas_hh_meters() -> list[Any]:
+  """
+  Reads the gas meter IDs from the meter column of the half hourly csv file.
+
+  Returns:
+      list[Any]: The sorted meter IDs, matching the columns of the prepared data.
+  """
+  mprs = pd.read_csv(loader.GAS_HH_PATH, usecols=[schema.InvoiceSchema.MPR_2])
+  return np.unique(mprs[schema.InvoiceSchema.MPR_2].to_numpy()).tolist()
+
+
+def read_elec_invoice_meters() -> list[Any]:
+  """
+  Reads the electricity meter IDs found in the invoices loaded by
+  loader.load_elec_invoice_data, from the date and meter columns only.
+
+  Returns:
+      list[Any]: The meter IDs, followed by ALL_METERS.
+  """
+  dataf = pd.read_csv(loader.ELEC_INVOICE_PATH,
+                      index_col=0,
+                      usecols=[0, 1],
+                      parse_dates=True)
+  dataf = dataf.loc['2022-09-01':]
+  # The invoices keep the last meter of each month.
+  mprs = dataf[schema.InvoiceSchema.MPAN_MPR].resample('1MS').last().dropna()
+  if mprs.empty:
+    return []
+  return mprs.unique().tolist() + [ALL_METERS]
+
+
+def read_gas_invoice_meters() -> list[Any]:
+  """
+  Reads the gas meter IDs found in the invoices loaded by
+  loader.load_gas_invoice_data, from the date and meter columns only.
+
+  Returns:
+      list[Any]: The meter IDs, followed by ALL_METERS.
+  """
+  dataf = pd.read_csv(
+      loader.GAS_INVOICE_PATH,
+      index_col=0,
+      usecols=[schema.InvoiceSchema.PERIOD_FROM, schema.InvoiceSchema.MPR],
+      parse_dates=True)
+  dataf = dataf.loc['2022-09-01':]
+  if dataf.empty:
+    return []
+  return dataf[schema.InvoiceSchema.MPR].unique().tolist() + [ALL_METERS]
+
+
+def _cached(kind: str, utility: str, path: Path,
+            read: Callable[[], list[Any]]) -> list[Any]:
+  version = loader.HH_STORE.version(path)
+  with _lock:
+    entry = _catalogue.get((kind, utility))
+  if entry is None or entry[0] != version:
+    entry = (version, read())
+    with _lock:
+      _catalogue[(kind, utility)] = entry
+  return list(entry[1])
+
+
+def hh_meters(utility: str) -> list[Any]:
+  """
+  Returns the meter IDs of the half hourly data of a utility, in the order of
+  the columns of loader.load_hh_data.
+
+  Args:
+      utility (str): The utility type.
+
+  Returns:
+      list[Any]: The meter IDs.
+  """
+  if utility == schema.PageSchema.ELEC:
+    return _cached('hh', utility, loader.ELEC_HH_PATH, read_elec_hh_meters)
+  return _cached('hh', utility, loader.GAS_HH_PATH, read_gas_hh_meters)
+
+
+def invoice_meters(utility: str) -> list[Any]:
+  """
+  Returns the meter IDs of the invoice data of a utility, in the order they
+  appear in loader.load_invoice_cost_data.
+
+  Args:
+      utility (str): The utility type.
+
+  Returns:
+      list[Any]: The meter IDs, followed by ALL_METERS.
+  """
+  if utility == schema.PageSchema.ELEC:
+    return _cached('invoice', utility, loader.ELEC_INVOICE_PATH,
+                   read_elec_invoice_meters)
+  if utility == schema.PageSchema.GAS:
+    return _cached('invoice', utility, loader.GAS_INVOICE_PATH,
+                   read_gas_invoice_meters)
+  return []
+
+
+def clear() -> None:
+  """Drops every cached meter list."""
+  with _lock:
+    _catalogue.clear()
@@ -0,0 +1,133 @@
+"""
+Columnar on-disk cache for the cleaned csv data.
+
+Cleaned, typed frames are written as Feather files next to the csv they were
+parsed from and are read back whenever they are newer than the csv. Feather
+support comes from pyarrow, which is a declared dependency. Where it is not
+installed the cache is skipped and the csv files are parsed as before.
+"""
+import os
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+try:
+  import pyarrow as pa  # type: ignore
+  from pyarrow import feather  # type: ignore
+except ImportError:
+  pa = None
+  feather = None
+
+CACHE_SUFFIX = '.feather'
+
+
+def available() -> bool:
+  """
+  Checks whether the columnar cache can be used.
+
+  Returns:
+      bool: True if pyarrow is installed.
+  """
+  return feather is not None
+
+
+def cache_path(source: Path) -> Path:
+  """
+  Returns the path of the columnar file for a csv source.
+
+  Args:
+      source (Path): The csv file.
+
+  Returns:
+      Path: The columnar file next to the csv.
+  """
+  return source.with_suffix(CACHE_SUFFIX)
+
+
+def is_fresh(source: Path) -> bool:
+  """
+  Checks whether the columnar file exists and is newer than its csv source.
+
+  Args:
+      source (Path): The csv file.
+
+  Returns:
+      bool: True if the columnar file can be used in place of the csv.
+  """
+  cache = cache_path(source)
+  if not cache.exists():
+    return False
+  return cache.stat().st_mtime_ns >= source.stat().st_mtime_ns
+
+
+def clean_numeric_columns(dataf: pd.DataFrame) -> pd.DataFrame:
+  """
+  Strips thousands separators from text columns and converts them to floats.
+  Columns that still do not parse as numbers are left as text.
+
+  Args:
+      dataf (pd.DataFrame): The raw csv data.
+
+  Returns:
+      pd.DataFrame: The data with numeric text columns converted to floats.
+  """
+  for col in dataf.columns:
+    if dataf[col].dtype == object:
+      try:
+        dataf[col] = dataf[col].str.replace(',', '').astype(float)
+      except (AttributeError, ValueError):
+        pass
+  return dataf
+
+
+def write_cache(dataf: pd.DataFrame, source: Path) -> bool:
+  """
+  Writes the frame to the columnar file of the csv source. The file is written
+  to a temporary path first so readers never see a partial file.
+
+  Args:
+      dataf (pd.DataFrame): The cleaned data.
+      source (Path): The csv file the data was parsed from.
+
+  Returns:
+      bool: True if the file was written.
+  """
+  if feather is None:
+    return False
+  cache = cache_path(source)
+  tmp_path = cache.with_name(f'{cache.name}.{os.getpid()}.tmp')
+  try:
+    feather.write_feather(pa.Table.from_pandas(dataf), tmp_path)
+    os.replace(tmp_path, cache)
+  except (OSError, TypeError, ValueError, pa.ArrowException):
+    tmp_path.unlink(missing_ok=True)
+    return False
+  return True
+
+
+def read_cached(source: Path,
+                parse: Callable[[], pd.DataFrame],
+                rebuild: bool = False) -> pd.DataFrame:
+  """
+  Reads the cleaned data for a csv source from its columnar file, falling back
+  to parsing the csv (and caching the result) when the file is missing or stale.
+
+  Args:
+      source (Path): The csv file.
+      parse (Callable[[], pd.DataFrame]): Parses and cleans the csv file.
+      rebuild (bool, optional): Whether to ignore an existing columnar file. Defaults to False.
+
+  Returns:
+      pd.DataFrame: The cleaned data.
+  """
+  if feather is None:
+    return parse()
+  if not rebuild and is_fresh(source):
+    try:
+      return feather.read_table(cache_path(source)).to_pandas()
+    except (OSError, pa.ArrowException):
+      pass
+  dataf = parse()
+  write_cache(dataf, source)
+  return dataf
@@ -1,69 +1,231 @@
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
-from src.utils import schema
+from src.data import arrays, columnar, shared, store
+from src.utils import metrics, schema
+
+# The data files are found next to this module, whatever the working directory.
+DATA_DIR = Path(__file__).parent
+ELEC_HH_PATH = DATA_DIR / "elec_hh_data.csv"
+GAS_HH_PATH = DATA_DIR / "gas_hh_data.csv"
+ELEC_INVOICE_PATH = DATA_DIR / "electric_invoice_data.csv"
+GAS_INVOICE_PATH = DATA_DIR / "gas_invoice_data.csv"
+DUOS_PATH = DATA_DIR / "duos_data.csv"
+DATA_SOURCES = [ELEC_HH_PATH, GAS_HH_PATH, ELEC_INVOICE_PATH, GAS_INVOICE_PATH]
+SOURCE = 'source'
+ARRAYS = 'arrays'
+HALF_HOUR_MINUTES = 30
+
+HH_STORE = store.DataStore()
 
 
 def prep_gas_data() -> pd.DataFrame:
   """
   Formats the half hourly gas data from Total and returns a DataFrame.
 
+  The csv holds one row per ReadDate and MPR with a column per half hour
+  ('H0030'..'H2400', labelled by the end of the period). Every reading is
+  placed on a half hourly grid by offset arithmetic on the dates and period
+  numbers, and the grid rows that hold a reading make up the index.
+
   Returns:
       pd.DataFrame: The formatted half hourly gas data.
   """
-  dataf = pd.read_csv(r"src/data/gas_hh_data.csv",
-                      index_col=None,
-                      parse_dates=True)
-  read_date = schema.InvoiceSchema.READDATE
-  time = schema.InvoiceSchema.TIME
-  df = pd.melt(dataf,
-               id_vars=[read_date, schema.InvoiceSchema.MPR_2],
-               var_name=time,
-               value_name='Value')
-
-  df[time] = df[time].str[-4:]
-  mask = df[time] == '2400'
-  df.loc[mask, time] = '0000'
-
-  df[read_date] = pd.to_datetime(df[read_date], format='%d/%m/%Y')
-  df.loc[mask, read_date] = df.loc[mask, read_date] + pd.Timedelta(days=1)
-  df[read_date] = df[read_date].astype(str)
-
-  df[schema.HHSchema.DATETIME] = pd.to_datetime(
-      df[read_date] + ' ' + df[time],
-      format='%Y-%m-%d %H%M') - pd.Timedelta(minutes=30)
-
-  final_df = df.pivot(index=schema.HHSchema.DATETIME,
-                      columns=schema.InvoiceSchema.MPR_2,
-                      values='Value')
+  dataf = pd.read_csv(GAS_HH_PATH, index_col=None)
+  id_cols = [schema.InvoiceSchema.READDATE, schema.InvoiceSchema.MPR_2]
+  period_cols = [col for col in dataf.columns if col not in id_cols]
+
+  read_dates = pd.to_datetime(dataf[schema.InvoiceSchema.READDATE],
+                              format='%d/%m/%Y').to_numpy()
+  meters, meter_codes = np.unique(dataf[schema.InvoiceSchema.MPR_2],
+                                  return_inverse=True)
+  period_ends = np.array([int(col[-4:]) for col in period_cols])
+  period_minutes = (period_ends // 100) * 60 + period_ends % 100
+
+  first_date = read_dates.min()
+  day_minutes = (read_dates - first_date) // np.timedelta64(1, 'm')
+  slots = ((day_minutes[:, np.newaxis] + period_minutes[np.newaxis, :]) //
+           HALF_HOUR_MINUTES - 1).ravel()
+  meter_codes = np.repeat(meter_codes, len(period_cols))
+
+  slot_counts = np.bincount(slots)
+  present_slots = np.flatnonzero(slot_counts)
+  rows = (np.cumsum(slot_counts > 0) - 1)[slots]
+  cells = rows * len(meters) + meter_codes
+  if np.bincount(cells).max() > 1:
+    raise ValueError("Index contains duplicate entries, cannot reshape")
+
+  values = np.full(len(present_slots) * len(meters), np.nan)
+  values[cells] = dataf[period_cols].to_numpy(dtype=float).ravel()
+  index = pd.DatetimeIndex(
+      first_date + present_slots * np.timedelta64(HALF_HOUR_MINUTES, 'm'),
+      name=schema.HHSchema.DATETIME)
+  final_df = pd.DataFrame(values.reshape(len(present_slots), len(meters)),
+                          index=index,
+                          columns=pd.Index(meters,
+                                           name=schema.InvoiceSchema.MPR_2))
   final_df = final_df * schema.SM3_TO_KWH
   return final_df
 
 
-def load_hh_data(resample: Optional[str],
-                 utility: str = schema.PageSchema.ELEC) -> pd.DataFrame:
+def hh_data_path(utility: str) -> Path:
   """
-  Loads the half hourly data for the given utility and resamples it if required.
+  Returns the path of the half hourly data source for the given utility.
+
+  Args:
+      utility (str): The utility type.
+
+  Returns:
+      Path: The path of the half hourly csv file.
+  """
+  if utility == schema.PageSchema.ELEC:
+    return ELEC_HH_PATH
+  return GAS_HH_PATH
+
+
+def hh_data_version(utility: str = schema.PageSchema.ELEC) -> str:
+  """
+  Returns the content hash of the half hourly data source for the given utility.
 
   Args:
-      resample (Optional[str]): The resampling frequency.
       utility (str, optional): The utility type. Defaults to schema.PageSchema.ELEC.
 
   Returns:
-      pd.DataFrame: The half hourly data.
+      str: The content hash of the source file.
+  """
+  return HH_STORE.version(hh_data_path(utility))
+
+
+def data_version() -> str:
+  """
+  Returns a combined content hash of every data source, which changes
+  whenever any of the source files changes.
+
+  Returns:
+      str: The combined content hash.
+  """
+  return '-'.join(HH_STORE.version(source) for source in DATA_SOURCES)
+
+
+def parse_elec_hh_data() -> pd.DataFrame:
   """
+  Parses the half hourly electricity csv file into a float DataFrame.
+
+  Returns:
+      pd.DataFrame: The parsed half hourly electricity data.
+  """
+  dataf = pd.read_csv(ELEC_HH_PATH, index_col=0, parse_dates=True)
+  return columnar.clean_numeric_columns(dataf)
+
+
+def read_hh_source(utility: str, rebuild: bool = False) -> pd.DataFrame:
+  """
+  Reads the cleaned half hourly data for the given utility, from its columnar
+  cache when that is newer than the csv file. When SHARED_DATA_DIR is set, the
+  data is mapped read-only from the files shared by the server workers.
+
+  Args:
+      utility (str): The utility type.
+      rebuild (bool, optional): Whether to re-parse the csv and rewrite the cache. Defaults to False.
+
+  Returns:
+      pd.DataFrame: The parsed half hourly data.
+  """
+  source = hh_data_path(utility)
   if utility == schema.PageSchema.ELEC:
-    dataf = pd.read_csv(r"src/data/elec_hh_data.csv",
-                        index_col=0,
-                        parse_dates=True)
-    for col in dataf.columns:
-      if dataf[col].dtype == object:
-        dataf[col] = dataf[col].str.replace(',', '')
-        dataf[col] = dataf[col].astype(float)
+    parse = parse_elec_hh_data
   else:
-    dataf = prep_gas_data()
+    parse = prep_gas_data
+  return shared.read_cached(
+      source, HH_STORE.version(source),
+      lambda: columnar.read_cached(source, parse, rebuild), rebuild)
+
+
+def parse_elec_invoice_data() -> pd.DataFrame:
+  """
+  Parses the electricity invoice csv file, converting numeric text columns to floats.
+
+  Returns:
+      pd.DataFrame: The parsed electricity invoice data.
+  """
+  dataf = pd.read_csv(ELEC_INVOICE_PATH, index_col=0, parse_dates=True)
+  return columnar.clean_numeric_columns(dataf)
+
+
+def parse_gas_invoice_data() -> pd.DataFrame:
+  """
+  Parses the gas invoice csv file, converting numeric text columns to floats.
+
+  Returns:
+      pd.DataFrame: The parsed gas invoice data.
+  """
+  dataf = pd.read_csv(GAS_INVOICE_PATH, index_col=1, parse_dates=True)
+  return columnar.clean_numeric_columns(dataf)
+
+
+def read_elec_invoice_source(rebuild: bool = False) -> pd.DataFrame:
+  """
+  Reads the cleaned electricity invoice data, from its columnar cache when
+  that is newer than the csv file.
+
+  Args:
+      rebuild (bool, optional): Whether to re-parse the csv and rewrite the cache. Defaults to False.
+
+  Returns:
+      pd.DataFrame: The cleaned electricity invoice data.
+  """
+  return columnar.read_cached(ELEC_INVOICE_PATH, parse_elec_invoice_data,
+                              rebuild)
+
+
+def read_gas_invoice_source(rebuild: bool = False) -> pd.DataFrame:
+  """
+  Reads the cleaned gas invoice data, from its columnar cache when that is
+  newer than the csv file.
+
+  Args:
+      rebuild (bool, optional): Whether to re-parse the csv and rewrite the cache. Defaults to False.
+
+  Returns:
+      pd.DataFrame: The cleaned gas invoice data.
+  """
+  return columnar.read_cached(GAS_INVOICE_PATH, parse_gas_invoice_data,
+                              rebuild)
+
+
+def build_columnar_cache() -> list[Path]:
+  """
+  Re-parses every csv source and writes its columnar cache file.
+
+  Returns:
+      list[Path]: The columnar files that are up to date after the build.
+  """
+  read_hh_source(schema.PageSchema.ELEC, rebuild=True)
+  read_hh_source(schema.PageSchema.GAS, rebuild=True)
+  read_elec_invoice_source(rebuild=True)
+  read_gas_invoice_source(rebuild=True)
+  return [
+      columnar.cache_path(source) for source in DATA_SOURCES
+      if columnar.is_fresh(source)
+  ]
+
+
+def build_hh_data(resample: Optional[str], utility: str) -> pd.DataFrame:
+  """
+  Builds the half hourly data for the given utility from the stored source frame.
+
+  Args:
+      resample (Optional[str]): The resampling frequency.
+      utility (str): The utility type.
+
+  Returns:
+      pd.DataFrame: The half hourly data.
+  """
+  dataf = HH_STORE.get((utility, SOURCE), hh_data_path(utility),
+                       lambda: read_hh_source(utility))
   if resample:
     dataf = dataf.resample(resample).sum()
   dataf['All'] = dataf.sum(axis=1)
@@ -71,6 +233,64 @@ def load_hh_data(resample: Optional[str],
   return dataf
 
 
+def build_hh_arrays(utility: str) -> Optional[arrays.MeterArrays]:
+  """
+  Wraps the stored source frame of a utility in per meter arrays.
+
+  Args:
+      utility (str): The utility type.
+
+  Returns:
+      Optional[arrays.MeterArrays]: The arrays, or None if the data is not on the half hourly grid.
+  """
+  dataf = HH_STORE.get((utility, SOURCE), hh_data_path(utility),
+                       lambda: read_hh_source(utility))
+  return arrays.MeterArrays.from_frame(dataf)
+
+
+@metrics.timed(metrics.LOADER)
+def load_hh_arrays(
+    utility: str = schema.PageSchema.ELEC) -> Optional[arrays.MeterArrays]:
+  """
+  Loads the half hourly data for the given utility as read-only per meter
+  arrays, from which a meter and a date range are selected without copying.
+  The arrays share memory with the stored source frame, memory-mapped when
+  SHARED_DATA_DIR is set, and are only rebuilt when the csv changes.
+
+  Args:
+      utility (str, optional): The utility type. Defaults to schema.PageSchema.ELEC.
+
+  Returns:
+      Optional[arrays.MeterArrays]: The arrays, or None if the data is not on the half hourly grid.
+  """
+  return HH_STORE.get((utility, ARRAYS),
+                      hh_data_path(utility),
+                      lambda: build_hh_arrays(utility),
+                      view=lambda hh_arrays: hh_arrays)
+
+
+@metrics.timed(metrics.LOADER)
+def load_hh_data(resample: Optional[str],
+                 utility: str = schema.PageSchema.ELEC) -> pd.DataFrame:
+  """
+  Loads the half hourly data for the given utility and resamples it if required.
+
+  The parsed data is held in a process wide store keyed by (utility, resample),
+  so the csv is only parsed again when it changes on disk. The returned frame
+  shares memory with the store and must not be modified in place.
+
+  Args:
+      resample (Optional[str]): The resampling frequency.
+      utility (str, optional): The utility type. Defaults to schema.PageSchema.ELEC.
+
+  Returns:
+      pd.DataFrame: The half hourly data.
+  """
+  return HH_STORE.get((utility, resample), hh_data_path(utility),
+                      lambda: build_hh_data(resample, utility))
+
+
+@metrics.timed(metrics.LOADER)
 def load_elec_invoice_data() -> pd.DataFrame:
   """
   Pulls and formats the electricity invoice data from the csv file.
@@ -78,9 +298,7 @@ def load_elec_invoice_data() -> pd.DataFrame:
   Returns:
       pd.DataFrame: The formatted electricity invoice data.
   """
-  data_path = Path(r"src/data/electric_invoice_data.csv")
-
-  dataf = pd.read_csv(data_path, index_col=0, parse_dates=True)
+  dataf = read_elec_invoice_source()
   dataf = dataf.loc['2022-09-01':]
   dataf_resample = dataf.drop([schema.InvoiceSchema.MPAN_MPR], axis=1).copy()
   dataf_resample = dataf_resample.resample('1MS').sum()
@@ -124,6 +342,7 @@ def load_elec_invoice_data() -> pd.DataFrame:
   return dataf
 
 
+@metrics.timed(metrics.LOADER)
 def load_gas_invoice_data() -> pd.DataFrame:
   """
   Pulls and formats the gas invoice data from the csv file.
@@ -131,8 +350,7 @@ def load_gas_invoice_data() -> pd.DataFrame:
   Returns:
       pd.DataFrame: The formatted gas invoice data.
   """
-  data_path = Path(r"src/data/gas_invoice_data.csv")
-  dataf = pd.read_csv(data_path, index_col=1, parse_dates=True)
+  dataf = read_gas_invoice_source()
   dataf = dataf.loc['2022-09-01':]
   dataf = dataf.drop(columns=[schema.InvoiceSchema.UNNAMED])
   #     schema.InvoiceSchema.NET, schema.InvoiceSchema.UNNAMED,
@@ -168,6 +386,7 @@ def load_gas_invoice_data() -> pd.DataFrame:
   return dataf
 
 
+@metrics.timed(metrics.LOADER)
 def load_invoice_cost_data(energy_type: str) -> pd.DataFrame:
   """
   Loads the invoice cost data for the given energy type.
@@ -186,6 +405,7 @@ def load_invoice_cost_data(energy_type: str) -> pd.DataFrame:
   return dataf
 
 
+@metrics.timed(metrics.LOADER)
 def load_duos_data() -> pd.DataFrame:
   """
   Loads the generated DUOS data from the csv file.
@@ -193,8 +413,7 @@ def load_duos_data() -> pd.DataFrame:
   Returns:
       pd.DataFrame: The DUOS data.
   """
-  data_path = Path(r"src/data/duos_data.csv")
-  df = pd.read_csv(data_path, index_col=0, parse_dates=True)
+  df = pd.read_csv(DUOS_PATH, index_col=0, parse_dates=True)
   df = df.sort_index()
   df.index = df.index.hour  # type: ignore
   return df
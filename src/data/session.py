@@ -0,0 +1,152 @@
+"""
+Server-side datasets shared by the callbacks of a tab.
+
+A tab stores a dataset handle in a dcc.Store: a small JSON description of the
+utility, the year filter and the dropped columns of the half hourly data its
+callbacks work on. Callbacks resolve the handle to the already filtered frame,
+which is built once per handle and data version and then shared. Frames that
+were evicted, or built by another server worker, are rebuilt from the handle.
+
+The cache is held in memory by each process. The callbacks storing a handle
+resolve it first, in the server process, and the background jobs forked from
+that process afterwards start with a copy of its cache. Datasets built inside
+a job are not seen by the server process. A dataset of consecutive years is
+rebuilt from its handle as a view of the loaded data, whose rows are found by
+arithmetic on the index, so a job or worker that misses the cache rebuilds it
+without copying the data.
+"""
+import json
+from typing import Any, Optional, Sequence
+
+import pandas as pd
+
+from src.data import loader, store
+from src.utils import cache, metrics, time_index
+
+# Each server worker and background job process holds its own cache. The
+# datasets of consecutive years are views of the loaded data, so the budget
+# is mostly taken by the copies made for other year sets. The sizes of views
+# are counted in full, so the budget is an upper bound.
+SESSION_CACHE_BYTES = 256 * 1024 * 1024
+SESSION_CACHE_ENTRIES = 32
+
+SESSION_DATASETS = cache.LRUCache(SESSION_CACHE_BYTES,
+                                  max_entries=SESSION_CACHE_ENTRIES)
+
+
+def create_handle(
+    utility: str,
+    years: Optional[Sequence[int]] = None,
+    year_range: bool = True,
+    drop: Sequence[str] = ()) -> dict[str, Any]:
+  """
+  Creates the handle of a filtered half hourly dataset.
+
+  Args:
+      utility (str): The utility type.
+      years (Optional[Sequence[int]], optional): The selected years, the first and last year when None. Defaults to None.
+      year_range (bool, optional): Whether to keep every year from the first to the last selected year, rather than only the selected years. Defaults to True.
+      drop (Sequence[str], optional): The columns to drop. Defaults to ().
+
+  Returns:
+      dict[str, Any]: The handle, to be stored in a dcc.Store.
+  """
+  return {
+      'utility': utility,
+      'years': [int(year) for year in years] if years else None,
+      'year_range': year_range,
+      'drop': sorted(drop),
+  }
+
+
+def handle_key(handle: dict[str, Any]) -> str:
+  """
+  Returns the cache key of a dataset handle.
+
+  Args:
+      handle (dict[str, Any]): The dataset handle.
+
+  Returns:
+      str: The normalized handle.
+  """
+  return json.dumps(create_handle(**handle), sort_keys=True)
+
+
+def drop_columns(dataf: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+  """
+  Drops columns from a frame. Unlike DataFrame.drop, which copies the columns
+  that are kept, the result holds views of them.
+
+  Args:
+      dataf (pd.DataFrame): The frame.
+      columns (Sequence[str]): The columns to drop.
+
+  Returns:
+      pd.DataFrame: The frame without the columns, sharing memory with the input.
+  """
+  if not columns:
+    return dataf
+  kept = dataf.columns.drop(columns)
+  # With copy=False each array becomes its own block instead of being copied
+  # into one block per dtype.
+  selected = pd.DataFrame(
+      {column: dataf[column].to_numpy()
+       for column in kept},
+      index=dataf.index,
+      copy=False)
+  selected.columns = kept
+  return selected
+
+
+def build_dataset(handle: dict[str, Any]) -> pd.DataFrame:
+  """
+  Loads and filters the half hourly data described by a handle. The result is
+  a view of the loaded data when the years are consecutive, and otherwise a
+  copy of the selected rows held by the worker that built it.
+
+  Args:
+      handle (dict[str, Any]): The dataset handle.
+
+  Returns:
+      pd.DataFrame: The filtered half hourly data.
+  """
+  dataf = loader.load_hh_data(resample=None, utility=handle['utility'])
+  dataf = drop_columns(dataf, handle['drop'])
+  years = handle['years']
+  if not years:
+    years = [dataf.index.year.min(), dataf.index.year.max()]
+  if handle['year_range']:
+    years = range(years[0], years[-1] + 1)
+  return time_index.select_years(dataf, years)
+
+
+def prepare(handle: dict[str, Any]) -> None:
+  """
+  Resolves a dataset handle before it is stored in a dcc.Store, so that the
+  dataset is cached in the server process when the callbacks of the tab run,
+  including the background jobs forked from it.
+
+  Args:
+      handle (dict[str, Any]): The dataset handle.
+  """
+  resolve(handle)
+
+
+@metrics.timed(metrics.LOADER)
+def resolve(handle: dict[str, Any]) -> pd.DataFrame:
+  """
+  Resolves a dataset handle to its filtered half hourly data, building it
+  only if it is not cached for the current version of the data.
+
+  Args:
+      handle (dict[str, Any]): The dataset handle.
+
+  Returns:
+      pd.DataFrame: A read-only view of the filtered half hourly data.
+  """
+  key = (handle_key(handle), loader.hh_data_version(handle['utility']))
+  dataf = SESSION_DATASETS.get(key)
+  if dataf is None:
+    dataf = build_dataset(handle)
+    SESSION_DATASETS.put(key, dataf)
+  return store.read_only_view(dataf)
@@ -0,0 +1,159 @@
+"""
+Read-only memory-mapped copies of the parsed half hourly data.
+
+When the SHARED_DATA_DIR environment variable names a directory, the parsed
+half hourly frames are written there once as .npy files, one per version of
+the source csv, and every process maps them read-only instead of holding a
+private copy. The server workers then share one copy of the data through the
+page cache. The files of a version are never rewritten, so a worker can map
+them while another one writes the next version.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+SHARED_DATA_DIR_ENV = 'SHARED_DATA_DIR'
+
+
+def directory() -> Optional[Path]:
+  """
+  Returns the directory of the shared files.
+
+  Returns:
+      Optional[Path]: The directory named by SHARED_DATA_DIR, or None if it is not set.
+  """
+  path = os.environ.get(SHARED_DATA_DIR_ENV)
+  return Path(path) if path else None
+
+
+def shared_paths(folder: Path, source: Path,
+                 digest: str) -> tuple[Path, Path, Path]:
+  """
+  Returns the paths of the shared files of a version of a csv source.
+
+  Args:
+      folder (Path): The directory of the shared files.
+      source (Path): The csv file.
+      digest (str): The content hash of the csv file.
+
+  Returns:
+      tuple[Path, Path, Path]: The values, index and metadata files.
+  """
+  stem = f'{source.stem}-{digest[:16]}'
+  return (folder / f'{stem}.values.npy', folder / f'{stem}.index.npy',
+          folder / f'{stem}.json')
+
+
+def _save(path: Path, write: Callable[[Any], None]) -> None:
+  tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+  try:
+    with open(tmp_path, 'wb') as file:
+      write(file)
+    os.replace(tmp_path, path)
+  finally:
+    tmp_path.unlink(missing_ok=True)
+
+
+def write_shared(dataf: pd.DataFrame, folder: Path, source: Path,
+                 digest: str) -> bool:
+  """
+  Writes a float frame to the shared files of a version of its csv source and
+  removes the files of the other versions. The values are stored column by
+  column so that each meter is contiguous.
+
+  Args:
+      dataf (pd.DataFrame): The parsed data.
+      folder (Path): The directory of the shared files.
+      source (Path): The csv file the data was parsed from.
+      digest (str): The content hash of the csv file.
+
+  Returns:
+      bool: True if the files were written.
+  """
+  if not all(dtype == np.float64 for dtype in dataf.dtypes):
+    return False
+  values_path, index_path, meta_path = shared_paths(folder, source, digest)
+  meta = {
+      'columns': dataf.columns.tolist(),
+      'columns_name': dataf.columns.name,
+      'index_name': dataf.index.name,
+  }
+  try:
+    folder.mkdir(parents=True, exist_ok=True)
+    _save(values_path,
+          lambda file: np.save(file, np.asfortranarray(dataf.to_numpy())))
+    _save(index_path,
+          lambda file: np.save(file, dataf.index.to_numpy('datetime64[ns]')))
+    # The metadata is written last, so it marks the version as complete.
+    _save(meta_path, lambda file: file.write(json.dumps(meta).encode('utf-8')))
+  except (OSError, TypeError, ValueError):
+    return False
+  current = {values_path, index_path, meta_path}
+  for path in folder.glob(f'{source.stem}-*'):
+    if path not in current and not path.name.endswith('.tmp'):
+      path.unlink(missing_ok=True)
+  return True
+
+
+def read_shared(folder: Path, source: Path,
+                digest: str) -> Optional[pd.DataFrame]:
+  """
+  Maps the shared files of a version of a csv source into a frame.
+
+  Args:
+      folder (Path): The directory of the shared files.
+      source (Path): The csv file.
+      digest (str): The content hash of the csv file.
+
+  Returns:
+      Optional[pd.DataFrame]: A frame over the read-only mapped values, or None if the version has not been written.
+  """
+  values_path, index_path, meta_path = shared_paths(folder, source, digest)
+  try:
+    meta = json.loads(meta_path.read_text(encoding='utf-8'))
+    values = np.load(values_path, mmap_mode='r')
+    index = np.load(index_path)
+  except (OSError, ValueError):
+    return None
+  return pd.DataFrame(values,
+                      index=pd.DatetimeIndex(index, name=meta['index_name']),
+                      columns=pd.Index(meta['columns'],
+                                       name=meta['columns_name']),
+                      copy=False)
+
+
+def read_cached(source: Path,
+                digest: str,
+                parse: Callable[[], pd.DataFrame],
+                rebuild: bool = False) -> pd.DataFrame:
+  """
+  Reads the parsed data of a csv source from its shared files, parsing and
+  writing them first when they are missing. Without SHARED_DATA_DIR, or when
+  the data cannot be shared, the parsed frame is returned as is.
+
+  Args:
+      source (Path): The csv file.
+      digest (str): The content hash of the csv file.
+      parse (Callable[[], pd.DataFrame]): Parses the csv file.
+      rebuild (bool, optional): Whether to ignore existing shared files. Defaults to False.
+
+  Returns:
+      pd.DataFrame: The parsed data, read-only when it is shared.
+  """
+  folder = directory()
+  if folder is None:
+    return parse()
+  if not rebuild:
+    dataf = read_shared(folder, source, digest)
+    if dataf is not None:
+      return dataf
+  dataf = parse()
+  if write_shared(dataf, folder, source, digest):
+    shared_dataf = read_shared(folder, source, digest)
+    if shared_dataf is not None:
+      return shared_dataf
+  return dataf
@@ -0,0 +1,167 @@
+"""
+In-memory store for the parsed data sources.
+
+Each entry is parsed at most once per process and is only rebuilt when the
+source file behind it changes. A change of modification time triggers a
+re-hash of the file, and the entry is rebuilt when the content hash differs
+from the one it was built from. Callers are handed shallow views of the stored
+frames which share memory with the store. The values of a stored frame are
+marked read-only, so writing to them in place raises a ValueError instead of
+changing the frame for every later caller; copy the frame before modifying
+values in place.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+  """
+  Computes the content hash of a file.
+
+  Args:
+      path (Path): The file to hash.
+
+  Returns:
+      str: The hex digest of the file contents.
+  """
+  digest = hashlib.sha1()
+  with open(path, 'rb') as file:
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+
+def freeze(dataf: pd.DataFrame) -> None:
+  """
+  Marks the values of a frame as read-only, so that in place writes such as
+  dataf.iloc[0, 0] = 1 or dataf[col] *= 2 raise a ValueError.
+
+  Args:
+      dataf (pd.DataFrame): The frame.
+  """
+  # The block arrays are shared by every shallow copy of the frame.
+  for values in dataf._mgr.arrays:  # pylint: disable=protected-access
+    if isinstance(values, np.ndarray) and values.flags.writeable:
+      values.flags.writeable = False
+
+
+def read_only_view(dataf: pd.DataFrame) -> pd.DataFrame:
+  """
+  Returns a read-only view of a stored frame that shares its data.
+
+  The values of the stored frame are marked read-only, so in place writes to
+  the view raise a ValueError. Adding, dropping or replacing columns on the
+  view does not affect the stored frame. The view gets its own index object
+  so renaming the index does not leak back into the store either.
+
+  Args:
+      dataf (pd.DataFrame): The stored frame.
+
+  Returns:
+      pd.DataFrame: The view of the frame.
+  """
+  freeze(dataf)
+  view = dataf.copy(deep=False)
+  view.index = dataf.index.view()
+  return view
+
+
+@dataclass
+class SourceState:
+  """The last seen state of a source file."""
+  mtime_ns: int
+  size: int
+  digest: str
+
+
+@dataclass
+class StoreEntry:
+  """A parsed frame, or other value, and the source digest it was built from."""
+  dataf: Any
+  digest: str
+
+
+class DataStore():
+  """
+  Thread safe memo of parsed frames keyed by an arbitrary hashable key.
+
+  Methods:
+      version: Returns the content hash of a source file.
+      get: Returns the stored frame for a key, building it if required.
+      clear: Drops every stored frame.
+  """
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._sources: dict[Path, SourceState] = {}
+    self._entries: dict[Hashable, StoreEntry] = {}
+    self._key_locks: dict[Hashable, threading.Lock] = {}
+
+  def version(self, path: Path) -> str:
+    """
+    Returns the content hash of the source file, only re-hashing the file
+    when its modification time or size has changed since the last call.
+
+    Args:
+        path (Path): The source file.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    stat = path.stat()
+    with self._lock:
+      state = self._sources.get(path)
+    if (state is not None and state.mtime_ns == stat.st_mtime_ns
+        and state.size == stat.st_size):
+      return state.digest
+    digest = file_digest(path)
+    with self._lock:
+      self._sources[path] = SourceState(mtime_ns=stat.st_mtime_ns,
+                                        size=stat.st_size,
+                                        digest=digest)
+    return digest
+
+  def _key_lock(self, key: Hashable) -> threading.Lock:
+    with self._lock:
+      return self._key_locks.setdefault(key, threading.Lock())
+
+  def get(self,
+          key: Hashable,
+          path: Path,
+          build: Callable[[], Any],
+          view: Callable[[Any], Any] = read_only_view) -> Any:
+    """
+    Returns a read-only view of the frame stored under the key. The frame is
+    built when it is missing or when the source file has changed.
+
+    Args:
+        key (Hashable): The key of the frame.
+        path (Path): The source file the frame is built from.
+        build (Callable[[], Any]): Builds the frame from the source.
+        view (Callable[[Any], Any], optional): Returns the view handed to the caller, for values that are not frames. Defaults to read_only_view.
+
+    Returns:
+        Any: A read-only view of the stored frame.
+    """
+    digest = self.version(path)
+    with self._key_lock(key):
+      entry = self._entries.get(key)
+      if entry is None or entry.digest != digest:
+        entry = StoreEntry(dataf=build(), digest=digest)
+        with self._lock:
+          self._entries[key] = entry
+    return view(entry.dataf)
+
+  def clear(self) -> None:
+    """Drops every stored frame and source state."""
+    with self._lock:
+      self._entries.clear()
+      self._sources.clear()
@@ -1,40 +1,38 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 
 import pandas as pd
-from dash import Input, Output, State, callback, html  # type: ignore
+from dash import Input, Output, State, callback, dcc, html, no_update  # type: ignore
 
 from src.components import consumption_plots, filter_objects, gen_content_obj
-from src.data import loader
+from src.data import catalogue, loader, session
 from src.tabs import general_tab
-from src.utils import IDS, page_text, schema
+from src.utils import IDS, background, figure_cache, page_text, schema
 
 
 def render() -> html.Div:
-  """Renders the consumption tab.
+  """Renders the consumption tab. The figures and the table are left empty, \
+  to be filled in by the callbacks that fire when the tab is displayed.
   
   Returns:
       html.Div: Div containing the layout for the consumption tab."""
   tab_title = IDS.ENERGY
-  initial_meter = f'{IDS.ELEC_MPR_3}'
-  dataf = loader.load_hh_data(resample=None)
-  dataf = dataf.drop(['All'], axis=1)
+  dataset = session.create_handle(schema.PageSchema.ELEC, drop=['All'])
+  dataf = session.resolve(dataset)
   options = dataf.columns.tolist()
   options.remove(schema.HHSchema.MONTH_OF_YEAR)
-  data = consumption_plots.new_consump_periods(dataf, initial_meter)
-  lower_table = gen_content_obj.table_obj(tab_title, data)
-  fig = gen_content_obj.graph_obj(
-      tab_title, consumption_plots.new_baseline_barplot(dataf, initial_meter))
+  lower_table = gen_content_obj.table_obj(
+      tab_title, pd.DataFrame(columns=consumption_plots.PERIOD_COLUMNS))
+  fig = gen_content_obj.graph_obj(tab_title,
+                                  gen_content_obj.placeholder_figure())
+  progress = gen_content_obj.progress_obj(tab_title)
 
   baselines = schema.BASELINES
-  peak_dates: list[datetime] = data.index.unique().date.tolist()
+  peak_dates: list[datetime] = []
   years: list[int] = dataf.index.year.unique()
-  fig_2 = consumption_plots.create_consumption_lineplot(
-      dataf,
-      initial_meter,
-      selected_baseline=baselines[2],
-      selected_date=peak_dates[0])
-  lower_line = gen_content_obj.graph_obj(tab_title, fig_2, 1)
+  lower_line = gen_content_obj.graph_obj(tab_title,
+                                         gen_content_obj.placeholder_figure(),
+                                         1)
 
   filt_objs = [
       filter_objects.box_options([
@@ -75,7 +73,7 @@ def render() -> html.Div:
       section_text=page_text.tab_info(tab_title)[
           page_text.TabSchema.FIRST_PLOT_TEXT],
       filter_obj=filt_objs,
-      chart_table_1=fig)
+      chart_table_1=html.Div([progress, fig]))
   section_3 = general_tab.generate_page(
       section_title=page_text.tab_info(tab_title)[
           page_text.TabSchema.SUB_TITLE_2],
@@ -96,40 +94,64 @@ def render() -> html.Div:
       section_2.render_section(),
       section_3.render_section(),
       section_4.render_section(),
+      dcc.Store(id=tab_title + IDS.DATASET, data=dataset),
   ])
 
 
-@callback(Output(IDS.ENERGY + IDS.TABLE + "0", 'rowData'),
-          Output(IDS.ENERGY + IDS.FIGURE + "0", 'figure'),
+@callback(Output(IDS.ENERGY + IDS.DATASET, 'data'),
           Input(IDS.ENERGY + IDS.RANGESLIDER, 'value'),
-          Input(IDS.ENERGY + IDS.DROPDOWN + "1", 'value'),
-          Input(IDS.ENERGY + IDS.RADIOITEM, 'value'),
-          Input(IDS.ENERGY + IDS.DROPDOWN + "0", 'value'))
+          Input(IDS.ENERGY + IDS.RADIOITEM, 'value'))
+def update_dataset(selected_years: list[int], utility: str) -> dict[str, Any]:
+  """Updates the dataset handle of the tab based on the selected years and utility.
+
+  Args:
+      selected_years (list[int]): The selected years.
+      utility (str): The selected utility.
+
+  Returns:
+      dict[str, Any]: The dataset handle."""
+  dataset = session.create_handle(utility, years=selected_years, drop=['All'])
+  session.prepare(dataset)
+  return dataset
+
+
+@background.background_callback(
+    Output(IDS.ENERGY + IDS.TABLE + "0", 'rowData'),
+    Output(IDS.ENERGY + IDS.FIGURE + "0", 'figure'),
+    Input(IDS.ENERGY + IDS.DATASET, 'data'),
+    Input(IDS.ENERGY + IDS.DROPDOWN + "1", 'value'),
+    Input(IDS.ENERGY + IDS.DROPDOWN + "0", 'value'),
+    progress=background.progress_outputs(IDS.ENERGY) +
+    [Output(IDS.ENERGY + IDS.TABLE + "0", 'rowData')],
+    running=background.running_outputs(IDS.ENERGY,
+                                       'Finding the out of hours periods'),
+    cancel=[Input(IDS.URL, 'pathname')])
 def update_table_and_barplot(
-    selected_years: list[int], target_col: str, utility: str,
+    set_progress: Callable, dataset: dict[str, Any], target_col: str,
     baseline_type: str) -> tuple[list[dict[str, Any]], Any]:
-  """Updates the table and bar plot based on the selected years, meter and baseline type.
+  """Updates the table and bar plot based on the selected years, meter and baseline type. \
+  When run in the background, the table is sent with the progress, before the \
+  bar plot is built.
   
   Args:
-      selected_years (list[int]): The selected years.
+      set_progress (Callable): Updates the progress bar, status text and table.
+      dataset (dict[str, Any]): The dataset handle of the selected years and utility.
       target_col (str): The selected meter.
-      utility (str): The selected utility.
       baseline_type (str): The selected baseline type.
       
   Returns:
       tuple[list[dict[str, Any]], Any]: The table data and the bar plot."""
-  dataf = loader.load_hh_data(resample=None, utility=utility)
-  dataf = dataf.drop(['All'], axis=1)
-  if not selected_years:
-    selected_years = [dataf.index.year.min(), dataf.index.year.max()]
-  year_range = range(selected_years[0], selected_years[-1] + 1)
-  filtered_data = dataf[dataf.index.year.isin(year_range)]
+  filtered_data = session.resolve(dataset)
   table_data = consumption_plots.new_consump_periods(
-      filtered_data, target_col=target_col,
-      baseline_type=baseline_type).to_dict('records')
+      filtered_data,
+      target_col=target_col,
+      baseline_type=baseline_type,
+      dataset=dataset).to_dict('records')
+  set_progress((1, 2, 'Building the baseline bar plot', table_data))
   fig = consumption_plots.new_baseline_barplot(filtered_data,
                                                target_col=target_col,
-                                               baseline=baseline_type)
+                                               baseline=baseline_type,
+                                               dataset=dataset)
 
   return table_data, fig
 
@@ -145,10 +167,7 @@ def update_dropdown(energy_type: str) -> tuple[list[dict[str, str]], str]:
   
   Returns:
       tuple[list[dict[str, str]], str]: The dropdown options and the default value."""
-  dataf = loader.load_hh_data(resample='1MS', utility=energy_type)
-  dataf = dataf.drop(['All'], axis=1)
-  meter_ids = dataf.columns.tolist()
-  meter_ids.remove('month_of_year')
+  meter_ids = catalogue.hh_meters(energy_type)
   new_options = [{
       'label': meter_id,
       'value': meter_id
@@ -160,28 +179,61 @@ def update_dropdown(energy_type: str) -> tuple[list[dict[str, str]], str]:
 @callback(Output(IDS.ENERGY + IDS.FIGURE + "1", 'figure'),
           Input(IDS.ENERGY + IDS.DROPDOWN + "2", 'value'),
           Input(IDS.ENERGY + IDS.DROPDOWN + "0", 'value'),
-          Input(IDS.ENERGY + IDS.DROPDOWN + "1", 'value'))
+          Input(IDS.ENERGY + IDS.DROPDOWN + "1", 'value'),
+          State(IDS.ENERGY + IDS.DATASET, 'data'))
+@figure_cache.cached_figure(loader.data_version)
 def update_consump_lineplot(selected_date: datetime, selected_baseline: str,
-                            selected_meter_id: str) -> Any:
+                            selected_meter_id: str, dataset: dict[str,
+                                                                  Any]) -> Any:
   """Updates the consumption line plot based on the selected date, baseline and meter.
 
   Args:
       selected_date (datetime): The selected date.
       selected_baseline (str): The selected baseline.
       selected_meter_id (str): The selected meter.
+      dataset (dict[str, Any]): The dataset handle of the selected years and utility.
 
   Returns:
       Any: The consumption line plot."""
-  data = loader.load_hh_data(resample=None)
-  data = data.drop(['All'], axis=1)
+  if not selected_date or not selected_meter_id:
+    return no_update
   return consumption_plots.create_consumption_lineplot(
-      data,
+      session.resolve(dataset),
       selected_meter_id,
       selected_baseline=selected_baseline,
-      selected_date=selected_date)
+      selected_date=selected_date,
+      dataset=dataset)
   # return fig
 
 
+@callback(Output(IDS.ENERGY + IDS.FIGURE + "1", 'figure',
+                 allow_duplicate=True),
+          Input(IDS.ENERGY + IDS.FIGURE + "1", 'relayoutData'),
+          State(IDS.ENERGY + IDS.DROPDOWN + "2", 'value'),
+          State(IDS.ENERGY + IDS.DROPDOWN + "1", 'value'),
+          State(IDS.ENERGY + IDS.DATASET, 'data'),
+          prevent_initial_call=True)
+def refine_consump_lineplot(relayout_data: dict[str, Any],
+                            selected_date: datetime, selected_meter_id: str,
+                            dataset: dict[str, Any]) -> Any:
+  """Replaces the downsampled consumption line with the full resolution data of the zoomed range.
+
+  Args:
+      relayout_data (dict[str, Any]): The relayout data of the figure.
+      selected_date (datetime): The selected date.
+      selected_meter_id (str): The selected meter.
+      dataset (dict[str, Any]): The dataset handle of the selected years and utility.
+
+  Returns:
+      Any: A patch of the figure."""
+  if not selected_date or not selected_meter_id:
+    return no_update
+  window = consumption_plots.consumption_series(selected_meter_id,
+                                                selected_date,
+                                                utility=dataset['utility'])
+  return gen_content_obj.refine_line_trace(window, relayout_data)
+
+
 @callback(Output(IDS.ENERGY + IDS.DROPDOWN + "2", 'options'),
           Input(IDS.ENERGY + IDS.TABLE + "0", 'rowData'))
 def update_peak_dropdown_options(
@@ -192,7 +244,9 @@ def update_peak_dropdown_options(
       table_data (list[dict[str, Any]]): The table data.
 
   Returns:
-      list[dict[str, str]]: The peak dropdown options."""
+      list[dict[str, str]]: The peak dropdown options, empty when the table is empty."""
+  if not table_data:
+    return []
   dataf = pd.DataFrame(table_data)
   peak_dates = pd.to_datetime(
       dataf['Start Datetime']).dt.date.unique().tolist()
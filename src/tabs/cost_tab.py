@@ -3,9 +3,11 @@ import plotly.graph_objects as go
 from dash import Input, Output, State, callback, html  # type: ignore
 
 from src.components import cost_plots, filter_objects, gen_content_obj
-from src.data import loader
+from src.data import catalogue, loader
 from src.tabs import general_tab
-from src.utils import IDS, page_text, schema
+from src.utils import IDS, figure_cache, page_text, schema, time_index
+
+PLOT_TYPES = ['Total charge (£)', 'Percentage of total bill (%)']
 
 
 def render() -> html.Div:
@@ -17,9 +19,8 @@ def render() -> html.Div:
   df = loader.load_invoice_cost_data(energy_type=schema.PageSchema.ELEC)
   meters = df[schema.InvoiceSchema.MPR].unique().tolist()
   years = df.index.year.unique()
-  plot_types = ['Total charge (£)', 'Percentage of total bill (%)']
 
-  fig = cost_plots.create_cost_lineplot(df, plot_types[0], target_id='All')
+  fig = cost_plots.create_cost_lineplot(df, PLOT_TYPES[0], target_id='All')
 
   top_plot = gen_content_obj.graph_obj(tab_title, fig)
 
@@ -27,7 +28,7 @@ def render() -> html.Div:
       filter_objects.box_options([
           filter_objects.create_sliders(tab_title, years, False),
           filter_objects.create_radioitem(tab_title=tab_title,
-                                          options=plot_types,
+                                          options=PLOT_TYPES,
                                           item_title='Plot value type',
                                           id_int=1)
       ]),
@@ -72,6 +73,7 @@ def render() -> html.Div:
     Input(IDS.COST + IDS.RADIOITEM + "1", 'value'),
     Input(IDS.COST + IDS.RANGESLIDER, 'value'),
 )
+@figure_cache.cached_figure(loader.data_version)
 def update_fig(energy_type: str, meter_id: str, value_type: str,
                selected_years: list[int]) -> go.Figure:
   """Updates the figure based on the selected filters.
@@ -89,7 +91,7 @@ def update_fig(energy_type: str, meter_id: str, value_type: str,
   if not selected_years:
     selected_years = [dataf.index.year.min(), dataf.index.year.max()]
   year_range = range(selected_years[0], selected_years[-1] + 1)
-  filtered_data = dataf[dataf.index.year.isin(year_range)]
+  filtered_data = time_index.select_years(dataf, year_range)
   fig = cost_plots.create_cost_lineplot(
       filtered_data, value_type,
       target_id=meter_id)  #   target_col).to_dict('records')
@@ -107,8 +109,7 @@ def update_dropdown(energy_type: str) -> tuple[list[dict[str, str]], str]:
 
   Returns:
       tuple[list[dict[str, str]], str]: The dropdown options and the default value."""
-  dataf = loader.load_invoice_cost_data(energy_type=energy_type)
-  meter_ids = dataf[schema.InvoiceSchema.MPR].unique().tolist()
+  meter_ids = catalogue.invoice_meters(energy_type)
   new_options = [{
       'label': meter_id,
       'value': meter_id
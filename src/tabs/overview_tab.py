@@ -3,29 +3,25 @@ from dash import Input, Output, Patch, State, callback, html  # type: ignore
 
 from src.components import (filter_objects, gen_content_obj, line_fig,
                             summary_plot)
-from src.data import loader
+from src.data import catalogue, loader
 from src.tabs import general_tab
 from src.utils import IDS, page_text, schema
 
 
 def render() -> html.Div:
-  """Renders the overview tab.
+  """Renders the overview tab. The monthly figure and table are left empty, \
+  to be filled in by the callbacks that fire when the tab is displayed.
 
   Returns:
       html.Div: Div containing the layout for the overview tab."""
-  target_col = 'All'
   utility = schema.PageSchema.ELEC
   tab_title = IDS.OVERVIEW
 
-  df = loader.load_hh_data(resample=None, utility=utility)
+  meter_ids = catalogue.hh_meters(utility) + [catalogue.ALL_METERS]
 
-  annual_consump_fig = line_fig.new_create_overview_lineplot(
-      df, target_col=target_col)
-  data_table = summary_plot.create_summary_table(
-      loader.load_hh_data(resample='1MS', utility=utility),
-      target_col=target_col,
-      table_units=str(annual_consump_fig.layout.yaxis.title.text))
-  fig = gen_content_obj.graph_obj(tab_title, annual_consump_fig)
+  data_table = pd.DataFrame(columns=[schema.PlotSchema.E_MWH] + schema.MONTHS)
+  fig = gen_content_obj.graph_obj(tab_title,
+                                  gen_content_obj.placeholder_figure())
   sankey = gen_content_obj.graph_obj(tab_title,
                                      summary_plot.overview_sankey(),
                                      id=1)
@@ -39,11 +35,10 @@ def render() -> html.Div:
               tab_title, [schema.PageSchema.ELEC, schema.PageSchema.GAS])
       ]),
       filter_objects.box_options([
-          filter_objects.create_dropdown(
-              tab_title=tab_title,
-              text=schema.PageSchema.METERID,
-              dropdown_options=df.columns[:-1].tolist(),
-              section_no=2)
+          filter_objects.create_dropdown(tab_title=tab_title,
+                                         text=schema.PageSchema.METERID,
+                                         dropdown_options=meter_ids,
+                                         section_no=2)
       ])
   ]
   section_1 = general_tab.generate_page(
@@ -125,9 +120,7 @@ def update_dropdown(energy_type: str) -> tuple[list[dict[str, str]], str]:
 
   Returns:
       tuple: Tuple containing the new options and the default value."""
-  dataf = loader.load_hh_data(resample='1MS', utility=energy_type)
-  meter_ids = dataf.columns.tolist()
-  meter_ids.remove('month_of_year')
+  meter_ids = catalogue.hh_meters(energy_type) + [catalogue.ALL_METERS]
   new_options = [{
       'label': meter_id,
       'value': meter_id
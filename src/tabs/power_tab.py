@@ -1,30 +1,42 @@
 from datetime import datetime
+from typing import Any, Callable, Optional
 
 import pandas as pd
 import plotly.graph_objects as go  # type: ignore
-from dash import Input, Output, State, callback, html  # type: ignore
+from dash import Input, Output, State, callback, dcc, html, no_update  # type: ignore
 
 # from dash_app import app
 from src.components import filter_objects, gen_content_obj, power_plots
-from src.data import loader
+from src.data import loader, session
 from src.tabs import general_tab
-from src.utils import IDS, page_text, schema
+from src.utils import IDS, background, figure_cache, page_text, schema
+
+
+def overview_data() -> pd.DataFrame:
+  """Returns the half hourly data of every meter over every year, which the \
+  power demand overview table and the filters of the tab are built from.
+
+  Returns:
+      pd.DataFrame: The half hourly data of the meters."""
+  new_dataf = session.resolve(session.create_handle(schema.PageSchema.ELEC))
+  return new_dataf.drop([schema.HHSchema.MONTH_OF_YEAR, 'All'], axis=1)
 
 
 def render() -> html.Div:
-  """Renders the power tab.
+  """Renders the power tab. The figures and the peak table are left empty, \
+  to be filled in by the callbacks that fire when the tab is displayed.
 
   Returns:
       html.Div: Div containing the layout for the power tab."""
   target_col: str = '98765'
   tab_title = IDS.POWER
 
-  new_dataf = loader.load_hh_data(resample=None)
-  test_df = new_dataf.drop([schema.HHSchema.MONTH_OF_YEAR, 'All'], axis=1)
+  dataset = session.create_handle(schema.PageSchema.ELEC, year_range=False)
+  test_df = overview_data()
 
   options = test_df.columns.tolist()
 
-  table_data = power_plots.create_high_demand_table(test_df,
+  table_data = power_plots.create_high_demand_table(test_df.iloc[:0],
                                                     target_col=target_col)
   table_data = table_data.rename(
       columns={
@@ -33,10 +45,8 @@ def render() -> html.Div:
       })
   load_curve = gen_content_obj.graph_obj(
       tab_title,
-      gen_content_obj.add_hline(power_plots.power_load_duration_curve(
-          test_df, target_col=target_col),
-                                y_val=power_plots.POWER_LIMS[target_col],
-                                name=schema.PageSchema.MAX_CAP))
+      power_plots.create_load_duration_figure(test_df.iloc[:0],
+                                              target_col=target_col))
   lower_table = gen_content_obj.table_obj(
       tab_title, power_plots.power_demand_overview(test_df))
   data_table = gen_content_obj.table_obj(tab_title,
@@ -44,12 +54,11 @@ def render() -> html.Div:
                                          id=1,
                                          colour=True)
 
-  peak_dates: list[datetime] = table_data.index.unique().tolist()
+  peak_dates: list[datetime] = []
   years: list[int] = test_df.index.year.unique()
 
   fig_2 = gen_content_obj.graph_obj(tab_title,
-                                    power_plots.create_power_lineplot(
-                                        peak_dates[0], target_col),
+                                    gen_content_obj.placeholder_figure(),
                                     id=1)
 
   filt_objs = [
@@ -81,7 +90,8 @@ def render() -> html.Div:
       section_text=page_text.tab_info(tab_title)[
           page_text.TabSchema.FIRST_PLOT_TEXT],
       filter_obj=filt_objs,
-      chart_table_1=load_curve,
+      chart_table_1=html.Div(
+          [gen_content_obj.progress_obj(tab_title), load_curve]),
       chart_table_2=lower_table)
   section_3 = general_tab.generate_page(
       section_title=page_text.tab_info(tab_title)[
@@ -103,27 +113,51 @@ def render() -> html.Div:
       section_2.render_section(),
       section_3.render_section(),
       section_4.render_section(),
+      dcc.Store(id=tab_title + IDS.DATASET, data=dataset),
   ])
 
 
-@callback(Output(IDS.POWER + IDS.TABLE + "1", 'rowData'),
-          Output(IDS.POWER + IDS.FIGURE + "0", 'figure'),
-          Input(IDS.POWER + IDS.DROPDOWN + "1", 'value'),
+@callback(Output(IDS.POWER + IDS.DATASET, 'data'),
           Input(IDS.POWER + IDS.RANGESLIDER, 'value'))
-def update_table_and_barplot(selected_id: str,
-                             selected_years: list[int]) -> tuple:
-  """Updates the figure and table based on the selected filters.
+def update_dataset(selected_years: list[int]) -> dict[str, Any]:
+  """Updates the dataset handle of the tab based on the selected years.
 
   Args:
-      selected_id (str): The selected meter ID.
       selected_years (list[int]): The selected years.
 
   Returns:
-      tuple: The table data and figure."""
-  dataf = loader.load_hh_data(resample=None)
-  if not selected_years:
-    selected_years = [dataf.index.year.min(), dataf.index.year.max()]
-  filtered_data: pd.DataFrame = dataf[dataf.index.year.isin(selected_years)]
+      dict[str, Any]: The dataset handle."""
+  dataset = session.create_handle(schema.PageSchema.ELEC,
+                                  years=selected_years,
+                                  year_range=False)
+  session.prepare(dataset)
+  return dataset
+
+
+@background.background_callback(
+    Output(IDS.POWER + IDS.TABLE + "1", 'rowData'),
+    Output(IDS.POWER + IDS.FIGURE + "0", 'figure'),
+    Input(IDS.POWER + IDS.DROPDOWN + "1", 'value'),
+    Input(IDS.POWER + IDS.DATASET, 'data'),
+    progress=background.progress_outputs(IDS.POWER) +
+    [Output(IDS.POWER + IDS.TABLE + "1", 'rowData')],
+    running=background.running_outputs(IDS.POWER,
+                                       'Finding the peak power demands'),
+    cancel=[Input(IDS.URL, 'pathname')])
+def update_table_and_barplot(set_progress: Callable, selected_id: str,
+                             dataset: dict[str, Any]) -> tuple:
+  """Updates the figure and table based on the selected filters. When run in \
+  the background, the table is sent with the progress, before the load \
+  duration curve is built.
+
+  Args:
+      set_progress (Callable): Updates the progress bar, status text and table.
+      selected_id (str): The selected meter ID.
+      dataset (dict[str, Any]): The dataset handle of the selected years.
+
+  Returns:
+      tuple: The table data and a patch of the load duration figure."""
+  filtered_data = session.resolve(dataset)
   table_data = power_plots.create_high_demand_table(filtered_data,
                                                     target_col=selected_id)
   table_data = table_data.rename(
@@ -131,16 +165,16 @@ def update_table_and_barplot(selected_id: str,
           selected_id: schema.PageSchema.POWER,
           schema.PageSchema.PERC_LIM: schema.PageSchema.PERCENT_LIM
       }).to_dict('records')
-  fig = gen_content_obj.add_hline(power_plots.power_load_duration_curve(
-      filtered_data, target_col=selected_id),
-                                  y_val=power_plots.POWER_LIMS[selected_id],
-                                  name=schema.PlotSchema.MAX_CAP)
-  return table_data, fig
+  set_progress((1, 2, 'Building the load duration curve', table_data))
+  patched_fig = power_plots.patch_load_duration_figure(filtered_data,
+                                                       target_col=selected_id)
+  return table_data, patched_fig
 
 
 @callback(Output(IDS.POWER + IDS.FIGURE + "1", 'figure'),
           Input(IDS.POWER + IDS.DROPDOWN + "2", 'value'),
           Input(IDS.POWER + IDS.DROPDOWN + "1", 'value'))
+@figure_cache.cached_figure(loader.data_version)
 def update_power_lineplot(selected_date: datetime,
                           selected_id: str) -> go.Figure:
   """Updates the figure based on the selected filters.
@@ -152,21 +186,47 @@ def update_power_lineplot(selected_date: datetime,
   Returns:
       go.Figure: Plotly figure object.
   """
+  if not selected_date or not selected_id:
+    return no_update
   return power_plots.create_power_lineplot(selected_date, selected_id)
 
 
+@callback(Output(IDS.POWER + IDS.FIGURE + "1", 'figure', allow_duplicate=True),
+          Input(IDS.POWER + IDS.FIGURE + "1", 'relayoutData'),
+          State(IDS.POWER + IDS.DROPDOWN + "2", 'value'),
+          State(IDS.POWER + IDS.DROPDOWN + "1", 'value'),
+          prevent_initial_call=True)
+def refine_power_lineplot(relayout_data: dict[str, Any],
+                          selected_date: datetime, selected_id: str) -> Any:
+  """Replaces the downsampled power line with the full resolution data of the zoomed range.
+
+  Args:
+      relayout_data (dict[str, Any]): The relayout data of the figure.
+      selected_date (datetime): The selected date.
+      selected_id (str): The selected meter ID.
+
+  Returns:
+      Any: A patch of the figure."""
+  if not selected_date or not selected_id:
+    return no_update
+  return gen_content_obj.refine_line_trace(
+      power_plots.power_window(selected_date, selected_id), relayout_data)
+
+
 @callback(Output(IDS.POWER + IDS.DROPDOWN + "2", 'options'),
           Output(IDS.POWER + IDS.DROPDOWN + "2", 'value'),
           Input(IDS.POWER + IDS.TABLE + "1", 'rowData'))
 def update_peak_dropdown_options(
-    table_data: pd.DataFrame) -> tuple[list[dict[str, str]], str]:
+    table_data: pd.DataFrame) -> tuple[list[dict[str, str]], Optional[str]]:
   """Updates the dropdown options based on the table data.
 
   Args:
       table_data (pd.DataFrame): The table data.
 
   Returns:
-      tuple[list[dict[str, str]], str]: The dropdown options and the default value."""
+      tuple[list[dict[str, str]], Optional[str]]: The dropdown options and the default value, None when the table is empty."""
+  if not table_data:
+    return [], None
   dataf = pd.DataFrame(table_data)
   peak_dates = dataf[schema.HHSchema.DATETIME].unique().tolist()
   dropdown_options = [{"label": date, "value": date} for date in peak_dates]
@@ -206,7 +266,6 @@ def selected_power_demand_info(
       str: The selected power demand information as a string."""
   if not table_data_selected:
     return "No selections"
-  print(table_data_selected)
   dff = pd.DataFrame(table_data_selected)
   return dff.to_string()
 
@@ -8,6 +8,10 @@ RANGESLIDER = '-tab-rangeslider-'
 RADIOITEM = '-gas-or-leccy'
 TABLE = '-data-table-'
 FIGURE = '-figure-'
+DATASET = '-dataset-store'
+PROGRESS = '-progress-'
+PROGRESS_BAR = '-progress-bar-'
+PROGRESS_TEXT = '-progress-text-'
 
 PAGE_CONTENT = 'page-content'
 URL = 'url'
@@ -0,0 +1,171 @@
+"""
+Background execution of the long running callbacks.
+
+The callbacks registered with background_callback run as Dash background
+callbacks on a local DiskcacheManager, which needs diskcache, multiprocess and
+psutil (pip install "dash[diskcache]", part of the project dependencies). They
+run in a separate process, so the server keeps answering other requests,
+report their progress to the page and are cancelled when their inputs change
+before they finish.
+
+Without these packages the app fails to start, unless the
+BACKGROUND_CALLBACKS_OPTIONAL environment variable is set to 1, in which case
+a warning is logged and the callbacks are registered as ordinary callbacks.
+
+The job results are kept in the directory named by the BACKGROUND_CACHE_DIR
+environment variable, which defaults to a folder in the temporary directory.
+"""
+import functools
+import logging
+import os
+import tempfile
+from typing import Any, Callable, Optional
+
+from dash import DiskcacheManager, Output, callback  # type: ignore
+
+from src.utils import IDS
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_CACHE_DIR_ENV = 'BACKGROUND_CACHE_DIR'
+BACKGROUND_CACHE_DIR = os.path.join(tempfile.gettempdir(),
+                                    'dashboard-plotter-callbacks')
+OPTIONAL_ENV = 'BACKGROUND_CALLBACKS_OPTIONAL'
+# Seconds the results of finished jobs are kept for.
+BACKGROUND_EXPIRE = 600
+
+
+def create_manager() -> Optional[DiskcacheManager]:
+  """
+  Creates the disk backed manager of the background callbacks. If its
+  dependencies are not installed, an ImportError is raised unless the
+  fallback to ordinary callbacks is allowed by OPTIONAL_ENV.
+
+  Returns:
+      Optional[DiskcacheManager]: The manager, or None when falling back.
+  """
+  try:
+    import diskcache  # type: ignore
+    directory = os.environ.get(BACKGROUND_CACHE_DIR_ENV, BACKGROUND_CACHE_DIR)
+    return DiskcacheManager(diskcache.Cache(directory),
+                            expire=BACKGROUND_EXPIRE)
+  except ImportError as error:
+    if os.environ.get(OPTIONAL_ENV) != '1':
+      raise ImportError(
+          'The background callbacks need diskcache, multiprocess and psutil '
+          '(pip install "dash[diskcache]"). Set '
+          f'{OPTIONAL_ENV}=1 to run them as ordinary callbacks instead.'
+      ) from error
+    logger.warning(
+        'Background callbacks are unavailable (%s), running them as ordinary '
+        'callbacks.', error)
+    return None
+
+
+MANAGER = create_manager()
+
+
+def available() -> bool:
+  """
+  Checks whether callbacks can run in the background.
+
+  Returns:
+      bool: True if the background callback manager was created.
+  """
+  return MANAGER is not None
+
+
+def ignore_progress(*progress: Any) -> None:
+  """Stands in for set_progress when a callback runs in the foreground."""
+
+
+def background_callback(*dependencies: Any,
+                        progress: Optional[list[Any]] = None,
+                        running: Optional[list[tuple[Any, Any, Any]]] = None,
+                        cancel: Optional[list[Any]] = None,
+                        **kwargs: Any) -> Callable:
+  """
+  Registers a callback that runs in the background when the manager is
+  available and as an ordinary callback otherwise. If progress outputs are
+  given, the callback receives a set_progress function as its first argument,
+  which updates them while the job runs and does nothing in the foreground.
+  As with dash.callback, the decorated function is returned unchanged.
+
+  Args:
+      *dependencies (Any): The Outputs, Inputs and States of the callback.
+      progress (Optional[list[Any]], optional): The Outputs updated by set_progress. Defaults to None.
+      running (Optional[list[tuple[Any, Any, Any]]], optional): The Outputs with their values while and after the job runs. Defaults to None.
+      cancel (Optional[list[Any]], optional): The Inputs that cancel the job. Defaults to None.
+      **kwargs (Any): Other keyword arguments of dash.callback.
+
+  Returns:
+      Callable: The decorator registering the callback.
+  """
+  if MANAGER is not None:
+    return callback(*dependencies,
+                    background=True,
+                    manager=MANAGER,
+                    progress=progress,
+                    running=running,
+                    cancel=cancel,
+                    **kwargs)
+
+  def decorator(func: Callable) -> Callable:
+    if progress is None:
+      return callback(*dependencies, **kwargs)(func)
+
+    @functools.wraps(func)
+    def foreground(*args: Any) -> Any:
+      return func(ignore_progress, *args)
+
+    callback(*dependencies, **kwargs)(foreground)
+    return func
+
+  return decorator
+
+
+def progress_outputs(tab_title: str, id: int = 0) -> list[Output]:
+  """
+  Returns the Outputs of the progress bar created by
+  gen_content_obj.progress_obj: its value, its maximum and the status text.
+
+  Args:
+      tab_title (str): The title of the tab used in the id generation.
+      id (int, optional): The id of the progress bar. Defaults to 0.
+
+  Returns:
+      list[Output]: The progress Outputs.
+  """
+  return [
+      Output(tab_title + IDS.PROGRESS_BAR + str(id), 'value'),
+      Output(tab_title + IDS.PROGRESS_BAR + str(id), 'max'),
+      Output(tab_title + IDS.PROGRESS_TEXT + str(id), 'children'),
+  ]
+
+
+def running_outputs(tab_title: str,
+                    status: str,
+                    id: int = 0) -> list[tuple[Output, Any, Any]]:
+  """
+  Returns the running Outputs showing the progress bar created by
+  gen_content_obj.progress_obj, with a status text, while a job runs.
+
+  Args:
+      tab_title (str): The title of the tab used in the id generation.
+      status (str): The status text shown when the job starts.
+      id (int, optional): The id of the progress bar. Defaults to 0.
+
+  Returns:
+      list[tuple[Output, Any, Any]]: The Outputs with their values while and after the job runs.
+  """
+  return [
+      (Output(tab_title + IDS.PROGRESS + str(id), 'style'), {
+          'display': 'block',
+          'text-align': 'center'
+      }, {
+          'display': 'none'
+      }),
+      (Output(tab_title + IDS.PROGRESS_BAR + str(id), 'value'), 0, 0),
+      (Output(tab_title + IDS.PROGRESS_TEXT + str(id),
+              'children'), status, ''),
+  ]
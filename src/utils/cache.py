@@ -0,0 +1,205 @@
+"""
+Bounded caches shared by the dashboard callbacks.
+
+LRUCache holds its values in the memory of one process. DiskCache keeps them in
+a directory instead, so every process that opens the same directory, such as
+the server workers and the background jobs, shares them. DiskCache needs the
+diskcache package, which is installed with dash[diskcache].
+"""
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+  import diskcache  # type: ignore
+except ImportError:
+  diskcache = None
+
+
+def sizeof(value: Any) -> int:
+  """
+  Estimates the memory held by a cached value in bytes.
+
+  Args:
+      value (Any): The cached value.
+
+  Returns:
+      int: The estimated size in bytes.
+  """
+  if isinstance(value, pd.DataFrame):
+    return int(value.memory_usage(deep=True).sum())
+  if isinstance(value, pd.Series):
+    return int(value.memory_usage(deep=True))
+  if isinstance(value, np.ndarray):
+    return value.nbytes
+  if isinstance(value, dict):
+    return sys.getsizeof(value) + sum(sizeof(item) for item in value.values())
+  if isinstance(value, (list, tuple)):
+    return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+  return sys.getsizeof(value)
+
+
+class LRUCache():
+  """
+  Thread safe least recently used cache bounded by its total size in bytes
+  and, optionally, by its number of entries.
+
+  Attributes:
+      max_bytes (int): The memory budget of the cache.
+      max_entries (Optional[int]): The maximum number of entries.
+
+  Methods:
+      get: Returns the value for a key, marking it as recently used.
+      put: Stores a value, evicting the least recently used entries to fit.
+      clear: Drops every entry.
+  """
+
+  def __init__(self,
+               max_bytes: int,
+               max_entries: Optional[int] = None,
+               size_func: Callable[[Any], int] = sizeof) -> None:
+    self.max_bytes = max_bytes
+    self.max_entries = max_entries
+    self._size_func = size_func
+    self._lock = threading.Lock()
+    self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+    self._nbytes = 0
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+  def __contains__(self, key: Hashable) -> bool:
+    return key in self._entries
+
+  @property
+  def nbytes(self) -> int:
+    """The estimated size of the cached values in bytes."""
+    return self._nbytes
+
+  def get(self, key: Hashable, default: Any = None) -> Any:
+    """
+    Returns the value stored under the key.
+
+    Args:
+        key (Hashable): The key of the value.
+        default (Any, optional): Returned when the key is not cached. Defaults to None.
+
+    Returns:
+        Any: The cached value or the default.
+    """
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        return default
+      self._entries.move_to_end(key)
+      return entry[0]
+
+  def put(self, key: Hashable, value: Any) -> None:
+    """
+    Stores the value under the key. Values larger than the whole budget are
+    not cached.
+
+    Args:
+        key (Hashable): The key of the value.
+        value (Any): The value to cache.
+    """
+    size = self._size_func(value)
+    if size > self.max_bytes:
+      return
+    with self._lock:
+      if key in self._entries:
+        self._nbytes -= self._entries.pop(key)[1]
+      self._entries[key] = (value, size)
+      self._nbytes += size
+      while (self._nbytes > self.max_bytes
+             or (self.max_entries is not None
+                 and len(self._entries) > self.max_entries)):
+        _, (_, evicted_size) = self._entries.popitem(last=False)
+        self._nbytes -= evicted_size
+
+  def clear(self) -> None:
+    """Drops every entry."""
+    with self._lock:
+      self._entries.clear()
+      self._nbytes = 0
+
+
+class DiskCache():
+  """
+  Least recently used cache stored in a directory and bounded by its total
+  size in bytes. Values are pickled, and every process opening the same
+  directory sees the values stored by the others.
+
+  Attributes:
+      directory (Path): The directory holding the values.
+      max_bytes (int): The disk budget of the cache.
+
+  Methods:
+      get: Returns the value for a key, marking it as recently used.
+      put: Stores a value, evicting the least recently used entries to fit.
+      clear: Drops every entry.
+  """
+
+  def __init__(self, directory: Path, max_bytes: int) -> None:
+    if diskcache is None:
+      raise ImportError('DiskCache requires the diskcache package')
+    self.directory = Path(directory)
+    self.max_bytes = max_bytes
+    self._cache = diskcache.Cache(str(self.directory),
+                                  size_limit=max_bytes,
+                                  eviction_policy='least-recently-used')
+
+  def __len__(self) -> int:
+    return len(self._cache)
+
+  def __contains__(self, key: Hashable) -> bool:
+    return key in self._cache
+
+  def get(self, key: Hashable, default: Any = None) -> Any:
+    """
+    Returns the value stored under the key.
+
+    Args:
+        key (Hashable): The key of the value.
+        default (Any, optional): Returned when the key is not cached. Defaults to None.
+
+    Returns:
+        Any: The cached value or the default.
+    """
+    return self._cache.get(key, default)
+
+  def put(self, key: Hashable, value: Any) -> None:
+    """
+    Stores the value under the key.
+
+    Args:
+        key (Hashable): The key of the value.
+        value (Any): The value to cache.
+    """
+    self._cache.set(key, value)
+
+  def clear(self) -> None:
+    """Drops every entry."""
+    self._cache.clear()
+
+
+def create_shared_cache(directory: Path,
+                        max_bytes: int) -> Union[DiskCache, LRUCache]:
+  """
+  Creates a cache shared by the processes of the dashboard.
+
+  Args:
+      directory (Path): The directory holding the values.
+      max_bytes (int): The budget of the cache in bytes.
+
+  Returns:
+      Union[DiskCache, LRUCache]: A DiskCache in the directory, or an LRUCache of this process if diskcache is not installed.
+  """
+  if diskcache is None:
+    return LRUCache(max_bytes)
+  return DiskCache(directory, max_bytes)
@@ -0,0 +1,196 @@
+"""
+Cache of the serialized figures returned by deterministic callbacks.
+
+Figures are keyed by the callback name, its normalized inputs and the version
+of the data they were built from, and are stored as plotly JSON. A hit returns
+the stored JSON without running the callback, skipping both the pandas work
+and the plotly validation of the figure.
+
+Figures are held in memory by default. Setting the FIGURE_CACHE_DIR
+environment variable stores them as files in that directory instead, so
+several server workers share their hits.
+"""
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional, Protocol
+
+import plotly.graph_objects as go  # type: ignore
+import plotly.io as pio  # type: ignore
+
+from src.utils import cache
+
+FIGURE_CACHE_BYTES = 32 * 1024 * 1024
+FIGURE_CACHE_FILES = 512
+FIGURE_CACHE_DIR_ENV = 'FIGURE_CACHE_DIR'
+
+
+class Backend(Protocol):
+  """
+  Backend Protocol for type hinting.
+    """
+
+  def get(self, key: str) -> Optional[str]:
+    ...
+
+  def put(self, key: str, figure_json: str) -> None:
+    ...
+
+  def clear(self) -> None:
+    ...
+
+
+class MemoryBackend():
+  """
+  Stores the figures in a size bounded in-memory LRU cache of one process.
+
+  Methods:
+      get: Returns the figure JSON stored under a key.
+      put: Stores the figure JSON under a key.
+      clear: Drops every figure.
+  """
+
+  def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES) -> None:
+    self._cache = cache.LRUCache(max_bytes, size_func=len)
+
+  def get(self, key: str) -> Optional[str]:
+    return self._cache.get(key)
+
+  def put(self, key: str, figure_json: str) -> None:
+    self._cache.put(key, figure_json)
+
+  def clear(self) -> None:
+    self._cache.clear()
+
+
+class FileSystemBackend():
+  """
+  Stores the figures as JSON files in a directory shared by the server
+  workers. Once the directory holds more than max_files figures, the least
+  recently written ones are removed.
+
+  Attributes:
+      directory (Path): The directory holding the figures.
+      max_files (int): The maximum number of stored figures.
+
+  Methods:
+      get: Returns the figure JSON stored under a key.
+      put: Stores the figure JSON under a key.
+      clear: Drops every figure.
+  """
+
+  def __init__(self,
+               directory: Path,
+               max_files: int = FIGURE_CACHE_FILES) -> None:
+    self.directory = Path(directory)
+    self.max_files = max_files
+    self.directory.mkdir(parents=True, exist_ok=True)
+
+  def _path(self, key: str) -> Path:
+    return self.directory / f'{key}.json'
+
+  def get(self, key: str) -> Optional[str]:
+    try:
+      return self._path(key).read_text(encoding='utf-8')
+    except OSError:
+      return None
+
+  def put(self, key: str, figure_json: str) -> None:
+    path = self._path(key)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+      tmp_path.write_text(figure_json, encoding='utf-8')
+      os.replace(tmp_path, path)
+    except OSError:
+      tmp_path.unlink(missing_ok=True)
+      return
+    self._prune()
+
+  def _prune(self) -> None:
+    files = list(self.directory.glob('*.json'))
+    if len(files) <= self.max_files:
+      return
+    mtimes = {}
+    for file in files:
+      try:
+        mtimes[file] = file.stat().st_mtime_ns
+      except OSError:
+        pass
+    for file in sorted(mtimes, key=mtimes.get)[:len(mtimes) - self.max_files]:
+      file.unlink(missing_ok=True)
+
+  def clear(self) -> None:
+    for file in self.directory.glob('*.json'):
+      file.unlink(missing_ok=True)
+
+
+def create_backend() -> Backend:
+  """
+  Creates the backend selected by the FIGURE_CACHE_DIR environment variable.
+
+  Returns:
+      Backend: A FileSystemBackend if FIGURE_CACHE_DIR is set, otherwise a MemoryBackend.
+  """
+  directory = os.environ.get(FIGURE_CACHE_DIR_ENV)
+  if directory:
+    return FileSystemBackend(Path(directory))
+  return MemoryBackend()
+
+
+FIGURE_CACHE = create_backend()
+
+
+def cache_key(name: str, inputs: Any, version: str) -> str:
+  """
+  Builds the cache key of a callback call.
+
+  Args:
+      name (str): The name of the callback.
+      inputs (Any): The inputs of the callback.
+      version (str): The version of the data.
+
+  Returns:
+      str: The hex digest of the normalized name, inputs and version.
+  """
+  normalized = json.dumps([name, inputs, version],
+                          sort_keys=True,
+                          separators=(',', ':'),
+                          default=str)
+  return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def cached_figure(version: Callable[[], str],
+                  backend: Optional[Backend] = None) -> Callable:
+  """
+  Decorates a callback returning a figure so that its serialized figure is
+  cached. Apply it below the dash callback decorator. Return values that are
+  not figures, such as no_update, are passed through without being cached.
+
+  Args:
+      version (Callable[[], str]): Returns the version of the data the figure is built from.
+      backend (Optional[Backend], optional): The figure store. Defaults to FIGURE_CACHE.
+
+  Returns:
+      Callable: The decorator.
+  """
+
+  def decorator(func: Callable) -> Callable:
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+      store = backend if backend is not None else FIGURE_CACHE
+      key = cache_key(name, [args, kwargs], version())
+      figure_json = store.get(key)
+      if figure_json is not None:
+        return json.loads(figure_json)
+      fig = func(*args, **kwargs)
+      if isinstance(fig, go.Figure):
+        store.put(key, pio.to_json(fig, validate=False))
+      return fig
+
+    return wrapper
+
+  return decorator
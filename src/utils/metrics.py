@@ -0,0 +1,500 @@
+"""
+Latency, payload and memory instrumentation of the dash callbacks.
+
+Every registered callback is wrapped so that each call is measured: its wall
+time, the time spent loading data (the functions decorated with
+timed(LOADER)), the time spent outside the loader building and serializing
+the tables and figures, the size of the response and, when tracemalloc is
+enabled, the peak memory traced during the call. The calls are attributed to
+their callback rather than to the HTTP request: the background callbacks are
+measured in the job running them, not in the requests starting and polling
+the job, and their payload is not measured. Each call is logged as one JSON
+line and the totals are served as Prometheus text on the /metrics route,
+which only answers requests from the local machine.
+
+The totals are kept per server process, so under gunicorn each worker serves
+its own totals on /metrics, for the requests it handled. The background jobs
+run in their own processes and queue their measurements in the cache of their
+manager, which the worker serving /metrics adds to its totals.
+
+Tracing the memory slows the callbacks down, so the peak memory is only
+measured when the CALLBACK_METRICS_MEMORY environment variable is set to 1,
+and reported as 0 otherwise. The traced peak is process wide, so calls
+running at the same time in a process share it.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import flask
+from dash import Dash, DiskcacheManager  # type: ignore
+from dash._callback import GLOBAL_CALLBACK_MAP  # type: ignore
+from dash.exceptions import PreventUpdate  # type: ignore
+from dash.long_callback.managers import BaseLongCallbackManager  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+LOADER = 'loader'
+METRICS_ROUTE = '/metrics'
+CALLBACK_ROUTE = '_dash-update-component'
+MEMORY_ENV = 'CALLBACK_METRICS_MEMORY'
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Prefix and lifetime in seconds of the measurements the background jobs
+# queue in the cache of their manager.
+JOB_METRICS_PREFIX = 'callback-metrics'
+JOB_EXPIRE = 3600
+
+# Attributes marking the measured callbacks with the function they wrap and
+# the totals they are added to.
+_ORIGINAL = '_metrics_original'
+_METRICS = '_metrics_totals'
+
+_JOB_MANAGERS: set[Any] = set()
+
+_phases: contextvars.ContextVar[Optional[dict[str, float]]] = (
+    contextvars.ContextVar('callback_phases', default=None))
+
+
+@dataclass
+class CallbackStats:
+  """The totals of the calls of one callback."""
+  calls: int = 0
+  errors: int = 0
+  duration: float = 0.0
+  loader: float = 0.0
+  figure: float = 0.0
+  payload_bytes: int = 0
+  max_payload_bytes: int = 0
+  max_peak_memory_bytes: int = 0
+  buckets: list[int] = field(
+      default_factory=lambda: [0] * len(DURATION_BUCKETS))
+
+
+class CallbackMetrics():
+  """
+  Thread safe totals of the callback calls, keyed by callback name.
+
+  Methods:
+      record: Adds a call to the totals of its callback.
+      snapshot: Returns a copy of the totals.
+      to_prometheus: Formats the totals as Prometheus text.
+      clear: Drops every total.
+  """
+
+  def __init__(self) -> None:
+    self._lock = threading.Lock()
+    self._stats: dict[str, CallbackStats] = {}
+
+  def record(self, name: str, duration: float, loader: float,
+             payload_bytes: Optional[int], peak_memory_bytes: Optional[int],
+             error: bool) -> None:
+    """
+    Adds a call to the totals of its callback.
+
+    Args:
+        name (str): The name of the callback.
+        duration (float): The wall time of the call in seconds.
+        loader (float): The time spent loading data in seconds.
+        payload_bytes (Optional[int]): The size of the response in bytes, or None if not measured.
+        peak_memory_bytes (Optional[int]): The traced peak memory, or None if not traced.
+        error (bool): Whether the call failed.
+    """
+    with self._lock:
+      stats = self._stats.setdefault(name, CallbackStats())
+      stats.calls += 1
+      stats.errors += int(error)
+      stats.duration += duration
+      stats.loader += loader
+      stats.figure += max(duration - loader, 0.0)
+      if payload_bytes is not None:
+        stats.payload_bytes += payload_bytes
+        stats.max_payload_bytes = max(stats.max_payload_bytes, payload_bytes)
+      if peak_memory_bytes is not None:
+        stats.max_peak_memory_bytes = max(stats.max_peak_memory_bytes,
+                                          peak_memory_bytes)
+      for position, bound in enumerate(DURATION_BUCKETS):
+        if duration <= bound:
+          stats.buckets[position] += 1
+
+  def snapshot(self) -> dict[str, CallbackStats]:
+    """
+    Returns a copy of the totals.
+
+    Returns:
+        dict[str, CallbackStats]: The totals keyed by callback name.
+    """
+    with self._lock:
+      return {
+          name: CallbackStats(**{
+              **vars(stats), 'buckets': list(stats.buckets)
+          })
+          for name, stats in self._stats.items()
+      }
+
+  def to_prometheus(self) -> str:
+    """
+    Formats the totals as Prometheus text.
+
+    Returns:
+        str: The metrics in the Prometheus text exposition format.
+    """
+    stats = self.snapshot()
+    lines = []
+
+    def add(metric: str, kind: str, description: str,
+            values: list[tuple[str, Any]]) -> None:
+      lines.append(f'# HELP {metric} {description}')
+      lines.append(f'# TYPE {metric} {kind}')
+      lines.extend(f'{metric}{labels} {value}' for labels, value in values)
+
+    def label(name: str, **extra: str) -> str:
+      pairs = {'callback': name, **extra}
+      escaped = {
+          key: str(value).replace('\\', '\\\\').replace('"', '\\"')
+          for key, value in pairs.items()
+      }
+      return '{' + ','.join(f'{key}="{value}"'
+                            for key, value in escaped.items()) + '}'
+
+    lines.append('# HELP dash_callback_duration_seconds '
+                 'Wall time of the callback calls.')
+    lines.append('# TYPE dash_callback_duration_seconds histogram')
+    for name, item in stats.items():
+      for bound, count in zip(DURATION_BUCKETS, item.buckets):
+        lines.append(f'dash_callback_duration_seconds_bucket'
+                     f'{label(name, le=str(bound))} {count}')
+      lines.append(f'dash_callback_duration_seconds_bucket'
+                   f'{label(name, le="+Inf")} {item.calls}')
+      lines.append(
+          f'dash_callback_duration_seconds_sum{label(name)} {item.duration}')
+      lines.append(
+          f'dash_callback_duration_seconds_count{label(name)} {item.calls}')
+    add('dash_callback_errors_total', 'counter', 'Failed callback calls.',
+        [(label(name), item.errors) for name, item in stats.items()])
+    add('dash_callback_loader_seconds_total', 'counter',
+        'Time the callback calls spent loading data.',
+        [(label(name), item.loader) for name, item in stats.items()])
+    add('dash_callback_figure_seconds_total', 'counter',
+        'Time the callback calls spent building and serializing the output.',
+        [(label(name), item.figure) for name, item in stats.items()])
+    add('dash_callback_payload_bytes_total', 'counter',
+        'Size of the callback responses.',
+        [(label(name), item.payload_bytes) for name, item in stats.items()])
+    add('dash_callback_payload_bytes_max', 'gauge',
+        'Largest callback response.', [(label(name), item.max_payload_bytes)
+                                       for name, item in stats.items()])
+    add('dash_callback_peak_memory_bytes_max', 'gauge',
+        'Largest traced peak memory of a callback call.',
+        [(label(name), item.max_peak_memory_bytes)
+         for name, item in stats.items()])
+    return '\n'.join(lines) + '\n'
+
+  def clear(self) -> None:
+    """Drops every total."""
+    with self._lock:
+      self._stats.clear()
+
+
+CALLBACK_METRICS = CallbackMetrics()
+
+
+def timed(phase: str) -> Callable:
+  """
+  Decorates a function so that its run time is added to a phase of the
+  callback call it runs in. Nested calls of the same phase are only counted
+  once. Outside a callback call the function runs unchanged.
+
+  Args:
+      phase (str): The phase the run time is added to.
+
+  Returns:
+      Callable: The decorator.
+  """
+
+  def decorator(func: Callable) -> Callable:
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+      phases = _phases.get()
+      depth_key = f'{phase}_depth'
+      if phases is None or phases.get(depth_key):
+        return func(*args, **kwargs)
+      phases[depth_key] = 1
+      start = time.perf_counter()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+        phases[depth_key] = 0
+
+    return wrapper
+
+  return decorator
+
+
+def memory_tracing() -> bool:
+  """
+  Checks whether the peak memory of the callback calls is traced.
+
+  Returns:
+      bool: True if CALLBACK_METRICS_MEMORY is set to 1.
+  """
+  return os.environ.get(MEMORY_ENV) == '1'
+
+
+def callback_name(app: Dash, body: Optional[dict[str, Any]]) -> str:
+  """
+  Returns the name of the callback a request is for.
+
+  Args:
+      app (Dash): The app.
+      body (Optional[dict[str, Any]]): The JSON body of the request.
+
+  Returns:
+      str: The module and name of the callback function, or its output when it is not found.
+  """
+  output = (body or {}).get('output', 'unknown')
+  return entry_name(output, app.callback_map.get(output, {}))
+
+
+def entry_name(callback_id: str, entry: dict[str, Any]) -> str:
+  """
+  Returns the name of a registered callback.
+
+  Args:
+      callback_id (str): The id of the callback, made of its outputs.
+      entry (dict[str, Any]): The entry of the callback in the callback map.
+
+  Returns:
+      str: The module and name of the callback function, or its id when it has none.
+  """
+  func = entry.get('callback')
+  if func is None:
+    return callback_id
+  return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+
+def measure(
+    name: str,
+    func: Callable,
+    report: Callable[[dict[str, Any]], None],
+    payload: Optional[Callable[[Any], Optional[int]]] = None) -> Callable:
+  """
+  Wraps a callback so that each call is measured, logged and reported.
+
+  Args:
+      name (str): The name the calls are recorded under.
+      func (Callable): The callback.
+      report (Callable[[dict[str, Any]], None]): Receives the measurements of each call.
+      payload (Optional[Callable[[Any], Optional[int]]], optional): Returns the size of the response of a result. Defaults to None (not measured).
+
+  Returns:
+      Callable: The measured callback.
+  """
+
+  @functools.wraps(func)
+  def measured(*args: Any, **kwargs: Any) -> Any:
+    phases: dict[str, float] = {}
+    token = _phases.set(phases)
+    memory_start = None
+    if memory_tracing():
+      if not tracemalloc.is_tracing():
+        tracemalloc.start()
+      tracemalloc.reset_peak()
+      memory_start = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = None
+    error = True
+    try:
+      result = func(*args, **kwargs)
+      error = False
+      return result
+    except PreventUpdate:
+      error = False
+      raise
+    finally:
+      duration = time.perf_counter() - start
+      _phases.reset(token)
+      peak_memory = None
+      if memory_start is not None and tracemalloc.is_tracing():
+        peak_memory = max(tracemalloc.get_traced_memory()[1] - memory_start, 0)
+      payload_bytes = None
+      if payload is not None and not error:
+        payload_bytes = payload(result)
+      call = {
+          'callback': name,
+          'duration': duration,
+          'loader': phases.get(LOADER, 0.0),
+          'payload_bytes': payload_bytes,
+          'peak_memory_bytes': peak_memory,
+          'error': error,
+      }
+      log_call(call)
+      report(call)
+
+  measured.__dict__[_ORIGINAL] = func
+  return measured
+
+
+def log_call(call: dict[str, Any]) -> None:
+  """
+  Logs the measurements of a callback call as one JSON line.
+
+  Args:
+      call (dict[str, Any]): The measurements passed to the report of measure.
+  """
+  logger.info(
+      json.dumps({
+          'event':
+          'callback',
+          'callback':
+          call['callback'],
+          'error':
+          call['error'],
+          'duration_ms':
+          round(call['duration'] * 1000, 2),
+          'loader_ms':
+          round(call['loader'] * 1000, 2),
+          'figure_ms':
+          round(max(call['duration'] - call['loader'], 0.0) * 1000, 2),
+          'payload_bytes':
+          call['payload_bytes'],
+          'peak_memory_bytes':
+          call['peak_memory_bytes'],
+      }))
+
+
+def record_call(metrics: CallbackMetrics, call: dict[str, Any]) -> None:
+  """
+  Adds the measurements of a callback call to the totals.
+
+  Args:
+      metrics (CallbackMetrics): The totals.
+      call (dict[str, Any]): The measurements passed to the report of measure.
+  """
+  metrics.record(call['callback'], call['duration'], call['loader'],
+                 call['payload_bytes'], call['peak_memory_bytes'],
+                 call['error'])
+
+
+def _original(func: Callable) -> Callable:
+  return getattr(func, _ORIGINAL, func)
+
+
+def _response_bytes(response: Any) -> Optional[int]:
+  if isinstance(response, (str, bytes)):
+    return len(response)
+  return None
+
+
+def _queue_job_call(manager: Any) -> Callable[[dict[str, Any]], None]:
+
+  def report(call: dict[str, Any]) -> None:
+    manager.handle.push(call, prefix=JOB_METRICS_PREFIX, expire=JOB_EXPIRE)
+
+  return report
+
+
+def _instrument_job(callback_id: str, entry: dict[str, Any],
+                    manager: Any) -> None:
+  # Dash keys the job functions by the source of the callback function and
+  # the callback id.
+  func = _original(entry['callback']).__wrapped__
+  key = BaseLongCallbackManager.hash_function(func, callback_id)
+  job = manager.func_registry.get(key)
+  if job is None or _ORIGINAL in job.__dict__:
+    return
+  measured = measure(entry_name(callback_id, entry), func,
+                     _queue_job_call(manager))
+  progress = entry['long'].get('progress') is not None
+  job = manager.make_job_fn(measured, progress, key)
+  job.__dict__[_ORIGINAL] = func
+  manager.func_registry[key] = job
+
+
+def instrument_callbacks(app: Dash, metrics: CallbackMetrics) -> None:
+  """
+  Measures the registered callbacks of an app that are not measured yet, both
+  those registered with app.callback and those with dash.callback that the
+  app has not copied yet. The jobs of the background callbacks are measured
+  where they run, and the requests starting and polling them are not.
+
+  Args:
+      app (Dash): The app.
+      metrics (CallbackMetrics): The totals the calls are added to.
+  """
+
+  for callback_map in (app.callback_map, GLOBAL_CALLBACK_MAP):
+    for callback_id, entry in list(callback_map.items()):
+      func = entry.get('callback')
+      if func is None:
+        continue
+      long = entry.get('long')
+      if long:
+        manager = (entry.get('manager') or long.get('manager')
+                   or getattr(app, '_background_manager', None))
+        if isinstance(manager, DiskcacheManager):
+          _instrument_job(callback_id, entry, manager)
+          _JOB_MANAGERS.add(manager)
+        continue
+      if _ORIGINAL in func.__dict__ and func.__dict__.get(_METRICS) is metrics:
+        continue
+      measured = measure(entry_name(callback_id, entry), _original(func),
+                         functools.partial(record_call, metrics),
+                         _response_bytes)
+      measured.__dict__[_METRICS] = metrics
+      entry['callback'] = measured
+
+
+def collect_jobs(metrics: CallbackMetrics) -> None:
+  """
+  Adds the calls of the background jobs, which run in other processes and
+  queue their measurements in the cache of their manager, to the totals.
+
+  Args:
+      metrics (CallbackMetrics): The totals the calls are added to.
+  """
+  for manager in list(_JOB_MANAGERS):
+    while True:
+      key, call = manager.handle.pull(prefix=JOB_METRICS_PREFIX)
+      if key is None:
+        break
+      record_call(metrics, call)
+
+
+def instrument(app: Dash, metrics: CallbackMetrics = CALLBACK_METRICS) -> None:
+  """
+  Measures every callback of an app and adds the /metrics route. Call it
+  after the authentication is set up, so that /metrics is served without a
+  login to the local machine only. Callbacks registered later, such as the
+  cancel callbacks Dash adds on the first request, are measured from their
+  first call.
+
+  Args:
+      app (Dash): The app to instrument.
+      metrics (CallbackMetrics, optional): The totals the calls are added to. Defaults to CALLBACK_METRICS.
+  """
+  server = app.server
+  callback_path = app.config.routes_pathname_prefix + CALLBACK_ROUTE
+  instrument_callbacks(app, metrics)
+
+  @server.before_request
+  def instrument_new_callbacks() -> None:
+    if flask.request.path == callback_path:
+      instrument_callbacks(app, metrics)
+
+  @server.route(METRICS_ROUTE)
+  def callback_metrics() -> flask.Response:
+    if flask.request.remote_addr not in LOCAL_ADDRESSES:
+      flask.abort(404)
+    collect_jobs(metrics)
+    return flask.Response(metrics.to_prometheus(),
+                          mimetype='text/plain; version=0.0.4')
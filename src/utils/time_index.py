@@ -0,0 +1,181 @@
+"""
+Positional date filters on sorted time indexes.
+
+Filtering with a boolean mask such as (data.index >= start) & (data.index <=
+end), or data.index.year.isin(years), compares every timestamp of the index.
+The half hourly data is sorted on a regular 30 minute grid, so the row of a
+timestamp is found by arithmetic from the first timestamp and the step. The
+row is checked against its neighbours, and where the data has gaps it is
+found by a binary search instead. Date ranges and year sets are resolved to
+row slices and the data is sliced with iloc, which returns views for a single
+slice. Data with an unsorted index, like the invoices, is filtered with masks.
+"""
+from typing import Any, Iterable, TypeVar
+
+import numpy as np
+import pandas as pd
+
+HALF_HOUR = np.timedelta64(30, 'm')
+
+Data = TypeVar('Data', pd.DataFrame, pd.Series)
+
+
+def grid_position(offset: Any,
+                  step: np.timedelta64 = HALF_HOUR,
+                  side: str = 'left') -> int:
+  """
+  Returns the position on a regular grid a timestamp would be inserted at,
+  from its offset to the start of the grid.
+
+  Args:
+      offset (Any): The timestamp minus the start of the grid, as a timedelta.
+      step (np.timedelta64, optional): The grid step. Defaults to HALF_HOUR.
+      side (str, optional): 'left' for the first grid position at or after the timestamp, 'right' for the first position after it. Defaults to 'left'.
+
+  Returns:
+      int: The grid position, negative for timestamps before the start.
+  """
+  if side == 'left':
+    return int(-(-offset // step))
+  return int(offset // step + 1)
+
+
+def _is_position(index: pd.DatetimeIndex, timestamp: pd.Timestamp, row: int,
+                 side: str) -> bool:
+  before = index[row - 1] if row > 0 else None
+  after = index[row] if row < len(index) else None
+  if side == 'left':
+    return ((before is None or before < timestamp)
+            and (after is None or after >= timestamp))
+  return ((before is None or before <= timestamp)
+          and (after is None or after > timestamp))
+
+
+def position(index: pd.DatetimeIndex,
+             timestamp: Any,
+             side: str = 'left',
+             step: np.timedelta64 = HALF_HOUR) -> int:
+  """
+  Returns the row a timestamp would be inserted at in a sorted index, as
+  index.searchsorted does. The row is computed from the first timestamp and
+  the step, and searched for only when the index has gaps before it.
+
+  Args:
+      index (pd.DatetimeIndex): The sorted index.
+      timestamp (Any): The timestamp.
+      side (str, optional): 'left' for the first row at or after the timestamp, 'right' for the first row after it. Defaults to 'left'.
+      step (np.timedelta64, optional): The step of the index. Defaults to HALF_HOUR.
+
+  Returns:
+      int: The row.
+  """
+  timestamp = pd.Timestamp(timestamp)
+  if len(index) == 0:
+    return 0
+  row = grid_position(timestamp - index[0], step, side)
+  row = min(max(row, 0), len(index))
+  if _is_position(index, timestamp, row, side):
+    return row
+  return int(index.searchsorted(timestamp, side=side))
+
+
+def range_bounds(index: pd.DatetimeIndex,
+                 start: Any = None,
+                 end: Any = None,
+                 step: np.timedelta64 = HALF_HOUR) -> slice:
+  """
+  Returns the rows of a sorted index from start to end, both included.
+
+  Args:
+      index (pd.DatetimeIndex): The sorted index.
+      start (Any, optional): The first timestamp to keep. Defaults to the first row.
+      end (Any, optional): The last timestamp to keep. Defaults to the last row.
+      step (np.timedelta64, optional): The step of the index. Defaults to HALF_HOUR.
+
+  Returns:
+      slice: The positional slice of the rows.
+  """
+  first = 0 if start is None else position(index, start, 'left', step)
+  last = len(index) if end is None else position(index, end, 'right', step)
+  return slice(first, max(first, last))
+
+
+def year_bounds(index: pd.DatetimeIndex,
+                years: Iterable[int],
+                step: np.timedelta64 = HALF_HOUR) -> list[slice]:
+  """
+  Returns the rows of a sorted index that fall in a set of years, as one
+  slice per run of consecutive years.
+
+  Args:
+      index (pd.DatetimeIndex): The sorted index.
+      years (Iterable[int]): The years.
+      step (np.timedelta64, optional): The step of the index. Defaults to HALF_HOUR.
+
+  Returns:
+      list[slice]: The positional slices of the rows, without empty slices.
+  """
+  runs: list[list[int]] = []
+  for year in sorted({int(year) for year in years}):
+    if runs and runs[-1][1] == year - 1:
+      runs[-1][1] = year
+    else:
+      runs.append([year, year])
+  bounds = []
+  for first_year, last_year in runs:
+    first = position(index, pd.Timestamp(first_year, 1, 1), 'left', step)
+    last = position(index, pd.Timestamp(last_year + 1, 1, 1), 'left', step)
+    if last > first:
+      bounds.append(slice(first, last))
+  return bounds
+
+
+def between(data: Data,
+            start: Any = None,
+            end: Any = None,
+            step: np.timedelta64 = HALF_HOUR) -> Data:
+  """
+  Selects the rows from start to end, both included.
+
+  Args:
+      data (Data): The frame or series, with a DatetimeIndex.
+      start (Any, optional): The first timestamp to keep. Defaults to the first row.
+      end (Any, optional): The last timestamp to keep. Defaults to the last row.
+      step (np.timedelta64, optional): The step of the index. Defaults to HALF_HOUR.
+
+  Returns:
+      Data: The selected rows, a view when the index is sorted.
+  """
+  if not data.index.is_monotonic_increasing:
+    mask = np.ones(len(data), dtype=bool)
+    if start is not None:
+      mask &= data.index >= pd.Timestamp(start)
+    if end is not None:
+      mask &= data.index <= pd.Timestamp(end)
+    return data[mask]
+  return data.iloc[range_bounds(data.index, start, end, step)]
+
+
+def select_years(data: Data,
+                 years: Iterable[int],
+                 step: np.timedelta64 = HALF_HOUR) -> Data:
+  """
+  Selects the rows that fall in a set of years.
+
+  Args:
+      data (Data): The frame or series, with a DatetimeIndex.
+      years (Iterable[int]): The years.
+      step (np.timedelta64, optional): The step of the index. Defaults to HALF_HOUR.
+
+  Returns:
+      Data: The selected rows, a view when the index is sorted and the years are consecutive.
+  """
+  if not data.index.is_monotonic_increasing:
+    return data[data.index.year.isin(list(years))]
+  bounds = year_bounds(data.index, years, step)
+  if not bounds:
+    return data.iloc[:0]
+  if len(bounds) == 1:
+    return data.iloc[bounds[0]]
+  return data.iloc[np.concatenate(
+      [np.arange(bound.start, bound.stop) for bound in bounds])]
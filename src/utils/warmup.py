@@ -0,0 +1,151 @@
+"""
+Warmup of the data and figure caches before the first request.
+
+The warmup parses the half hourly and invoice data of every utility, and fills
+the caches the tabs read from with their default inputs: the meter catalogue,
+the shared tab datasets, the consumption baselines and the cached line plots.
+The tables and bar plots are not cached, so they are only computed where they
+give the default inputs of a cached figure. Rendering the tabs initialises
+plotly. READY is set once the warmup has finished, whether or not every step
+succeeded.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from plotly.io.json import to_json_plotly  # type: ignore
+
+from src.components import consumption_plots, power_plots
+from src.data import catalogue, loader, session
+from src.tabs import consumption_tab, cost_tab, overview_tab, power_tab
+from src.utils import schema
+
+logger = logging.getLogger(__name__)
+
+UTILITIES = [schema.PageSchema.ELEC, schema.PageSchema.GAS]
+
+READY = threading.Event()
+
+
+def is_ready() -> bool:
+  """
+  Checks whether the warmup has finished.
+
+  Returns:
+      bool: True once the warmup has run.
+  """
+  return READY.is_set()
+
+
+def client_value(value: Any) -> Any:
+  """
+  Converts a callback output to the value the browser sends back as an input,
+  so that the cached figures are keyed as they are for real requests.
+
+  Args:
+      value (Any): The callback output.
+
+  Returns:
+      Any: The output after a round trip through JSON.
+  """
+  return json.loads(to_json_plotly(value))
+
+
+def warm_data() -> None:
+  """Loads the half hourly, invoice and DUoS data and the meter catalogue."""
+  for utility in UTILITIES:
+    loader.load_hh_data(resample=None, utility=utility)
+    loader.load_hh_data(resample='1MS', utility=utility)
+    loader.load_invoice_cost_data(energy_type=utility)
+    catalogue.hh_meters(utility)
+    catalogue.invoice_meters(utility)
+  loader.load_duos_data()
+
+
+def warm_overview_tab() -> None:
+  """Renders the overview tab, whose callbacks read the data warmed by warm_data."""
+  overview_tab.render()
+
+
+def warm_power_tab() -> None:
+  """
+  Renders the power tab, prepares its default dataset and caches the power line
+  plot of the highest peak of the default meter.
+  """
+  power_tab.render()
+  dataset = power_tab.update_dataset(None)
+  meter_id = catalogue.hh_meters(schema.PageSchema.ELEC)[-1]
+  table_data = power_plots.create_high_demand_table(
+      session.resolve(dataset), target_col=meter_id).to_dict('records')
+  _, peak_date = power_tab.update_peak_dropdown_options(
+      client_value(table_data))
+  power_tab.update_power_lineplot(client_value(peak_date), meter_id)
+
+
+def warm_consumption_tab() -> None:
+  """
+  Renders the consumption tab, prepares its default dataset and caches the
+  consumption line plot of the first out of hours period of the default meter.
+  Finding the periods caches the baselines of the meter.
+  """
+  consumption_tab.render()
+  dataset = consumption_tab.update_dataset(None, schema.PageSchema.ELEC)
+  _, meter_id = consumption_tab.update_dropdown(schema.PageSchema.ELEC)
+  baseline = schema.BASELINES[-1]
+  table_data = consumption_plots.new_consump_periods(
+      session.resolve(dataset),
+      target_col=meter_id,
+      baseline_type=baseline,
+      dataset=dataset).to_dict('records')
+  options = consumption_tab.update_peak_dropdown_options(
+      client_value(table_data))
+  peak_date = consumption_tab.update_peak_dropdown_value(client_value(options))
+  consumption_tab.update_consump_lineplot(peak_date, baseline, meter_id,
+                                          client_value(dataset))
+
+
+def warm_cost_tab() -> None:
+  """Renders the cost tab and caches its default figure of every utility."""
+  cost_tab.render()
+  for utility in UTILITIES:
+    _, meter_id = cost_tab.update_dropdown(utility)
+    cost_tab.update_fig(utility, meter_id, cost_tab.PLOT_TYPES[0], None)
+
+
+WARMUP_STEPS: list[Callable[[], None]] = [
+    warm_data,
+    warm_overview_tab,
+    warm_power_tab,
+    warm_consumption_tab,
+    warm_cost_tab,
+]
+
+
+def run() -> None:
+  """
+  Runs every warmup step and sets READY. A failing step is logged and the
+  remaining steps still run.
+  """
+  start = time.perf_counter()
+  for step in WARMUP_STEPS:
+    try:
+      step()
+    except Exception:  # pylint: disable=broad-except
+      logger.exception('Warmup step %s failed', step.__name__)
+  READY.set()
+  logger.info('Warmup finished in %.2f s', time.perf_counter() - start)
+
+
+def start(in_background: bool = True) -> None:
+  """
+  Starts the warmup.
+
+  Args:
+      in_background (bool, optional): Whether to run the warmup in a daemon thread rather than before returning. Defaults to True.
+  """
+  if not in_background:
+    run()
+    return
+  threading.Thread(target=run, name='warmup', daemon=True).start()
@@ -0,0 +1,59 @@
+"""
+Fixtures shared by the tests.
+
+The data sources fixture points the loader at copies of the shipped csv files
+in a temporary directory, so the tests never read or write the columnar and
+shared cache files next to the real data.
+
+The tests call the callbacks directly, so the background callbacks may fall
+back to ordinary callbacks where their dependencies are not installed.
+"""
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+os.environ.setdefault('BACKGROUND_CALLBACKS_OPTIONAL', '1')
+
+from src.data import catalogue, loader, session
+
+
+def clear_caches() -> None:
+  """Drops every process wide cache that is built from the data sources."""
+  loader.HH_STORE.clear()
+  catalogue.clear()
+  session.SESSION_DATASETS.clear()
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path,
+             monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+  """
+  Copies the data sources to a temporary directory and points the loader at
+  the copies.
+
+  Yields:
+      Path: The directory of the copied sources.
+  """
+  for source in [*loader.DATA_SOURCES, loader.DUOS_PATH]:
+    shutil.copy(source, tmp_path / source.name)
+  monkeypatch.setattr(loader, 'DATA_DIR', tmp_path)
+  monkeypatch.setattr(loader, 'ELEC_HH_PATH',
+                      tmp_path / loader.ELEC_HH_PATH.name)
+  monkeypatch.setattr(loader, 'GAS_HH_PATH',
+                      tmp_path / loader.GAS_HH_PATH.name)
+  monkeypatch.setattr(loader, 'ELEC_INVOICE_PATH',
+                      tmp_path / loader.ELEC_INVOICE_PATH.name)
+  monkeypatch.setattr(loader, 'GAS_INVOICE_PATH',
+                      tmp_path / loader.GAS_INVOICE_PATH.name)
+  monkeypatch.setattr(loader, 'DUOS_PATH', tmp_path / loader.DUOS_PATH.name)
+  monkeypatch.setattr(loader, 'DATA_SOURCES', [
+      loader.ELEC_HH_PATH, loader.GAS_HH_PATH, loader.ELEC_INVOICE_PATH,
+      loader.GAS_INVOICE_PATH
+  ])
+  monkeypatch.delenv('SHARED_DATA_DIR', raising=False)
+  clear_caches()
+  yield tmp_path
+  clear_caches()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import arrays
+from src.utils import time_index
+
+BOUNDS = [
+    (None, None),
+    ('2022-01-01 03:00', '2022-01-02 12:00'),
+    # Timestamps off the half hourly grid.
+    ('2022-01-01 03:10', '2022-01-02 12:45'),
+    (None, '2022-01-01 10:00'),
+    ('2022-01-02 20:00', None),
+    # Ranges outside the data or empty.
+    ('2021-12-01', '2021-12-31'),
+    ('2022-02-01', '2022-03-01'),
+    ('2022-01-02', '2022-01-01'),
+    ('2021-12-31 23:00', '2022-01-05'),
+]
+
+
+def hh_frame(gaps=False):
+  index = pd.date_range('2022-01-01',
+                        periods=144,
+                        freq='30min',
+                        name='Datetime')
+  values = np.arange(144 * 3, dtype=float).reshape(144, 3)
+  dataf = pd.DataFrame(values,
+                       index=index,
+                       columns=pd.Index(['12345', '67890', '13579'],
+                                        name='Meter'))
+  if gaps:
+    dataf = dataf.drop(index[10:30]).drop(index[[50, 51, 100]])
+  return dataf
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+@pytest.mark.parametrize('start, end', BOUNDS)
+def test_series_matches_between(gaps, start, end):
+  dataf = hh_frame(gaps)
+  meter_arrays = arrays.MeterArrays.from_frame(dataf)
+  assert meter_arrays.axis.regular == (not gaps)
+  for meter in dataf.columns:
+    expected = time_index.between(dataf[meter], start, end)
+    pd.testing.assert_series_equal(meter_arrays.series(meter, start, end),
+                                   expected,
+                                   check_freq=False)
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+@pytest.mark.parametrize('start, end', BOUNDS)
+def test_frame_matches_between(gaps, start, end):
+  dataf = hh_frame(gaps)
+  meter_arrays = arrays.MeterArrays.from_frame(dataf)
+  for meters in [None, ['67890', '13579'], ['13579', '12345']]:
+    expected = time_index.between(dataf, start, end)
+    if meters is not None:
+      expected = expected[meters]
+    pd.testing.assert_frame_equal(meter_arrays.frame(meters, start, end),
+                                  expected,
+                                  check_freq=False)
+
+
+@pytest.mark.parametrize('gaps', [False, True])
+def test_axis_rebuilds_the_index(gaps):
+  dataf = hh_frame(gaps)
+  axis = arrays.TimeAxis.from_index(dataf.index)
+  pd.testing.assert_index_equal(axis.to_index('Datetime'),
+                                dataf.index,
+                                exact=False)
+
+
+def test_arrays_are_read_only_views():
+  dataf = hh_frame()
+  meter_arrays = arrays.MeterArrays.from_frame(dataf)
+  column = meter_arrays.column('67890')
+  assert column.flags.c_contiguous
+  assert not column.flags.writeable
+  series = meter_arrays.series('67890', '2022-01-01 03:00', '2022-01-01 06:00')
+  assert np.shares_memory(series.to_numpy(), meter_arrays.values)
+  frame = meter_arrays.frame(['12345', '67890'])
+  assert np.shares_memory(frame.to_numpy(), meter_arrays.values)
+  with pytest.raises(ValueError):
+    column[0] = 1.0
+
+
+@pytest.mark.parametrize('index', [
+    pd.DatetimeIndex(['2022-01-01 00:00', '2022-01-01 00:45']),
+    pd.DatetimeIndex(['2022-01-01 00:30', '2022-01-01 00:00']),
+    pd.DatetimeIndex(['2022-01-01 00:00', '2022-01-01 00:00']),
+    pd.DatetimeIndex(['2022-01-01 00:00', '2022-01-01 00:30'], tz='UTC'),
+])
+def test_from_frame_of_index_off_the_grid(index):
+  dataf = pd.DataFrame({'12345': [1.0, 2.0]}, index=index)
+  assert arrays.TimeAxis.from_index(index) is None
+  assert arrays.MeterArrays.from_frame(dataf) is None
+
+
+def test_from_frame_of_non_float_frame():
+  assert arrays.MeterArrays.from_frame(hh_frame().astype(int)) is None
+
+
+def test_empty_frame():
+  dataf = hh_frame().iloc[:0]
+  meter_arrays = arrays.MeterArrays.from_frame(dataf)
+  assert len(meter_arrays.series('12345', '2022-01-01', '2022-01-02')) == 0
@@ -0,0 +1,144 @@
+import logging
+
+import pytest
+from dash import Output
+
+from src.utils import IDS, background
+
+
+class RecordedCallback:
+  """Stands in for dash.callback, recording what it registers."""
+
+  def __init__(self):
+    self.dependencies = None
+    self.kwargs = None
+    self.func = None
+
+  def __call__(self, *dependencies, **kwargs):
+    self.dependencies = dependencies
+    self.kwargs = kwargs
+
+    def register(func):
+      self.func = func
+      return func
+
+    return register
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+  recorded = RecordedCallback()
+  monkeypatch.setattr(background, 'callback', recorded)
+  return recorded
+
+
+def unavailable_manager(*args, **kwargs):
+  raise ImportError('No module named multiprocess')
+
+
+def test_foreground_callback_without_progress(recorded, monkeypatch):
+  monkeypatch.setattr(background, 'MANAGER', None)
+
+  def job(value):
+    return value * 2
+
+  output = Output('out', 'children')
+  assert background.background_callback(output,
+                                        prevent_initial_call=True)(job) is job
+  assert recorded.func is job
+  assert recorded.dependencies == (output, )
+  assert recorded.kwargs == {'prevent_initial_call': True}
+
+
+def test_foreground_callback_ignores_progress(recorded, monkeypatch):
+  monkeypatch.setattr(background, 'MANAGER', None)
+  updates = []
+
+  def job(set_progress, value):
+    updates.append(set_progress(1, 2, 'Working'))
+    return value * 2
+
+  progress = background.progress_outputs('tab')
+  register = background.background_callback(Output('out', 'children'),
+                                            progress=progress)
+  decorated = register(job)
+  # The function is returned unchanged and a wrapper without set_progress is
+  # registered.
+  assert decorated is job
+  assert recorded.func is not job
+  assert recorded.func.__name__ == 'job'
+  assert recorded.func(3) == 6
+  assert updates == [None]
+  assert 'progress' not in recorded.kwargs
+
+
+def test_background_callback_with_manager(recorded, monkeypatch):
+  manager = object()
+  monkeypatch.setattr(background, 'MANAGER', manager)
+  progress = background.progress_outputs('tab')
+  running = background.running_outputs('tab', 'Working')
+
+  def job(set_progress, value):
+    return value
+
+  assert background.background_callback(Output('out', 'children'),
+                                        progress=progress,
+                                        running=running)(job) is job
+  assert recorded.func is job
+  assert recorded.kwargs['background'] is True
+  assert recorded.kwargs['manager'] is manager
+  assert recorded.kwargs['progress'] == progress
+  assert recorded.kwargs['running'] == running
+
+
+def test_progress_outputs():
+  outputs = background.progress_outputs('tab', 1)
+  assert [(output.component_id, output.component_property)
+          for output in outputs] == [
+              ('tab' + IDS.PROGRESS_BAR + '1', 'value'),
+              ('tab' + IDS.PROGRESS_BAR + '1', 'max'),
+              ('tab' + IDS.PROGRESS_TEXT + '1', 'children'),
+          ]
+
+
+def test_running_outputs_reset_after_the_job():
+  running = background.running_outputs('tab', 'Working')
+  assert running[0][0].component_id == 'tab' + IDS.PROGRESS + '0'
+  assert running[0][1]['display'] == 'block'
+  assert running[0][2] == {'display': 'none'}
+  assert running[2][1:] == ('Working', '')
+
+
+def test_create_manager_uses_cache_dir(monkeypatch, tmp_path):
+  pytest.importorskip('diskcache')
+  created = {}
+
+  def manager(cache, expire):
+    created.update(directory=cache.directory, expire=expire)
+    return manager
+
+  monkeypatch.setattr(background, 'DiskcacheManager', manager)
+  monkeypatch.setenv(background.BACKGROUND_CACHE_DIR_ENV, str(tmp_path))
+  assert background.create_manager() is manager
+  assert created == {
+      'directory': str(tmp_path),
+      'expire': background.BACKGROUND_EXPIRE
+  }
+
+
+def test_create_manager_fails_without_dependencies(monkeypatch, tmp_path):
+  monkeypatch.setattr(background, 'DiskcacheManager', unavailable_manager)
+  monkeypatch.setenv(background.BACKGROUND_CACHE_DIR_ENV, str(tmp_path))
+  monkeypatch.delenv(background.OPTIONAL_ENV, raising=False)
+  with pytest.raises(ImportError, match=background.OPTIONAL_ENV):
+    background.create_manager()
+
+
+def test_create_manager_falls_back_when_optional(monkeypatch, tmp_path,
+                                                 caplog):
+  monkeypatch.setattr(background, 'DiskcacheManager', unavailable_manager)
+  monkeypatch.setenv(background.BACKGROUND_CACHE_DIR_ENV, str(tmp_path))
+  monkeypatch.setenv(background.OPTIONAL_ENV, '1')
+  with caplog.at_level(logging.WARNING, logger=background.__name__):
+    assert background.create_manager() is None
+  assert 'multiprocess' in caplog.text
@@ -0,0 +1,76 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import cache
+
+
+def test_lru_cache_evicts_least_recently_used():
+  lru = cache.LRUCache(max_bytes=100, size_func=len)
+  lru.put('a', 'x' * 40)
+  lru.put('b', 'x' * 40)
+  assert lru.get('a') == 'x' * 40
+  lru.put('c', 'x' * 40)
+  assert 'a' in lru and 'c' in lru
+  assert 'b' not in lru
+  assert lru.nbytes == 80
+
+
+def test_lru_cache_limits_entries():
+  lru = cache.LRUCache(max_bytes=1000, max_entries=2, size_func=len)
+  for key in 'abc':
+    lru.put(key, key)
+  assert len(lru) == 2
+  assert lru.get('a', 'missing') == 'missing'
+
+
+def test_lru_cache_skips_values_over_budget():
+  lru = cache.LRUCache(max_bytes=10, size_func=len)
+  lru.put('a', 'x' * 11)
+  assert len(lru) == 0
+  assert lru.nbytes == 0
+
+
+def test_lru_cache_replaces_value():
+  lru = cache.LRUCache(max_bytes=100, size_func=len)
+  lru.put('a', 'x' * 40)
+  lru.put('a', 'x' * 10)
+  assert lru.get('a') == 'x' * 10
+  assert lru.nbytes == 10
+  lru.clear()
+  assert len(lru) == 0 and lru.nbytes == 0
+
+
+def test_sizeof():
+  values = np.zeros(100)
+  assert cache.sizeof(values) == 800
+  assert cache.sizeof(pd.Series(values)) > 800
+  assert cache.sizeof({'a': values}) > 800
+
+
+def put_value(directory, key, value):
+  cache.DiskCache(directory, max_bytes=1024 * 1024).put(key, value)
+
+
+def test_disk_cache_shared_between_processes(tmp_path):
+  pytest.importorskip('diskcache')
+  disk_cache = cache.DiskCache(tmp_path, max_bytes=1024 * 1024)
+  baselines = pd.DataFrame({'Monthly': [1.0, 2.0]})
+  process = multiprocessing.get_context('spawn').Process(
+      target=put_value, args=(tmp_path, ('handle', 'meter'), baselines))
+  process.start()
+  process.join()
+  assert process.exitcode == 0
+  assert ('handle', 'meter') in disk_cache
+  pd.testing.assert_frame_equal(disk_cache.get(('handle', 'meter')), baselines)
+  disk_cache.clear()
+  assert disk_cache.get(('handle', 'meter')) is None
+
+
+def test_create_shared_cache_without_diskcache(tmp_path, monkeypatch):
+  monkeypatch.setattr(cache, 'diskcache', None)
+  assert isinstance(cache.create_shared_cache(tmp_path, 100), cache.LRUCache)
+  with pytest.raises(ImportError):
+    cache.DiskCache(tmp_path, 100)
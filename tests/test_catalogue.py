@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from src.data import catalogue, loader
+from src.utils import schema
+
+UTILITIES = [schema.PageSchema.ELEC, schema.PageSchema.GAS]
+
+
+@pytest.mark.parametrize('utility', UTILITIES)
+def test_hh_meters_match_loaded_columns(data_dir, utility):
+  meter_ids = loader.load_hh_data('1MS', utility).columns.tolist()
+  meter_ids.remove('month_of_year')
+  meter_ids.remove(catalogue.ALL_METERS)
+  assert catalogue.hh_meters(utility) == meter_ids
+
+
+@pytest.mark.parametrize('utility', UTILITIES)
+def test_invoice_meters_match_loaded_invoices(data_dir, utility):
+  dataf = loader.load_invoice_cost_data(energy_type=utility)
+  meter_ids = dataf[schema.InvoiceSchema.MPR].unique().tolist()
+  assert catalogue.invoice_meters(utility) == meter_ids
+
+
+def test_invoice_meters_of_unknown_utility(data_dir):
+  assert catalogue.invoice_meters('water') == []
+
+
+def test_meters_are_cached(data_dir, monkeypatch):
+  first = catalogue.hh_meters(schema.PageSchema.ELEC)
+
+  def fail():
+    raise AssertionError('The cached meters were re-read.')
+
+  monkeypatch.setattr(catalogue, 'read_elec_hh_meters', fail)
+  assert catalogue.hh_meters(schema.PageSchema.ELEC) == first
+  # The returned list is a copy, so callers cannot alter the cache.
+  first.append('extra')
+  assert 'extra' not in catalogue.hh_meters(schema.PageSchema.ELEC)
+
+
+def test_meters_are_reread_when_source_changes(data_dir):
+  meter_ids = catalogue.hh_meters(schema.PageSchema.ELEC)
+  dataf = pd.read_csv(loader.ELEC_HH_PATH, index_col=0)
+  dataf.drop(columns=dataf.columns[0]).to_csv(loader.ELEC_HH_PATH)
+  assert catalogue.hh_meters(schema.PageSchema.ELEC) == meter_ids[1:]
@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.data import columnar, loader
+from src.utils import schema
+from tests import reference
+
+pytest.importorskip('pyarrow')
+
+
+def test_clean_numeric_columns():
+  dataf = pd.DataFrame({
+      'number': ['1,200.5', '3'],
+      'text': ['a', 'b'],
+      'float': [1.0, 2.0]
+  })
+  dataf = columnar.clean_numeric_columns(dataf)
+  assert dataf['number'].tolist() == [1200.5, 3.0]
+  assert dataf['text'].tolist() == ['a', 'b']
+  assert dataf['float'].tolist() == [1.0, 2.0]
+
+
+def test_read_cached_writes_and_reads_the_parse(data_dir):
+  source = loader.ELEC_HH_PATH
+  parses = []
+
+  def parse():
+    parses.append(1)
+    return reference.parse_elec_hh_data(source)
+
+  parsed = columnar.read_cached(source, parse)
+  assert columnar.is_fresh(source)
+  cached = columnar.read_cached(source, parse)
+  assert len(parses) == 1
+  pd.testing.assert_frame_equal(cached, parsed, check_freq=False)
+
+
+def test_read_cached_ignores_stale_cache(data_dir):
+  source = loader.ELEC_HH_PATH
+  columnar.read_cached(source, lambda: pd.DataFrame({'stale': [1.0]}))
+  stat = source.stat()
+  os.utime(columnar.cache_path(source),
+           ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+  assert not columnar.is_fresh(source)
+  dataf = columnar.read_cached(source,
+                               lambda: reference.parse_elec_hh_data(source))
+  assert 'stale' not in dataf.columns
+  cached = columnar.read_cached(source, lambda: pd.DataFrame())
+  pd.testing.assert_frame_equal(cached, dataf, check_freq=False)
+
+
+def test_build_columnar_cache(data_dir):
+  built = loader.build_columnar_cache()
+  assert built == [
+      columnar.cache_path(source) for source in loader.DATA_SOURCES
+  ]
+  expected = reference.parse_elec_hh_data(loader.ELEC_HH_PATH)
+  dataf = loader.read_hh_source(schema.PageSchema.ELEC)
+  pd.testing.assert_frame_equal(dataf, expected, check_freq=False)
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from src.data import loader, session
+from src.utils import cache, schema
+from tests import reference
+
+pytest.importorskip('e2sviz')
+
+from src.components import consumption_plots  # noqa: E402
+
+
+@pytest.fixture
+def consumption_data(data_dir):
+  return loader.load_hh_data(None, schema.PageSchema.ELEC).loc['2022']
+
+
+@pytest.mark.parametrize('baseline_type', schema.BASELINES)
+def test_new_consump_periods_matches_loop(consumption_data, baseline_type):
+  for target_col in consumption_data.columns.drop(
+      schema.HHSchema.MONTH_OF_YEAR):
+    expected = reference.new_consump_periods(consumption_data, target_col,
+                                             baseline_type)
+    periods = consumption_plots.new_consump_periods(consumption_data,
+                                                    target_col, baseline_type)
+    pd.testing.assert_frame_equal(periods, expected, check_dtype=False)
+
+
+def test_new_consump_periods_with_gaps():
+  # Two nights of readings with a missing reading in the first one.
+  index = pd.date_range('2022-01-03 18:30', '2022-01-05 08:00', freq='30min')
+  index = index[(index.hour < 8) | (index.hour > 18)].delete(10)
+  data = pd.DataFrame({'meter': range(len(index))}, index=index, dtype=float)
+  data[schema.HHSchema.MONTH_OF_YEAR] = data.index.month
+  expected = reference.new_consump_periods(data, 'meter')
+  periods = consumption_plots.new_consump_periods(data, 'meter')
+  pd.testing.assert_frame_equal(periods, expected, check_dtype=False)
+
+
+def test_create_baselines_matches_transform(consumption_data):
+  # The old seasons were objects, the new ones are integers.
+  season = schema.HHSchema.SEASON_OF_YEAR
+  for target_col in consumption_data.columns.drop(
+      schema.HHSchema.MONTH_OF_YEAR):
+    expected = reference.create_baselines(consumption_data, target_col)
+    dataf = consumption_plots.create_baselines(consumption_data, target_col)
+    pd.testing.assert_frame_equal(dataf.drop(columns=season),
+                                  expected.drop(columns=season),
+                                  check_dtype=False)
+    assert dataf[season].tolist() == expected[season].tolist()
+
+
+def test_create_baselines_over_years(data_dir):
+  data = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  expected = reference.create_baselines(data)
+  dataf = consumption_plots.create_baselines(data)
+  pd.testing.assert_frame_equal(dataf[schema.BASELINES],
+                                expected[schema.BASELINES])
+  assert schema.BASELINES[0] not in data.columns
+
+
+def test_create_baselines_shares_cache(data_dir, tmp_path, monkeypatch):
+  pytest.importorskip('diskcache')
+  monkeypatch.setattr(
+      consumption_plots, 'BASELINE_CACHE',
+      cache.DiskCache(tmp_path / 'baselines',
+                      consumption_plots.BASELINE_CACHE_BYTES))
+  dataset = session.create_handle(schema.PageSchema.ELEC, drop=['All'])
+  data = session.resolve(dataset)
+  meter_id = data.columns[0]
+  expected = consumption_plots.create_baselines(data,
+                                                meter_id,
+                                                dataset=dataset)
+
+  # Another process opening the same directory finds the baselines.
+  monkeypatch.setattr(
+      consumption_plots, 'BASELINE_CACHE',
+      cache.DiskCache(tmp_path / 'baselines',
+                      consumption_plots.BASELINE_CACHE_BYTES))
+  monkeypatch.setattr(consumption_plots, 'compute_baselines', None)
+  dataf = consumption_plots.create_baselines(data, meter_id, dataset=dataset)
+  pd.testing.assert_frame_equal(dataf, expected)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from src.components import downsample
+
+
+def naive_lttb(x, y, max_points):
+  # The textbook algorithm, one bucket and one point at a time.
+  x = np.asarray(x, dtype=float) - x[0]
+  edges = np.append(
+      np.linspace(1,
+                  len(x) - 1, max_points - 1).astype(int), len(x))
+  kept = [0]
+  for bucket in range(max_points - 2):
+    start, end = edges[bucket], edges[bucket + 1]
+    next_end = edges[bucket + 2]
+    mean_x = x[end:next_end].mean()
+    mean_y = y[end:next_end].mean()
+    previous = kept[-1]
+    areas = [
+        abs((x[previous] - mean_x) * (y[i] - y[previous]) -
+            (x[previous] - x[i]) * (mean_y - y[previous]))
+        for i in range(start, end)
+    ]
+    kept.append(start + int(np.argmax(areas)))
+  kept.append(len(x) - 1)
+  return np.array(kept)
+
+
+def test_lttb_indices_matches_naive_algorithm():
+  rng = np.random.default_rng(0)
+  y = rng.normal(size=5000).cumsum()
+  x = np.arange(5000) * 1800
+  np.testing.assert_array_equal(downsample.lttb_indices(x, y, 300),
+                                naive_lttb(x, y, 300))
+
+
+def test_lttb_indices_keeps_short_series():
+  x = np.arange(10)
+  np.testing.assert_array_equal(downsample.lttb_indices(x, x, 10),
+                                np.arange(10))
+  np.testing.assert_array_equal(downsample.lttb_indices(x, x, 2),
+                                np.arange(10))
+
+
+def test_downsample_series_keeps_ends_and_peaks():
+  index = pd.date_range('2022-01-01', periods=20000, freq='30min')
+  series = pd.Series(np.sin(np.arange(20000) / 50), index=index)
+  series.iloc[12345] = 10.0
+  series.iloc[5432] = -10.0
+  downsampled = downsample.downsample_series(series, 500)
+  assert len(downsampled) == 500
+  assert downsampled.index.is_monotonic_increasing
+  assert downsampled.index[0] == index[0]
+  assert downsampled.index[-1] == index[-1]
+  assert downsampled.max() == 10.0 and downsampled.min() == -10.0
+
+
+def test_downsample_frame_skips_missing_values():
+  index = pd.date_range('2022-01-01', periods=1000, freq='30min')
+  values = np.arange(1000, dtype=float)
+  values[100:400] = np.nan
+  dataf = pd.DataFrame({'meter': values, 'other': values * 2}, index=index)
+  downsampled = downsample.downsample_frame(dataf, 'meter', 100)
+  assert len(downsampled) == 100
+  # Buckets that are entirely missing keep a missing point, the others never.
+  missing = downsampled['meter'].isna()
+  assert missing.sum() > 0
+  assert ((downsampled.index[missing] >= index[100]) &
+          (downsampled.index[missing] < index[400])).all()
+  pd.testing.assert_series_equal(downsampled['other'],
+                                 downsampled['meter'] * 2,
+                                 check_names=False)
@@ -0,0 +1,78 @@
+import os
+
+import plotly.graph_objects as go  # type: ignore
+from dash import no_update  # type: ignore
+
+from src.utils import figure_cache
+
+
+def counted_figure(backend, version='1'):
+  calls = []
+
+  @figure_cache.cached_figure(lambda: version, backend=backend)
+  def figure(meter, date=None):
+    calls.append((meter, date))
+    if meter is None:
+      return no_update
+    return go.Figure(go.Scatter(x=[1, 2], y=[3, 4], name=str(meter)))
+
+  return figure, calls
+
+
+def test_cached_figure_skips_repeated_calls():
+  backend = figure_cache.MemoryBackend()
+  figure, calls = counted_figure(backend)
+  first = figure('98765', date='2022-01-01')
+  second = figure('98765', date='2022-01-01')
+  assert len(calls) == 1
+  assert isinstance(first, go.Figure)
+  assert go.Figure(second) == first
+  figure('2468', date='2022-01-01')
+  assert len(calls) == 2
+
+
+def test_cached_figure_keys_on_version():
+  backend = figure_cache.MemoryBackend()
+  figure, calls = counted_figure(backend, '1')
+  figure('98765')
+  figure, calls = counted_figure(backend, '2')
+  figure('98765')
+  assert len(calls) == 1
+
+
+def test_cached_figure_passes_no_update_through():
+  backend = figure_cache.MemoryBackend()
+  figure, calls = counted_figure(backend)
+  assert figure(None) is no_update
+  assert figure(None) is no_update
+  assert len(calls) == 2
+
+
+def test_file_system_backend_shared_and_pruned(tmp_path):
+  backend = figure_cache.FileSystemBackend(tmp_path, max_files=2)
+  other = figure_cache.FileSystemBackend(tmp_path, max_files=2)
+  backend.put('a', '{"a": 1}')
+  assert other.get('a') == '{"a": 1}'
+  backend.put('b', '{}')
+  os.utime(tmp_path / 'a.json', ns=(0, 0))
+  backend.put('c', '{}')
+  assert backend.get('a') is None
+  assert sorted(path.name
+                for path in tmp_path.iterdir()) == ['b.json', 'c.json']
+  other.clear()
+  assert backend.get('b') is None
+
+
+def test_create_backend(tmp_path, monkeypatch):
+  monkeypatch.delenv(figure_cache.FIGURE_CACHE_DIR_ENV, raising=False)
+  assert isinstance(figure_cache.create_backend(), figure_cache.MemoryBackend)
+  monkeypatch.setenv(figure_cache.FIGURE_CACHE_DIR_ENV, str(tmp_path))
+  backend = figure_cache.create_backend()
+  assert isinstance(backend, figure_cache.FileSystemBackend)
+  assert backend.directory == tmp_path
+
+
+def test_cache_key_normalizes_inputs():
+  key = figure_cache.cache_key('name', [{'b': 1, 'a': 2}], '1')
+  assert key == figure_cache.cache_key('name', [{'a': 2, 'b': 1}], '1')
+  assert key != figure_cache.cache_key('name', [{'a': 2, 'b': 1}], '2')
@@ -0,0 +1,31 @@
+import numpy as np
+import plotly.graph_objects as go  # type: ignore
+import pytest
+
+pytest.importorskip('e2sviz')
+
+from src.components import line_fig  # noqa: E402
+
+
+def line_figure(n_points):
+  fig = go.Figure(go.Scatter(x=np.arange(n_points), y=np.ones(n_points)))
+  fig.add_trace(go.Scatter(x=[0, 0, 1, 1], y=[0, 1, 1, 0], fill='toself'))
+  return fig
+
+
+def test_set_render_mode_auto_switches_above_threshold():
+  fig = line_fig.set_render_mode(line_figure(100), threshold=100)
+  assert [trace.type for trace in fig.data] == ['scatter', 'scatter']
+  fig = line_fig.set_render_mode(line_figure(101), threshold=100)
+  # Filled traces, such as the working hours shading, stay SVG.
+  assert [trace.type for trace in fig.data] == ['scattergl', 'scatter']
+  np.testing.assert_array_equal(fig.data[0].x, np.arange(101))
+
+
+def test_set_render_mode_explicit_modes():
+  fig = line_fig.set_render_mode(line_figure(10), line_fig.WEBGL)
+  assert fig.data[0].type == 'scattergl'
+  fig = line_fig.set_render_mode(line_figure(10**5), line_fig.SVG)
+  assert fig.data[0].type == 'scatter'
+  with pytest.raises(ValueError):
+    line_fig.set_render_mode(line_figure(10), 'canvas')
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from src.data import loader
+from src.utils import schema
+from tests import reference
+
+
+def write_gas_source(path, rows):
+  periods = [
+      f'H{hour:02d}{minute:02d}' for hour in range(25) for minute in (0, 30)
+  ][1:-1]
+  pd.DataFrame([{
+      schema.InvoiceSchema.MPR_2: meter,
+      schema.InvoiceSchema.READDATE: date,
+      **{
+          period: value + i
+          for i, period in enumerate(periods)
+      }
+  } for meter, date, value in rows]).to_csv(path, index=False)
+
+
+def test_prep_gas_data_matches_pivot(data_dir):
+  expected = reference.prep_gas_data(loader.GAS_HH_PATH)
+  pd.testing.assert_frame_equal(loader.prep_gas_data(),
+                                expected,
+                                check_freq=False)
+
+
+def test_prep_gas_data_with_missing_days(data_dir):
+  # The meters read on different days, in no particular order, leaving days
+  # without any reading.
+  write_gas_source(loader.GAS_HH_PATH, [(2, '05/01/2022', 10.0),
+                                        (1, '01/01/2022', 1.0),
+                                        (1, '05/01/2022', 5.0),
+                                        (2, '02/01/2022', 20.0)])
+  expected = reference.prep_gas_data(loader.GAS_HH_PATH)
+  dataf = loader.prep_gas_data()
+  pd.testing.assert_frame_equal(dataf, expected, check_freq=False)
+  assert dataf.index[-1] == pd.Timestamp('2022-01-05 23:30')
+
+
+def test_prep_gas_data_rejects_duplicate_readings(data_dir):
+  write_gas_source(loader.GAS_HH_PATH, [(1, '01/01/2022', 1.0),
+                                        (1, '01/01/2022', 2.0)])
+  with pytest.raises(ValueError):
+    reference.prep_gas_data(loader.GAS_HH_PATH)
+  with pytest.raises(ValueError):
+    loader.prep_gas_data()
+
+
+@pytest.mark.parametrize('resample', [None, '1MS'])
+def test_load_hh_data_matches_gas_pivot(data_dir, resample):
+  expected = reference.add_totals(reference.prep_gas_data(loader.GAS_HH_PATH),
+                                  resample)
+  dataf = loader.load_hh_data(resample, schema.PageSchema.GAS)
+  pd.testing.assert_frame_equal(dataf, expected, check_freq=False)
@@ -0,0 +1,165 @@
+import json
+import time
+import tracemalloc
+
+import pytest
+from dash import Dash, Input, Output, html
+from dash.exceptions import PreventUpdate
+from dash.long_callback.managers import BaseLongCallbackManager
+
+from src.utils import metrics
+
+
+@metrics.timed(metrics.LOADER)
+def load(seconds):
+  time.sleep(seconds)
+  return seconds
+
+
+def recorded_calls(name, func, payload=None):
+  calls = []
+  return metrics.measure(name, func, calls.append, payload), calls
+
+
+def test_measure_records_the_loader_phase():
+
+  def callback(value):
+    load(0.01)
+    # Nested loader calls are only counted once.
+    load(0.0)
+    return json.dumps({'value': value})
+
+  measured, calls = recorded_calls('tab.callback', callback, len)
+  assert measured(1) == '{"value": 1}'
+  [call] = calls
+  assert call['callback'] == 'tab.callback'
+  assert call['loader'] >= 0.01
+  assert call['duration'] >= call['loader']
+  assert call['payload_bytes'] == len('{"value": 1}')
+  assert call['peak_memory_bytes'] is None
+  assert not call['error']
+  # Outside a measured call the loader runs unchanged.
+  assert load(0.0) == 0.0
+
+
+def test_measure_records_errors():
+
+  def callback():
+    raise ValueError('No data')
+
+  def prevented():
+    raise PreventUpdate
+
+  measured, calls = recorded_calls('tab.callback', callback, len)
+  with pytest.raises(ValueError):
+    measured()
+  assert calls[0]['error']
+  assert calls[0]['payload_bytes'] is None
+  # Preventing the update is not an error.
+  measured, calls = recorded_calls('tab.prevented', prevented)
+  with pytest.raises(PreventUpdate):
+    measured()
+  assert not calls[0]['error']
+
+
+def test_measure_traces_memory(monkeypatch):
+  monkeypatch.setenv(metrics.MEMORY_ENV, '1')
+  measured, calls = recorded_calls('tab.callback',
+                                   lambda: bytearray(1024 * 1024))
+  try:
+    measured()
+  finally:
+    tracemalloc.stop()
+  assert calls[0]['peak_memory_bytes'] >= 1024 * 1024
+
+
+def test_record_without_payload():
+  totals = metrics.CallbackMetrics()
+  totals.record('tab.callback', 0.2, 0.05, 100, None, False)
+  totals.record('tab.callback', 3.0, 0.0, None, 2048, True)
+  stats = totals.snapshot()['tab.callback']
+  assert (stats.calls, stats.errors) == (2, 1)
+  assert stats.payload_bytes == stats.max_payload_bytes == 100
+  assert stats.max_peak_memory_bytes == 2048
+  assert stats.figure == pytest.approx(0.15 + 3.0)
+  assert stats.buckets == [0, 0, 1, 1, 1, 1, 2, 2]
+  text = totals.to_prometheus()
+  assert ('dash_callback_duration_seconds_count{callback="tab.callback"} 2'
+          in text)
+
+
+def create_app():
+  app = Dash(__name__)
+  app.layout = html.Div([html.Div(id='in'), html.Div(id='out')])
+
+  @app.callback(Output('out', 'children'), Input('in', 'children'))
+  def update_out(value):
+    load(0.0)
+    return f'{value}!'
+
+  return app
+
+
+def post_update(client, value):
+  inputs = [{'id': 'in', 'property': 'children', 'value': value}]
+  body = {
+      'output': 'out.children',
+      'outputs': {
+          'id': 'out',
+          'property': 'children'
+      },
+      'inputs': inputs,
+      'changedPropIds': ['in.children'],
+  }
+  return client.post('/_dash-update-component', json=body)
+
+
+def test_instrument_measures_each_callback():
+  app = create_app()
+  totals = metrics.CallbackMetrics()
+  metrics.instrument(app, totals)
+  # Instrumenting again does not measure the calls twice.
+  metrics.instrument_callbacks(app, totals)
+  client = app.server.test_client()
+  response = post_update(client, 'a')
+  assert response.status_code == 200
+  post_update(client, 'b')
+  stats = totals.snapshot()[metrics.callback_name(app,
+                                                  {'output': 'out.children'})]
+  assert stats.calls == 2
+  assert stats.payload_bytes >= len(response.get_data())
+  remote = client.get('/metrics', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+  assert remote.status_code == 404
+  text = client.get('/metrics').get_data(as_text=True)
+  assert 'callback="test_metrics.update_out"' in text
+
+
+def test_instrument_measures_background_jobs(tmp_path):
+  diskcache = pytest.importorskip('diskcache')
+  pytest.importorskip('multiprocess')
+  pytest.importorskip('psutil')
+  from dash import DiskcacheManager
+
+  manager = DiskcacheManager(diskcache.Cache(str(tmp_path)))
+  app = Dash(__name__, background_callback_manager=manager)
+  app.layout = html.Div([html.Div(id='in'), html.Div(id='job-out')])
+
+  @app.callback(Output('job-out', 'children'),
+                Input('in', 'children'),
+                background=True)
+  def run_job(value):
+    load(0.0)
+    return value
+
+  totals = metrics.CallbackMetrics()
+  metrics.instrument(app, totals)
+  key = BaseLongCallbackManager.hash_function(run_job, 'job-out.children')
+  # Run the job in this process, as the manager would in a new one.
+  manager.func_registry[key]('result', 'progress', ['a'], {})
+  assert manager.handle.get('result') == 'a'
+  assert totals.snapshot() == {}
+  metrics.collect_jobs(totals)
+  stats = totals.snapshot()['test_metrics.run_job']
+  assert (stats.calls, stats.errors, stats.payload_bytes) == (1, 0, 0)
+  metrics.collect_jobs(totals)
+  assert totals.snapshot()['test_metrics.run_job'].calls == 1
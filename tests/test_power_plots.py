@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import loader
+from src.utils import schema
+from tests import reference
+
+pytest.importorskip('e2sviz')
+
+from src.components import power_plots  # noqa: E402
+
+
+def half_hourly(values, start='2022-01-01'):
+  index = pd.date_range(start, periods=len(values), freq='30min')
+  return pd.Series(values, index=index, dtype=float)
+
+
+def test_select_separated_peaks_matches_loop_on_daily_readings():
+  # With one reading per day, at the same time, the old separation in whole
+  # days and the new one in calendar days agree.
+  rng = np.random.default_rng(0)
+  index = pd.date_range('2021-01-01 12:00', periods=400, freq='D')
+  data = pd.DataFrame({'98765': rng.permutation(400) / 2.0}, index=index)
+  expected = reference.create_high_demand_table(data, '98765')
+  table = power_plots.create_high_demand_table(data, '98765')
+  pd.testing.assert_frame_equal(table, expected, check_names=False)
+
+
+def test_select_separated_peaks_keeps_calendar_days_apart():
+  rng = np.random.default_rng(1)
+  power = half_hourly(rng.random(48 * 200))
+  peaks = power_plots.select_separated_peaks(power, 10, 3)
+  assert len(peaks) == 10
+  assert (np.diff(power.iloc[peaks].to_numpy()) <= 0).all()
+  days = power.index[peaks].to_numpy().astype('datetime64[D]')
+  gaps = np.abs(days[:, np.newaxis] - days[np.newaxis, :]).astype(int)
+  assert (gaps[~np.eye(len(peaks), dtype=bool)] > 3).all()
+  daily_max = power.groupby(power.index.normalize()).max()
+  assert (power.iloc[peaks].to_numpy() == daily_max.loc[days].to_numpy()).all()
+
+
+def test_select_separated_peaks_ties_and_missing_values():
+  power = half_hourly([1.0, 5.0, np.nan, 5.0] + [np.nan] * 44 + [np.nan] * 48 +
+                      [1.0] * 48 * 5 + [2.0])
+  peaks = power_plots.select_separated_peaks(power, 10, 3)
+  # The earliest of equal maxima is kept, days without readings are skipped
+  # and the peak on day 7 is more than 3 days after the first one.
+  assert power.index[peaks].tolist() == [
+      pd.Timestamp('2022-01-01 00:30'),
+      pd.Timestamp('2022-01-08 00:00')
+  ]
+  assert len(power_plots.select_separated_peaks(power.iloc[:0])) == 0
+
+
+def test_create_high_demand_table_separates_by_calendar_day(data_dir):
+  # 2021-07-19 13:30 is 3 days and 30 minutes before the peak of 2021-07-22
+  # 14:00. The old check floored the negative gap to -4 days and kept it; the
+  # calendar day separation skips it and keeps 2021-07-16 14:30 instead.
+  data = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  expected = reference.create_high_demand_table(data, '98765')
+  table = power_plots.create_high_demand_table(data, '98765')
+  assert pd.Timestamp('2021-07-19 13:30') in expected.index
+  assert pd.Timestamp('2021-07-19 13:30') not in table.index
+  assert pd.Timestamp('2021-07-16 14:30') in table.index
+  expected = expected.drop(pd.Timestamp('2021-07-19 13:30'))
+  pd.testing.assert_frame_equal(table.drop(pd.Timestamp('2021-07-16 14:30')),
+                                expected,
+                                check_names=False)
+
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_power_demand_overview_matches_per_meter_statistics(data_dir):
+  data = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  data = data.drop(columns=schema.HHSchema.MONTH_OF_YEAR)
+  data.iloc[:10, 0] = np.nan
+  expected = reference.power_demand_overview(data)
+  overview = power_plots.power_demand_overview(data)
+  pd.testing.assert_frame_equal(overview, expected, check_dtype=False)
+
+
+def test_load_duration_curve_matches_full_curve_when_short():
+  power = half_hourly([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+  expected = reference.load_duration_curve(power)
+  perc_half_hour, curve = power_plots.load_duration_curve(power.to_numpy())
+  np.testing.assert_array_equal(
+      perc_half_hour, expected[schema.PowerTableSchema.PERC_HALF_HOUR])
+  np.testing.assert_array_equal(curve, expected['power'])
+
+
+def test_load_duration_curve_points_lie_on_full_curve(data_dir):
+  data = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  power = data['98765'] * 2
+  expected = reference.load_duration_curve(power).to_numpy()
+  perc_half_hour, curve = power_plots.load_duration_curve(
+      power.to_numpy(), 500)
+  assert len(curve) <= 500
+  assert (curve[0], curve[-1]) == (power.max(), power.min())
+  assert (np.diff(curve) <= 0).all()
+  full_curve = set(map(tuple, expected))
+  assert all(point in full_curve for point in zip(perc_half_hour, curve))
+
+
+def test_load_duration_curve_missing_readings():
+  power = half_hourly([2.0, np.nan, 1.0, np.nan])
+  perc_half_hour, curve = power_plots.load_duration_curve(power.to_numpy())
+  # Missing readings are left out but still count towards the half-hours.
+  np.testing.assert_array_equal(perc_half_hour, [25.0, 50.0])
+  np.testing.assert_array_equal(curve, [2.0, 1.0])
+  perc_half_hour, curve = power_plots.load_duration_curve(
+      np.array([np.nan, np.nan]))
+  assert len(perc_half_hour) == len(curve) == 0
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from src.data import loader, session
+from src.utils import schema
+from tests import reference
+
+pytest.importorskip('e2sviz')
+
+from src.components import power_plots  # noqa: E402
+from src.tabs import power_tab  # noqa: E402
+
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_power_demand_overview_covers_every_year(data_dir):
+  # The overview table is built from the data of every year, whatever the
+  # year slider selects.
+  dataf = loader.load_hh_data(resample=None, utility=schema.PageSchema.ELEC)
+  dataf = dataf.drop([schema.HHSchema.MONTH_OF_YEAR, 'All'], axis=1)
+  expected = reference.power_demand_overview(dataf)
+  overview = power_plots.power_demand_overview(power_tab.overview_data())
+  pd.testing.assert_frame_equal(overview,
+                                expected,
+                                check_dtype=False,
+                                check_index_type=False)
+
+
+def test_update_dataset_caches_the_dataset(data_dir):
+  # The handle is resolved where it is stored, so the background jobs forked
+  # afterwards find the dataset in their copy of the cache.
+  dataset = power_tab.update_dataset([2022])
+  assert dataset['years'] == [2022]
+  key = (session.handle_key(dataset),
+         loader.hh_data_version(schema.PageSchema.ELEC))
+  assert key in session.SESSION_DATASETS
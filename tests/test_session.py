@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import loader, session
+from src.utils import schema
+
+
+def test_handle_key_normalizes_handles():
+  handle = session.create_handle(schema.PageSchema.ELEC,
+                                 years=[np.int64(2021),
+                                        np.int64(2022)],
+                                 drop=['b', 'a'])
+  assert handle == {
+      'utility': schema.PageSchema.ELEC,
+      'years': [2021, 2022],
+      'year_range': True,
+      'drop': ['a', 'b']
+  }
+  same = session.create_handle(schema.PageSchema.ELEC, [2021, 2022],
+                               drop=('a', 'b'))
+  assert session.handle_key(handle) == session.handle_key(same)
+  other = session.create_handle(schema.PageSchema.ELEC, [2021, 2022],
+                                year_range=False,
+                                drop=('a', 'b'))
+  assert session.handle_key(handle) != session.handle_key(other)
+
+
+def test_drop_columns_keeps_views():
+  dataf = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0], 'c': [5, 6]})
+  selected = session.drop_columns(dataf, ['b'])
+  assert selected.columns.tolist() == ['a', 'c']
+  assert np.shares_memory(selected['a'].to_numpy(), dataf['a'].to_numpy())
+  assert session.drop_columns(dataf, []) is dataf
+
+
+@pytest.mark.parametrize('years, year_range, expected_years', [
+    (None, True, [2021, 2022, 2023]),
+    ([2021, 2023], True, [2021, 2022, 2023]),
+    ([2021, 2023], False, [2021, 2023]),
+    ([2022], False, [2022]),
+])
+def test_build_dataset_matches_year_mask(data_dir, years, year_range,
+                                         expected_years):
+  dataf = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  expected = dataf[dataf.index.year.isin(expected_years)].drop(columns='All')
+  handle = session.create_handle(schema.PageSchema.ELEC,
+                                 years=years,
+                                 year_range=year_range,
+                                 drop=['All'])
+  pd.testing.assert_frame_equal(session.build_dataset(handle), expected)
+
+
+def test_build_dataset_of_consecutive_years_is_a_view(data_dir):
+  dataf = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  dataset = session.build_dataset(
+      session.create_handle(schema.PageSchema.ELEC, years=[2021, 2022]))
+  assert np.shares_memory(dataset['All'].to_numpy(), dataf['All'].to_numpy())
+
+
+def test_resolve_builds_once_per_version(data_dir, monkeypatch):
+  builds = []
+  build_dataset = session.build_dataset
+  monkeypatch.setattr(session, 'build_dataset',
+                      lambda handle: builds.append(1) or build_dataset(handle))
+  handle = session.create_handle(schema.PageSchema.ELEC, years=[2022])
+  first = session.resolve(handle)
+  second = session.resolve(dict(handle))
+  assert len(builds) == 1
+  assert np.shares_memory(first['All'].to_numpy(), second['All'].to_numpy())
+  with pytest.raises(ValueError):
+    first.iloc[0, 0] = 0.0
+
+  # A change of the source data builds the dataset again.
+  with open(loader.ELEC_HH_PATH, 'a', encoding='utf-8') as file:
+    file.write('\n')
+  session.resolve(handle)
+  assert len(builds) == 2
@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import loader, shared
+from src.utils import schema
+
+SOURCE = Path('elec_hh_data.csv')
+
+
+def hh_frame():
+  index = pd.date_range('2022-01-01', periods=6, freq='30min', name='Datetime')
+  columns = pd.Index(['12345', '67890'], name='Meter')
+  return pd.DataFrame(np.arange(12, dtype=float).reshape(6, 2),
+                      index=index,
+                      columns=columns)
+
+
+def is_mapped(values):
+  while values is not None:
+    if isinstance(values, np.memmap):
+      return True
+    values = values.base
+  return False
+
+
+def test_write_and_read_round_trip(tmp_path):
+  dataf = hh_frame()
+  assert shared.write_shared(dataf, tmp_path, SOURCE, 'a' * 64)
+  shared_dataf = shared.read_shared(tmp_path, SOURCE, 'a' * 64)
+  pd.testing.assert_frame_equal(shared_dataf, dataf, check_freq=False)
+
+
+def test_read_shared_is_mapped_read_only(tmp_path):
+  shared.write_shared(hh_frame(), tmp_path, SOURCE, 'a' * 64)
+  dataf = shared.read_shared(tmp_path, SOURCE, 'a' * 64)
+  values = dataf.to_numpy()
+  assert is_mapped(values)
+  assert not values.flags.writeable
+  # Each meter is contiguous.
+  assert values.flags.f_contiguous
+  with pytest.raises(ValueError):
+    values[0, 0] = 1.0
+
+
+def test_read_shared_of_missing_version(tmp_path):
+  assert shared.read_shared(tmp_path, SOURCE, 'a' * 64) is None
+
+
+def test_write_shared_removes_old_versions(tmp_path):
+  other_source = Path('gas_hh_data.csv')
+  shared.write_shared(hh_frame(), tmp_path, SOURCE, 'a' * 64)
+  shared.write_shared(hh_frame(), tmp_path, other_source, 'a' * 64)
+  shared.write_shared(hh_frame() * 2, tmp_path, SOURCE, 'b' * 64)
+  assert shared.read_shared(tmp_path, SOURCE, 'a' * 64) is None
+  assert shared.read_shared(tmp_path, other_source, 'a' * 64) is not None
+  expected = {
+      path.name
+      for path in shared.shared_paths(tmp_path, SOURCE, 'b' * 64)
+  }
+  expected |= {
+      path.name
+      for path in shared.shared_paths(tmp_path, other_source, 'a' * 64)
+  }
+  assert {path.name for path in tmp_path.iterdir()} == expected
+
+
+def test_write_shared_skips_non_float_frames(tmp_path):
+  dataf = hh_frame().astype(int)
+  assert not shared.write_shared(dataf, tmp_path, SOURCE, 'a' * 64)
+  assert list(tmp_path.iterdir()) == []
+
+
+def test_read_cached_without_directory(monkeypatch):
+  monkeypatch.delenv(shared.SHARED_DATA_DIR_ENV, raising=False)
+  dataf = hh_frame()
+  assert shared.read_cached(SOURCE, 'a' * 64, lambda: dataf) is dataf
+
+
+def test_read_cached_parses_once(tmp_path, monkeypatch):
+  monkeypatch.setenv(shared.SHARED_DATA_DIR_ENV, str(tmp_path))
+  parsed = []
+
+  def parse():
+    parsed.append(True)
+    return hh_frame()
+
+  first = shared.read_cached(SOURCE, 'a' * 64, parse)
+  second = shared.read_cached(SOURCE, 'a' * 64, parse)
+  assert len(parsed) == 1
+  assert not first.to_numpy().flags.writeable
+  pd.testing.assert_frame_equal(second, hh_frame(), check_freq=False)
+  shared.read_cached(SOURCE, 'a' * 64, parse, rebuild=True)
+  assert len(parsed) == 2
+
+
+def test_loader_reads_shared_data(data_dir, monkeypatch):
+  expected = loader.load_hh_data(resample=None, utility=schema.PageSchema.ELEC)
+  shared_dir = data_dir / 'shared'
+  monkeypatch.setenv(shared.SHARED_DATA_DIR_ENV, str(shared_dir))
+  loader.HH_STORE.clear()
+  dataf = loader.load_hh_data(resample=None, utility=schema.PageSchema.ELEC)
+  pd.testing.assert_frame_equal(dataf, expected)
+  assert any(shared_dir.glob(f'{loader.ELEC_HH_PATH.stem}-*.values.npy'))
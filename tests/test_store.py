@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import loader, store
+from src.utils import schema
+from tests import reference
+
+
+def write_source(path: Path, values: list[float]) -> None:
+  pd.DataFrame({'value': values}).to_csv(path, index=False)
+
+
+def test_get_builds_once(tmp_path):
+  source = tmp_path / 'source.csv'
+  write_source(source, [1.0, 2.0])
+  data_store = store.DataStore()
+  builds = []
+
+  def build():
+    builds.append(1)
+    return pd.read_csv(source)
+
+  first = data_store.get('key', source, build)
+  second = data_store.get('key', source, build)
+  assert len(builds) == 1
+  assert np.shares_memory(first['value'].to_numpy(),
+                          second['value'].to_numpy())
+
+
+def test_get_rebuilds_when_content_changes(tmp_path):
+  source = tmp_path / 'source.csv'
+  write_source(source, [1.0, 2.0])
+  data_store = store.DataStore()
+  data_store.get('key', source, lambda: pd.read_csv(source))
+  write_source(source, [3.0, 4.0, 5.0])
+  dataf = data_store.get('key', source, lambda: pd.read_csv(source))
+  assert dataf['value'].tolist() == [3.0, 4.0, 5.0]
+
+
+def test_get_ignores_modification_time_only(tmp_path):
+  source = tmp_path / 'source.csv'
+  write_source(source, [1.0, 2.0])
+  data_store = store.DataStore()
+  digest = data_store.version(source)
+  data_store.get('key', source, lambda: pd.read_csv(source))
+  stat = source.stat()
+  os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+  def build():
+    raise AssertionError('the unchanged source was parsed again')
+
+  data_store.get('key', source, build)
+  assert data_store.version(source) == digest
+
+
+def test_read_only_view_rejects_writes():
+  stored = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]})
+  view = store.read_only_view(stored)
+  with pytest.raises(ValueError):
+    view.iloc[0, 0] = 10.0
+  with pytest.raises(ValueError):
+    view['a'] *= 2
+  assert stored['a'].tolist() == [1.0, 2.0]
+
+
+def test_read_only_view_keeps_changes_local():
+  stored = pd.DataFrame({'a': [1.0, 2.0]}, index=pd.Index([1, 2], name='x'))
+  view = store.read_only_view(stored)
+  view['b'] = view['a'] * 2
+  view.index.name = 'y'
+  view = view.drop(columns=['a'])
+  assert stored.columns.tolist() == ['a']
+  assert stored.index.name == 'x'
+
+
+@pytest.mark.parametrize('resample', [None, '1MS'])
+def test_load_hh_data_matches_parse(data_dir, resample):
+  expected = reference.add_totals(
+      reference.parse_elec_hh_data(loader.ELEC_HH_PATH), resample)
+  dataf = loader.load_hh_data(resample, schema.PageSchema.ELEC)
+  pd.testing.assert_frame_equal(dataf, expected)
+
+
+def test_load_hh_data_shares_stored_frame(data_dir):
+  first = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  second = loader.load_hh_data(None, schema.PageSchema.ELEC)
+  assert first is not second
+  assert np.shares_memory(first['All'].to_numpy(), second['All'].to_numpy())
+  with pytest.raises(ValueError):
+    first.iloc[0, 0] = 0.0
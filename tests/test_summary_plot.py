@@ -0,0 +1,36 @@
+import pandas as pd
+
+from src.components import summary_plot
+from src.utils import schema
+from src.utils.schema import SummarySchema
+
+
+def month_frame(values):
+  return pd.DataFrame({'a': values, 'b': [1.0] * len(values)})
+
+
+def test_statistics_of_empty_month():
+  stats = summary_plot.calculate_statistics(month_frame([]), 2,
+                                            schema.PlotSchema.E_MWH)
+  assert stats == (SummarySchema.NO_DATA, ) * 5
+
+
+def test_statistics_of_month_with_one_value():
+  # Only the current year has data for the month, so there is no previous
+  # year's value whether the data covers one year or several.
+  for no_years in [1, 3]:
+    stats = summary_plot.calculate_statistics(month_frame([2.0]), no_years,
+                                              'Energy')
+    assert stats == (3.0, SummarySchema.NO_DATA, 3.0, 3.0, 3.0)
+
+
+def test_statistics_of_month_missing_years():
+  stats = summary_plot.calculate_statistics(month_frame([2.0, 4.0]), 3,
+                                            'Energy')
+  assert stats == (SummarySchema.NO_DATA, 5.0, 4.0, 3.0, 5.0)
+
+
+def test_statistics_of_full_month():
+  stats = summary_plot.calculate_statistics(month_frame([2000.0, 4000.0]), 2,
+                                            schema.PlotSchema.E_MWH)
+  assert stats == (4.0, 2.0, 3.0, 2.0, 4.0)
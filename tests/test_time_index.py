@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import time_index
+
+TIMESTAMPS = [
+    '2021-06-01',
+    '2021-12-31 23:30',
+    '2022-01-01',
+    '2022-01-01 00:10',
+    '2022-03-15 12:30',
+    '2022-03-15 12:45',
+    '2022-07-01',
+    '2022-12-31 23:59',
+    '2023-01-01',
+    '2023-02-28 23:30',
+    '2024-01-01',
+]
+
+YEARS = [[], [2022], [2023], [2021], [2022, 2023], [2023, 2022], [2022, 2024],
+         [2020, 2021, 2022, 2023, 2024]]
+
+
+def hh_index(kind):
+  index = pd.date_range('2022-01-01',
+                        '2023-02-28 23:30',
+                        freq='30min',
+                        name='Datetime')
+  if kind == 'gaps':
+    # Days and single readings missing, including a whole month.
+    drop = ((index.month == 6) | (index.day == 10) |
+            (index == pd.Timestamp('2022-03-15 12:30')))
+    index = index[~drop]
+  elif kind == 'empty':
+    index = index[:0]
+  return index
+
+
+def hh_frame(kind):
+  index = hh_index(kind)
+  return pd.DataFrame({'12345': np.arange(len(index), dtype=float)},
+                      index=index)
+
+
+INDEX_KINDS = ['regular', 'gaps', 'empty']
+
+
+@pytest.mark.parametrize('kind', INDEX_KINDS)
+@pytest.mark.parametrize('side', ['left', 'right'])
+def test_position_matches_searchsorted(kind, side):
+  index = hh_index(kind)
+  for timestamp in TIMESTAMPS:
+    assert time_index.position(index, timestamp, side) == index.searchsorted(
+        pd.Timestamp(timestamp), side=side)
+
+
+@pytest.mark.parametrize('kind', INDEX_KINDS)
+def test_range_bounds_match_mask(kind):
+  index = hh_index(kind)
+  bounds = [None] + TIMESTAMPS
+  for start in bounds:
+    for end in bounds:
+      mask = np.ones(len(index), dtype=bool)
+      if start is not None:
+        mask &= index >= pd.Timestamp(start)
+      if end is not None:
+        mask &= index <= pd.Timestamp(end)
+      rows = np.arange(len(index))[time_index.range_bounds(index, start, end)]
+      np.testing.assert_array_equal(rows, np.flatnonzero(mask))
+
+
+@pytest.mark.parametrize('kind', INDEX_KINDS)
+@pytest.mark.parametrize('years', YEARS)
+def test_year_bounds_match_mask(kind, years):
+  index = hh_index(kind)
+  bounds = time_index.year_bounds(index, years)
+  assert all(bound.stop > bound.start for bound in bounds)
+  rows = np.concatenate([np.arange(len(index))[bound]
+                         for bound in bounds] + [np.array([], dtype=int)])
+  np.testing.assert_array_equal(rows, np.flatnonzero(index.year.isin(years)))
+
+
+@pytest.mark.parametrize('kind', INDEX_KINDS)
+def test_between_matches_mask(kind):
+  dataf = hh_frame(kind)
+  for start, end in [(None, None), ('2022-03-15 12:30', '2022-07-01'),
+                     ('2022-01-01 00:10', '2022-12-31 23:59'),
+                     ('2024-01-01', None), (None, '2021-12-31 23:30')]:
+    mask = np.ones(len(dataf), dtype=bool)
+    if start is not None:
+      mask &= dataf.index >= pd.Timestamp(start)
+    if end is not None:
+      mask &= dataf.index <= pd.Timestamp(end)
+    pd.testing.assert_frame_equal(time_index.between(dataf, start, end),
+                                  dataf[mask])
+    pd.testing.assert_series_equal(
+        time_index.between(dataf['12345'], start, end), dataf['12345'][mask])
+
+
+@pytest.mark.parametrize('kind', INDEX_KINDS)
+@pytest.mark.parametrize('years', YEARS)
+def test_select_years_matches_mask(kind, years):
+  dataf = hh_frame(kind)
+  expected = dataf[dataf.index.year.isin(years)]
+  pd.testing.assert_frame_equal(time_index.select_years(dataf, years),
+                                expected,
+                                check_freq=False)
+
+
+def test_single_range_is_a_view():
+  dataf = hh_frame('regular')
+  selected = time_index.between(dataf, '2022-03-01', '2022-03-31')
+  assert np.shares_memory(selected.to_numpy(), dataf.to_numpy())
+  selected = time_index.select_years(dataf, [2022, 2023])
+  assert np.shares_memory(selected.to_numpy(), dataf.to_numpy())
+
+
+def test_unsorted_data_is_filtered_with_masks():
+  index = pd.DatetimeIndex(
+      ['2023-02-01', '2022-05-01', '2022-01-01', '2023-01-01'])
+  dataf = pd.DataFrame({'cost': [1.0, 2.0, 3.0, 4.0]}, index=index)
+  selected = time_index.between(dataf, '2022-03-01', '2023-01-01')
+  pd.testing.assert_frame_equal(selected, dataf.iloc[[1, 3]])
+  pd.testing.assert_frame_equal(time_index.select_years(dataf, [2022]),
+                                dataf.iloc[[1, 2]])
+
+
+def test_grid_position():
+  offset = pd.Timedelta('1h10min')
+  assert time_index.grid_position(offset, side='left') == 3
+  assert time_index.grid_position(offset, side='right') == 3
+  offset = pd.Timedelta('1h')
+  assert time_index.grid_position(offset, side='left') == 2
+  assert time_index.grid_position(offset, side='right') == 3
+  assert time_index.grid_position(-pd.Timedelta('45min')) == -1
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from src.data import catalogue, loader, session
+from src.utils import cache, schema
+
+pytest.importorskip('e2sviz')
+
+from src.components import consumption_plots, power_plots  # noqa: E402
+from src.tabs import consumption_tab, power_tab  # noqa: E402
+from src.utils import warmup  # noqa: E402
+
+
+def record_calls(monkeypatch, module, name):
+  calls = []
+  monkeypatch.setattr(module, name, lambda *args: calls.append(args))
+  return calls
+
+
+@pytest.fixture
+def ready(monkeypatch):
+  event = threading.Event()
+  monkeypatch.setattr(warmup, 'READY', event)
+  return event
+
+
+def test_run_is_ready_after_a_failing_step(ready, monkeypatch):
+  ran = []
+
+  def failing_step():
+    raise ValueError('No data')
+
+  monkeypatch.setattr(warmup, 'WARMUP_STEPS',
+                      [failing_step, lambda: ran.append(True)])
+  assert not warmup.is_ready()
+  warmup.run()
+  assert ran == [True]
+  assert warmup.is_ready()
+
+
+def test_warm_consumption_tab(data_dir, monkeypatch):
+  monkeypatch.setattr(consumption_plots, 'BASELINE_CACHE',
+                      cache.LRUCache(consumption_plots.BASELINE_CACHE_BYTES))
+  monkeypatch.setattr(consumption_tab, 'render', lambda: None)
+  calls = record_calls(monkeypatch, consumption_tab, 'update_consump_lineplot')
+  warmup.warm_consumption_tab()
+
+  dataset = session.create_handle(schema.PageSchema.ELEC, drop=['All'])
+  meter_id = consumption_tab.update_dropdown(schema.PageSchema.ELEC)[1]
+  version = loader.hh_data_version(schema.PageSchema.ELEC)
+  assert (session.handle_key(dataset), version) in session.SESSION_DATASETS
+  assert (session.handle_key(dataset), meter_id,
+          consumption_plots.BASELINE_QUANTILE,
+          version) in consumption_plots.BASELINE_CACHE
+
+  periods = consumption_plots.new_consump_periods(
+      session.resolve(dataset),
+      target_col=meter_id,
+      baseline_type=schema.BASELINES[-1])
+  peak_date = periods['Start Datetime'].iloc[0]
+  # The line plot is cached with the inputs the browser sends.
+  assert calls == [(str(peak_date.date()), schema.BASELINES[-1], meter_id,
+                    warmup.client_value(dataset))]
+
+
+def test_warm_power_tab(data_dir, monkeypatch):
+  monkeypatch.setattr(power_tab, 'render', lambda: None)
+  calls = record_calls(monkeypatch, power_tab, 'update_power_lineplot')
+  warmup.warm_power_tab()
+
+  dataset = session.create_handle(schema.PageSchema.ELEC, year_range=False)
+  version = loader.hh_data_version(schema.PageSchema.ELEC)
+  assert (session.handle_key(dataset), version) in session.SESSION_DATASETS
+  meter_id = catalogue.hh_meters(schema.PageSchema.ELEC)[-1]
+  table = power_plots.create_high_demand_table(session.resolve(dataset),
+                                               target_col=meter_id)
+  peak_date = table[schema.HHSchema.DATETIME].iloc[0]
+  assert calls == [(warmup.client_value(peak_date), meter_id)]
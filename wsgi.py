@@ -0,0 +1,24 @@
+"""
+Production entrypoint serving the app under gunicorn:
+
+    gunicorn wsgi:server
+
+The settings are read from gunicorn.conf.py. The half hourly data is shared
+by the workers through the memory-mapped files in SHARED_DATA_DIR, which
+defaults to a folder in the temporary directory. The app is created and
+warmed once in the gunicorn master before the workers are forked, so the
+workers start with warm caches.
+"""
+import os
+import tempfile
+
+from src.data import shared
+
+os.environ.setdefault(
+    shared.SHARED_DATA_DIR_ENV,
+    os.path.join(tempfile.gettempdir(), 'dashboard-plotter-data'))
+
+import main  # noqa: E402
+
+app = main.create_app(warm_in_background=False)
+server = app.server